@@ -1,16 +1,14 @@
 import streamlit as st
-import yfinance as yf
 import pathlib
 import logging
 from bs4 import BeautifulSoup
 import shutil
-from yahooquery import Ticker
 import pandas as pd
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots  # Add this line
 from datetime import datetime, timedelta
-from fuzzywuzzy import process
 import os
+import threading
 
 from timestamp import convert_unix_timestamp_to_date, convert_unix_to_date
 from attribute_mapping import (
@@ -23,15 +21,23 @@ from attribute_mapping import (
 )
 
 from summary_tab_utils import get_fund_weightings, display_fund_info, get_profile_weightings, display_profile_info, get_category_weightings, display_category_info, get_performance_weightings, display_performance_info
-from summarychart10 import format_volume, has_minute_data_in_last_day 
-from statistics_tab_utils import display_valuation_measures
+from summarychart10 import format_volume
+from statistics_tab_utils import get_valuation_measures, display_valuation_measures
 from historicaldata_tab_utils import get_historical_data, display_historical_data
 from profile_tab_utils import display_key_executives
 from financials_tab_utils import get_financials_data, display_financials_data
 from holdings_tab_utils import get_position_weightings, display_position_info, get_sector_weightings, display_sector_info, get_equity_weightings, display_equity_info, get_bond_holdings_data, display_bond_holdings_data, get_bond_ratings, display_bond_ratings, get_fund_holding_info, display_fund_holding_info
 from analysis_tab_utils import get_earnings_trend_data, display_earnings_trend_data
 from option_tab_utils import display_option_chain
-from stock_tickers import stock_options
+from data_gateway import fetch_quote_snapshot, fetch_symbol_modules
+from prefetch import Prefetch
+from intraday_registry import intraday_registry, is_intraday_interval
+from bar_planner import fetch_views
+from bar_store import get_bar_store
+from data_cache import cached, data_cache, preload_data_cache
+from market_data import get_provider
+from universe_snapshots import SnapshotStore
+from symbol_search import SymbolIndex
 
 def modify_tag_content(tag_name, new_content, favicon_filename='PopFaviconBase.png'):
     index_path = pathlib.Path(st.__file__).parent / "static" / "index.html"
@@ -89,22 +95,26 @@ hide_decoration_bar_style = '''
 st.markdown(hide_decoration_bar_style, unsafe_allow_html=True)
 
 
-def get_stock_info(symbol):
-    stock = yf.Ticker(symbol)
-    info = stock.info
-    return info
-
-def get_current_price(symbol):
-    stock_info = Ticker(symbol).summary_detail
-    ask_price = stock_info.get(symbol, {}).get('ask', 'N/A')
-    previous_close = stock_info.get(symbol, {}).get('previousClose', 'N/A')
-    regular_open = stock_info.get(symbol, {}).get('regularMarketOpen', 'N/A')
-    
-    # If ask price N/A or ask price 0 use the previous close instead
-    if ask_price == 'N/A' or ask_price == 0:
-        return previous_close
-    else:
-        return ask_price
+# Every chart view is cut and resampled from the bar store's base series
+# (2m and 1d bars), so switching periods downloads nothing new
+@cached('intraday')
+def download_intraday_bars(symbol, interval, period):
+    return get_bar_store().read_view(symbol, interval, period)
+
+@cached('daily')
+def download_daily_bars(symbol, interval, period):
+    return get_bar_store().read_view(symbol, interval, period)
+
+# Minute and hour bars change within minutes, daily and longer ones once a day
+def download_bars(symbol, interval='1d', period='1mo'):
+    if is_intraday_interval(interval):
+        return download_intraday_bars(symbol, interval, period)
+    return download_daily_bars(symbol, interval, period)
+
+# Header, tabs and option chain all read this one info request
+@cached('quote')
+def get_quote_snapshot(symbol):
+    return fetch_quote_snapshot(symbol)
 
 def display_stock_info(info, mapping):
     data = {}
@@ -298,68 +308,923 @@ def display_stock_info(info, mapping):
 
     return data
 
-@st.cache_resource(show_spinner=False)
-def get_fund_weightings_cached(symbol):
-    return get_fund_weightings(symbol)
+# All quoteSummary modules for a symbol in one upstream request
+@cached('fundamentals', persist=True)
+def get_symbol_modules_cached(symbol):
+    return fetch_symbol_modules(symbol)
 
-@st.cache_resource(show_spinner=False)
-def get_profile_weightings_cached(symbol):
-    return get_profile_weightings(symbol)
+# Holdings snapshot shared by every getter on the Holdings tab
+def get_fund_holdings_cached(symbol):
+    return get_symbol_modules_cached(symbol).holdings()
 
-@st.cache_resource(show_spinner=False)
-def get_category_weightings_cached(symbol):
-    return get_category_weightings(symbol)
+@cached('fundamentals', persist=True)
+def get_valuation_measures_cached(symbol):
+    return get_valuation_measures(symbol)
 
-@st.cache_resource(show_spinner=False)
-def get_performance_weightings_cached(symbol):
-    return get_performance_weightings(symbol)
+@cached('daily')
+def get_historical_data_cached(symbol, start_date=None, end_date=None, period=None, actions=True):
+    return get_historical_data(symbol, start_date, end_date, period, actions)
 
-@st.cache_resource(show_spinner=False)
-def get_bond_ratings_cached(symbol):
-    return get_bond_ratings(symbol)
+@cached('fundamentals', persist=True)
+def get_financials_data_cached(symbol, statement_type, period):
+    return get_financials_data(symbol, statement_type, period)
 
-@st.cache_resource(show_spinner=False)
-def get_bond_holdings_data_cached(symbol):
-    return get_bond_holdings_data(symbol)
+@cached('options')
+def get_expiration_dates(symbol):
+    return get_provider().option_expirations(symbol)
 
 @st.cache_resource(show_spinner=False)
-def get_equity_weightings_cached(symbol):
-    return get_equity_weightings(symbol)
+def get_snapshot_store():
+    return SnapshotStore()
 
+# Build the search index over the latest memory-mapped universe snapshot once
+# per process, shared by every session. The one-element list is swapped to a
+# patched copy by refresh_symbol_index, never changed in place.
 @st.cache_resource(show_spinner=False)
-def get_sector_weightings_cached(symbol):
-    return get_sector_weightings(symbol)
+def get_symbol_index_ref():
+    version, universe = get_snapshot_store().load()
+    return [SymbolIndex(universe, version)]
 
-@st.cache_resource(show_spinner=False)
-def get_position_weightings_cached(symbol):
-    return get_position_weightings(symbol)
+def get_symbol_index():
+    return get_symbol_index_ref()[0]
 
 @st.cache_resource(show_spinner=False)
-def get_fund_holding_info_cached(symbol):
-    return get_fund_holding_info(symbol)
+def get_symbol_index_lock():
+    return threading.Lock()
 
+# Runs once per process: warms the data cache from the disk cache
 @st.cache_resource(show_spinner=False)
-def display_valuation_measures_cached(symbol):
-    return display_valuation_measures(symbol)
-
-@st.cache_resource(show_spinner=False)
-def get_earnings_trend_data_cached(symbol):
-    return get_earnings_trend_data(symbol)
-
-# Search for both the symbol and company name in the stock_options dictionary
+def warm_data_cache():
+    loaded = preload_data_cache()
+    logging.info(f'Preloaded {loaded} disk cache entries')
+    return loaded
+
+# Bring the shared index up to date by applying the deltas of universe
+# snapshots committed since it was built, instead of reloading the universe.
+# Sessions searching the old index keep using it until they next read the ref.
+def refresh_symbol_index():
+    symbol_index_ref = get_symbol_index_ref()
+    store = get_snapshot_store()
+    if store.latest_version() > symbol_index_ref[0].version:
+        with get_symbol_index_lock():
+            symbol_index = symbol_index_ref[0]
+            for delta in store.deltas_since(symbol_index.version):
+                symbol_index = symbol_index.apply_delta(delta)
+            symbol_index_ref[0] = symbol_index
+    return symbol_index_ref[0]
+
+# Search for both the symbol and company name in the stock_options dictionary,
+# topping up with typo-tolerant matches when the exact search comes up short
 def find_related_options(user_input, limit=5):
-    user_input = user_input.upper()
-    related_options = []
-    for option, full_name in stock_options.items():
-        option_upper = option.upper()
-        full_name_upper = full_name.upper()
-        if user_input in option_upper or user_input in full_name_upper:
-            related_options.append((option, full_name))
-            if len(related_options) == limit:
-                break
+    symbol_index = get_symbol_index()
+    related_options = symbol_index.search(user_input, limit)
+    if user_input and len(related_options) < limit:
+        for option in symbol_index.fuzzy_search(user_input, limit):
+            if option not in related_options:
+                related_options.append(option)
+                if len(related_options) == limit:
+                    break
     return related_options
 
+# Chart periods offered on the Summary tab, by what data the symbol has
+INTRADAY_PERIOD_OPTIONS = {
+    '1d': {'interval': '2m', 'period': '1d'},
+    '5d': {'interval': '15m', 'period': '5d'},
+    '1mo': {'interval': '30m', 'period': '1mo'},
+    '6mo': {'interval': '1d', 'period': '6mo'},
+    'ytd': {'interval': '1d', 'period': 'ytd'},
+    '1y': {'interval': '1d', 'period': '1y'},
+    '5y': {'interval': '1wk', 'period': '5y'},
+    'max': {'interval': '1mo', 'period': 'max'}
+}
+DAILY_PERIOD_OPTIONS = {
+    '6mo': {'interval': '1d', 'period': '6mo'},
+    '1y': {'interval': '1d', 'period': '1y'},
+    '5y': {'interval': '1wk', 'period': '5y'},
+    'max': {'interval': '1wk', 'period': 'max'}
+}
+NO_VOLUME_PERIOD_OPTIONS = {
+    '1mo': {'interval': '1d', 'period': '1mo'},
+    'ytd': {'interval': '1d', 'period': 'ytd'},
+    '1y': {'interval': '1d', 'period': '1y'},
+    '5y': {'interval': '1wk', 'period': '5y'},
+    'max': {'interval': '1mo', 'period': 'max'}
+}
+
+# Daily bars the Summary tab checks for data and volume before charting
+SUMMARY_CHECK_VIEW = ('1d', '1mo')
+
+def summary_period_options(has_volume, has_intraday):
+    if not has_volume:
+        # If there is no minute data and no volume data, exclude intraday options
+        return NO_VOLUME_PERIOD_OPTIONS
+    # If the symbol has intraday bars, include intraday options
+    return INTRADAY_PERIOD_OPTIONS if has_intraday else DAILY_PERIOD_OPTIONS
+
+# (interval, period) the chart will most likely show, before the check has
+# run: the selected period if it is offered, otherwise the first. Asks the
+# registry with the quote's type and exchange, as render_summary_tab does.
+def summary_chart_view(symbol, quote, selected_option):
+    has_intraday = intraday_registry.has_intraday(symbol, quote.quote_type, quote.exchange)
+    time_period_options = summary_period_options(True, has_intraday)
+    if selected_option not in time_period_options:
+        selected_option = next(iter(time_period_options))
+    return time_period_options[selected_option]['interval'], time_period_options[selected_option]['period']
+
+# Summary tab: price chart, then the key quote and fund figures
+def render_summary_tab(symbol, prefetch):
+    # st.write("#### Summary")
+    quote = prefetch.result('quote')
+    stock_info = quote.info
+
+    # Fetch historical stock data
+    try:
+        summary_bars = prefetch.result('summary_bars')
+        stock_data = summary_bars[SUMMARY_CHECK_VIEW]
+
+        # Check if stock_data is empty
+        if stock_data.empty:
+            st.error(f"No data available for the stock with symbol '{symbol}'. Please enter a valid symbol.")
+            st.stop()  # Stop further execution of the code
+
+    except IndexError:
+        st.error(f"Stock with symbol '{symbol}' does not exist. Please enter a valid symbol.")
+        st.stop()  # Stop further execution of the code
+
+    # Create two columns
+    col1, col2 = st.columns([1, 1])
+
+    # Check if 'Volume' column is present and contains non-zero values
+    has_volume = 'Volume' in stock_data.columns and not stock_data['Volume'].eq(0).all()
+    has_intraday = intraday_registry.has_intraday(symbol, quote.quote_type, quote.exchange)
+    time_period_options = summary_period_options(has_volume, has_intraday)
+
+    selected_option = col1.selectbox('Select Time Period:', list(time_period_options.keys()), key='unique_key_for_selectbox')
+
+    # Option for selecting chart type
+    chart_type_options = ['Line', 'Area', 'Candlestick']
+    selected_chart_type = col2.selectbox('Select Chart Type:', chart_type_options, index=0, key='unique_key_for_chart_type_selectbox')
+
+    # Historical stock data for the selected time period, usually already
+    # fetched with the check above
+    interval = time_period_options[selected_option]['interval']
+    period = time_period_options[selected_option]['period']
+    chart_view = (interval, period)
+    if chart_view not in summary_bars:
+        summary_bars = fetch_views([chart_view], download_bars)
+    stock_data = summary_bars[chart_view]
+    intraday_registry.record_bars(symbol, interval, stock_data, quote.quote_type, quote.exchange)
+    if is_intraday_interval(interval) and stock_data.empty:
+        # The registry guessed wrong and has now learned better: rebuild the
+        # period choices without the intraday views
+        st.rerun()
+
+    # Calculate percentage change
+    start_price = stock_data['Close'].iloc[0]
+    end_price = stock_data['Close'].iloc[-1]
+    percentage_change = ((end_price - start_price) / start_price) * 100
+
+    # # Display stock dataframe
+    # st.write(stock_data)
+
+    if 'Volume' in stock_data.columns and not stock_data['Volume'].eq(0).all():
+
+        if selected_option == '1d':
+            formatted_dates = stock_data.index.strftime('%I:%M %p')
+            formatted_labels = stock_data.index.strftime('%I %p')
+            hover_format = stock_data.index.strftime('%I:%M %p')
+            tickvals = formatted_dates[::64]  # Display every 125th date
+            ticktext = formatted_labels[::64]
+        elif selected_option in ['5d']:
+            formatted_dates = stock_data.index.strftime('%Y-%m-%d %I:%M %p')
+            formatted_labels = stock_data.index.strftime('%a')
+            hover_format = stock_data.index.strftime('%a, %b %d, %I:%M %p')
+            tickvals = formatted_dates[::30]
+            ticktext = formatted_labels[::30]
+        elif selected_option in ['1mo']:
+            formatted_dates = stock_data.index.strftime('%Y-%m-%d %I:%M %p')
+            formatted_labels = stock_data.index.strftime('%b %#d')
+            hover_format = stock_data.index.strftime('%b %#d, %y')
+            tickvals = formatted_dates[::90]
+            ticktext = formatted_labels[::90]
+        elif selected_option in ['6mo']:
+            formatted_dates = stock_data.index.strftime('%Y-%m-%d %I:%M %p')
+            formatted_labels = stock_data.index.strftime('%b %#d, %y')
+            hover_format = stock_data.index.strftime('%b %#d, %y')
+            tickvals = formatted_dates[::65]
+            ticktext = formatted_labels[::65]
+        elif selected_option in ['ytd']:
+            formatted_dates = stock_data.index.strftime('%Y-%m-%d %I:%M %p')
+            formatted_labels = stock_data.index.strftime('%b %#d, %y')
+            hover_format = stock_data.index.strftime('%b %#d, %y')
+            tickvals = formatted_dates[::125]
+            ticktext = formatted_labels[::125]
+        elif selected_option in ['1y']:
+            formatted_dates = stock_data.index.strftime('%Y-%m-%d %I:%M %p')
+            formatted_labels = stock_data.index.strftime('%b %#d, %y')
+            hover_format = stock_data.index.strftime('%b %#d, %y')
+            tickvals = formatted_dates[::126]
+            ticktext = formatted_labels[::126]
+        elif selected_option in ['5y']:
+            formatted_dates = stock_data.index.strftime('%Y-%m-%d %I:%M %p')
+            formatted_labels = stock_data.index.strftime('%b %#d, %y')
+            hover_format = stock_data.index.strftime('%b %#d, %y')
+            tickvals = formatted_dates[::131]
+            ticktext = formatted_labels[::131]
+        elif selected_option in ['max']:
+            formatted_dates = stock_data.index.strftime('%Y-%m-%d %I:%M %p')
+            formatted_labels = stock_data.index.strftime('%b %#d, %y')
+            hover_format = stock_data.index.strftime('%b %#d, %y')
+            tickvals = formatted_dates[::79]
+            ticktext = formatted_labels[::79]
+    else:
+
+        if selected_option in ['1mo']:
+            formatted_dates = stock_data.index.strftime('%Y-%m-%d %I:%M %p')
+            formatted_labels = stock_data.index.strftime('%b %#d')
+            hover_format = stock_data.index.strftime('%b %#d, %y')
+            tickvals = formatted_dates[::7]
+            ticktext = formatted_labels[::7]
+        elif selected_option in ['ytd']:
+            formatted_dates = stock_data.index.strftime('%Y-%m-%d %I:%M %p')
+            formatted_labels = stock_data.index.strftime('%b %#d, %y')
+            hover_format = stock_data.index.strftime('%b %#d, %y')
+            tickvals = formatted_dates[::9]
+            ticktext = formatted_labels[::9]
+        elif selected_option in ['1y']:
+            formatted_dates = stock_data.index.strftime('%Y-%m-%d %I:%M %p')
+            formatted_labels = stock_data.index.strftime('%b %#d, %y')
+            hover_format = stock_data.index.strftime('%b %#d, %y')
+            tickvals = formatted_dates[::126]
+            ticktext = formatted_labels[::126]
+        elif selected_option in ['5y']:
+            formatted_dates = stock_data.index.strftime('%Y-%m-%d %I:%M %p')
+            formatted_labels = stock_data.index.strftime('%b %#d, %y')
+            hover_format = stock_data.index.strftime('%b %#d, %y')
+            tickvals = formatted_dates[::131]
+            ticktext = formatted_labels[::131]
+        elif selected_option in ['max']:
+            formatted_dates = stock_data.index.strftime('%Y-%m-%d %I:%M %p')
+            formatted_labels = stock_data.index.strftime('%b %#d, %y')
+            hover_format = stock_data.index.strftime('%b %#d, %y')
+            tickvals = formatted_dates[::79]
+            ticktext = formatted_labels[::79]
+
+    # Create subplot with two y-axes
+    fig = make_subplots(specs=[[{"secondary_y": True}]])
+
+    #Add shaded areas for every other tick on the x-axis for background
+    for i in range(0, len(tickvals), 2):
+        fig.add_shape(
+            type="rect",
+            x0=tickvals[i],
+            x1=tickvals[i + 1] if i + 1 < len(tickvals) else formatted_dates[-1],
+            y0=-1e9,
+            y1=1e9,
+            fillcolor="rgba(245,245,245,1.000)",
+            opacity=1,
+            layer="below",
+            line=dict(width=0),
+        )
+
+    # Default chart type is 'line'
+    chart_type = selected_chart_type
+
+    # Add trace based on chart type
+    if chart_type == 'Line':
+        trace = go.Scatter(x=formatted_dates, y=stock_data['Close'], mode='lines', name=f'')
+    elif chart_type == 'Area':
+        trace = go.Scatter(x=formatted_dates, y=stock_data['Close'], mode='lines', fill='tozeroy', name=f'', fillcolor='rgba(0, 104, 201, 1)')
+    elif chart_type == 'Candlestick':
+        trace = go.Candlestick(x=formatted_dates,
+                            open=stock_data['Open'],
+                            high=stock_data['High'],
+                            low=stock_data['Low'],
+                            close=stock_data['Close'],
+                            name=f'{symbol}',
+                            hoverinfo='x+text+name')
+
+        # Remove range slider for candlestick chart
+        fig.update_xaxes(rangeslider_visible=False)
+
+    # Add trace to the subplot
+    fig.add_trace(trace)
+
+    # Check if volume data is available
+    if 'Volume' in stock_data.columns and not stock_data['Volume'].eq(0).all():
+        # Add bar trace for volume
+        volume_colors = ['red' if close_price < open_price else 'green' for open_price, close_price in zip(stock_data['Open'], stock_data['Close'])]
+
+        if chart_type in ['Line', 'Candlestick']:
+            fig.add_trace(go.Bar(x=formatted_dates, y=stock_data['Volume'], yaxis='y2', name='Volume', marker_color=volume_colors, hoverinfo='skip'))
+        else:
+            fig.add_trace(go.Bar(x=formatted_dates, y=stock_data['Volume'], yaxis='y2', name='Volume', marker_color='rgba(160, 198, 255, 1)', hoverinfo='skip'))
+
+        # Update axis labels and layout for volume data available
+        fig.update_yaxes(showspikes=True, nticks=5, spikemode="across", spikethickness=-2, side='right')
+        fig.update_yaxes(showspikes=True, spikemode="across", spikethickness=-2, side='right', secondary_y=True, showticklabels=False)
+
+        # Add this section to dynamically set the y-axis ranges based on selected_option
+        if selected_option == '1d':
+            yaxis_range = [stock_data['Close'].min() * 0.99, stock_data['Close'].max() * 1.01]
+            yaxis2_range = [stock_data['Volume'].min() * 0.20, stock_data['Volume'].max() * 5.80]
+        elif selected_option in ['5d']:
+            yaxis_range = [stock_data['Close'].min() * 0.99, stock_data['Close'].max() * 1.01]
+            yaxis2_range = [stock_data['Volume'].min() * 0.20, stock_data['Volume'].max() * 4.01]
+        elif selected_option in ['1mo']:
+            yaxis_range = [stock_data['Close'].min() * 0.99, stock_data['Close'].max() * 1.01]
+            yaxis2_range = [stock_data['Volume'].min() * 0.20, stock_data['Volume'].max() * 5.01]
+        elif selected_option in ['6mo']:
+            yaxis_range = [stock_data['Close'].min() * 0.99, stock_data['Close'].max() * 1.01]
+            yaxis2_range = [stock_data['Volume'].min() * 0.20, stock_data['Volume'].max() * 5.80]
+        elif selected_option in ['ytd']:
+            yaxis_range = [stock_data['Close'].min() * 0.99, stock_data['Close'].max() * 1.01]
+            yaxis2_range = [stock_data['Volume'].min() * 0.20, stock_data['Volume'].max() * 5.80]
+        elif selected_option in ['1y']:
+            yaxis_range = [stock_data['Close'].min() * 0.99, stock_data['Close'].max() * 1.01]
+            yaxis2_range = [stock_data['Volume'].min() * 0.20, stock_data['Volume'].max() * 5.80]
+        elif selected_option in ['5y']:
+            yaxis_range = [stock_data['Close'].min() * 0.99, stock_data['Close'].max() * 1.01]
+            yaxis2_range = [stock_data['Volume'].min() * 0.20, stock_data['Volume'].max() * 5.80]
+        elif selected_option in ['max']:
+            yaxis_range = [stock_data['Close'].min() * 0.99, stock_data['Close'].max() * 1.01]
+            yaxis2_range = [stock_data['Volume'].min() * 0.20, stock_data['Volume'].max() * 5.80]
+
+    else:
+        # Update axis labels and layout for no volume data available
+        fig.update_yaxes(showspikes=True, nticks=5, spikemode="across", spikethickness=-2, side='right')
+        fig.update_yaxes(showspikes=True, spikemode="across", spikethickness=-2, side='right', secondary_y=True, showticklabels=False)
+
+        # Add this section to dynamically set the y-axis ranges based on selected_option
+        if selected_option in ['1mo']:
+            yaxis_range = [stock_data['Close'].min() * 0.99, stock_data['Close'].max() * 1.01]
+            yaxis2_range = None
+        elif selected_option in ['ytd']:
+            yaxis_range = [stock_data['Close'].min() * 0.99, stock_data['Close'].max() * 1.01]
+            yaxis2_range = None
+        elif selected_option in ['1y']:
+            yaxis_range = [stock_data['Close'].min() * 0.99, stock_data['Close'].max() * 1.01]
+            yaxis2_range = None    
+        elif selected_option in ['5y']:
+            yaxis_range = [stock_data['Close'].min() * 0.99, stock_data['Close'].max() * 1.01]
+            yaxis2_range = None
+        elif selected_option in ['max']:
+            yaxis_range = [stock_data['Close'].min() * 0.99, stock_data['Close'].max() * 1.01]
+            yaxis2_range = None
+
+    fig.update_layout(
+        height=500,
+        hovermode='closest',
+        hoverlabel=dict(bgcolor="white", font_color="black", font_size=14, font_family="Arial", bordercolor="black"),
+        xaxis=dict(showspikes=True, spikemode="across", ticktext=ticktext, tickvals=tickvals, spikethickness=-2, fixedrange=True),
+        yaxis=dict(side='right', range=yaxis_range, fixedrange=True),
+        yaxis2=dict(showticklabels=False, overlaying='y', showgrid=False, range=yaxis2_range, fixedrange=True),
+        showlegend=False,
+        margin=dict(b=0, t=90)
+    )
+
+    # Add this section to dynamically set the hovertemplate and text for update_traces
+    if selected_option == '1d':
+        hover_template = '%{text}<br>'
+    elif selected_option in ['5d']:
+        hover_template = '%{text}<br>'
+    elif selected_option in ['1mo']:
+        hover_template = '%{text}<br>'
+    elif selected_option in ['6mo']:
+        hover_template = '%{text}<br>'
+    elif selected_option in ['ytd']:
+        hover_template = '%{text}<br>'
+    elif selected_option in ['1y']:
+        hover_template = '%{text}<br>'
+    elif selected_option in ['5y']:
+        hover_template = '%{text}<br>'
+    elif selected_option in ['max']:
+        hover_template = '%{text}<br>'
+
+    # Find the most recent closing price
+    most_recent_close = stock_data['Close'].iloc[-1]
+
+    # Add a scatter trace so annotation can find y-axis of the most recent price
+    fig.add_trace(go.Scatter(
+        x=[formatted_dates[-1]],
+        y=[most_recent_close],
+        mode='markers',
+        marker=dict(color='red', size=10),
+        showlegend=False,
+        hoverinfo='none',
+        visible=False
+    ))
+
+    # Update the layout to ensure the annotation stays on the y-axis
+    fig.update_layout(
+        annotations=[
+            dict(
+                x=1,  # Adjust this value to control the x-position of the annotation
+                y=most_recent_close,
+                xref='paper',
+                yref='y',
+                text=f'${most_recent_close:.2f}',  # Display the price value
+                showarrow=False,
+                font=dict(color='White', size=12),
+                align='left',
+                # bordercolor='red',
+                # borderwidth=1,
+                # borderpad=4,
+                bgcolor='rgba(0, 104, 201, 1)'
+            )
+        ]
+    )
+
+    # Trace for Line & Area
+    fig.update_traces(
+        hovertemplate=hover_template,
+        hoverinfo='x',
+        text=[f'{symbol}<br>{hover_format[i]}<br>${open_price:.2f} Open<br>${high_price:.2f} High<br>${low_price:.2f} Low<br>${close_price:.2f} Close<br>{format_volume(volume)} Volume'
+            for i, (open_price, high_price, low_price, close_price, volume) in enumerate(
+                zip(stock_data['Open'], stock_data['High'], stock_data['Low'], stock_data['Close'], stock_data['Volume']))],
+        selector=dict(type='scatter')
+    )
+
+    # Get the current high and low for the corresponding time period option.
+    current_high = stock_data['Close'].max()
+    current_low = stock_data['Close'].min()
+
+    # Calculate the percentage from the current low and high
+    percent_from_low = ((most_recent_close - current_low) / current_low) * 100
+    percent_from_high = ((most_recent_close - current_high) / current_high) * 100
+
+    # Percent Change of symbol
+    bgcolor = "green" if percentage_change >= 0 else "red"
+    fig.add_annotation(
+        text=f'({selected_option}) {symbol} {stock_data["Close"].iloc[-1]:.2f} {percentage_change:.2f}%',
+        xref='paper', yref='paper',
+        x=0.00, y=1.20,
+        showarrow=False,
+        font=dict(size=13, color="black", family="Arial Black"),
+        bgcolor=bgcolor,  # Set bgcolor based on the sign of percentage_change
+    )
+
+    fig.add_annotation(
+        text=f'L {current_low:.2f}\n {percent_from_low:.2f}%\n',
+        xref='paper', yref='paper',
+        x=0.00, y=1.10,
+        showarrow=False,
+        font=dict(size=13, color="black", family="Arial Black"),
+        bgcolor='rgba(245,245,245,1.000)',
+    )
+
+    # Get the width of the low value annotation
+    low_annotation_width = 0.94  # Adjust this value based on your layout
+
+    fig.add_annotation(
+        text=f'H {current_high:.2f}\n {percent_from_high:.2f}%\n',
+        xref='paper', yref='paper',
+        x=low_annotation_width,  # Set the x-coordinate to be the right edge of the low annotation
+        y=1.10,
+        showarrow=False,
+        font=dict(size=13, color="black", family="Arial Black"),
+        bgcolor='rgba(245,245,245,1.000)',
+    )
+
+    # Border top-side
+    fig.add_shape(
+                type="line",
+                xref="paper",
+                yref="paper",
+                x0=0,
+                y0=1.12,
+                x1=.94,
+                y1=1.12,
+                line=dict(
+                    color="white",
+                    width=2,
+                )
+            )
+
+    # Border bot-side
+    fig.add_shape(
+                type="line",
+                xref="paper",
+                yref="paper",
+                x0=0,
+                y0=0,
+                x1=.94,
+                y1=0,
+                line=dict(
+                    color="rgba(245,245,245,1.000)",
+                    width=2,
+                )
+            )
+
+    # Border right-side
+    fig.add_shape(
+                type="line",
+                xref="paper",
+                yref="paper",
+                x0=.94,
+                y0=1.12,
+                x1=.94,
+                y1=0,
+                line=dict(
+                    color="rgba(245,245,245,1.000)",
+                    width=3,
+                )
+            )
+
+    # Set hoverinfo and text for Candlestick
+    hoverinfo_candlestick = 'text'
+    text_candlestick = [
+        f'${open_price:.2f} Open<br>${high_price:.2f} High<br>${low_price:.2f} Low<br>${close_price:.2f} Close<br>{format_volume(volume)} Volume'
+        for open_price, high_price, low_price, close_price, volume in
+        zip(stock_data['Open'], stock_data['High'], stock_data['Low'], stock_data['Close'], stock_data['Volume'])
+    ]
+
+    # Trace for Candlestick
+    fig.update_traces(
+        hoverinfo='text',
+        text=[f'{symbol}<br>{hover_format[i]}<br>${open_price:.2f} Open<br>${high_price:.2f} High<br>${low_price:.2f} Low<br>${close_price:.2f} Close<br>{format_volume(volume)} Volume'
+            for i, (open_price, high_price, low_price, close_price, volume) in enumerate(
+                zip(stock_data['Open'], stock_data['High'], stock_data['Low'], stock_data['Close'], stock_data['Volume']))],
+        selector=dict(type='candlestick')
+    )
+
+    # Hides the tools on the Mode Bar
+    config = {'displayModeBar': False}
+    st.plotly_chart(fig, config=config, use_container_width=True)
+
+
+    st.markdown("""<hr style="height:2px; margin-top: 10px; margin-bottom: 10px; border:none;color:#333;background-color:#333;" /> """, unsafe_allow_html=True)
+    # Separate content into two columns
+    col1, col2 = st.columns(2)
+    summary_view = prefetch.result('modules').summary()
+    with col1:
+        display_stock_info(stock_info, summary1_info_mapping)
+
+        # Call the function to get fund weightings
+        fund_weightings = get_fund_weightings(summary_view.fund_performance)
+
+        # Display fund weightings if available
+        if fund_weightings:
+            display_fund_info(fund_weightings)
+        else:
+            # Instead of displaying a warning, simply don't display anything
+            pass
+
+        # Call the function to get profile weightings
+        profile_weightings = get_profile_weightings(summary_view.fund_profile)
+
+        # Display fund weightings if available
+        if profile_weightings:
+            display_profile_info(profile_weightings)
+        else:
+            # Instead of displaying a warning, simply don't display anything
+            pass
+
+        # Call the function to get category weightings
+        category_weightings = get_category_weightings(summary_view.fund_profile)
+
+        # Display fund weightings if available
+        if category_weightings:
+            display_category_info(category_weightings)
+        else:
+            # Instead of displaying a warning, simply don't display anything
+            pass
+
+    with col2:
+        display_stock_info(stock_info, summary2_info_mapping)
+
+        # Call the function to get performance weightings
+        performance_weightings = get_performance_weightings(summary_view.fund_performance)
+
+        # Display performance weightings if available
+        if performance_weightings:
+            display_performance_info(performance_weightings)
+        else:
+            # Instead of displaying a warning, simply don't display anything
+            pass
+
+    st.markdown("""<hr style="height:2px; margin-top: 10px; margin-bottom: 10px; border:none;color:#333;background-color:#333;" /> """, unsafe_allow_html=True)
+
+# Statistics tab: valuation measures, trading information and financial highlights
+def render_statistics_tab(symbol, prefetch):
+    stock_info = prefetch.result('quote').info
+    st.write("#### Valuation Measures")
+    st.markdown("""<hr style="height:2px; margin-top: 10px; margin-bottom: 10px; border:none;color:#333;background-color:#333;" /> """, unsafe_allow_html=True)
+
+    # Display the valuation measures
+    display_valuation_measures(prefetch.result('valuation_measures'))
+
+    col1, col2 = st.columns(2)
+
+    with col1:
+        st.write("#### Trading Information")
+        st.markdown("""<hr style="height:2px; margin-top: 10px; margin-bottom: 10px; border:none;color:#333;background-color:#333;" /> """, unsafe_allow_html=True)
+
+        st.write("##### Stock Price History")
+        display_stock_info(stock_info, financial_stock_mapping)
+        st.markdown("""<hr style="height:2px; margin-top: 5px; margin-bottom: 5px; border:none;color:#333;background-color:#333;" /> """, unsafe_allow_html=True)
+
+        st.write("##### Share Statistics")
+        display_stock_info(stock_info, financial_share_mapping)
+        st.markdown("""<hr style="height:2px; margin-top: 5px; margin-bottom: 5px; border:none;color:#333;background-color:#333;" /> """, unsafe_allow_html=True)
+
+        st.write("##### Dividends & Splits")
+        display_stock_info(stock_info, financial_dividends_mapping)
+
+    with col2:
+        # Check if there is any data from financial_fiscal_mapping, financial_profitability_mapping, and financial_management_mapping
+        if any(stock_info.get(attribute, 'N/A') != 'N/A' for attribute in financial_fiscal_mapping) \
+                or any(stock_info.get(attribute, 'N/A') != 'N/A' for attribute in financial_profitability_mapping) \
+                or any(stock_info.get(attribute, 'N/A') != 'N/A' for attribute in financial_management_mapping) \
+                or any(stock_info.get(attribute, 'N/A') != 'N/A' for attribute in financial_income_mapping) \
+                or any(stock_info.get(attribute, 'N/A') != 'N/A' for attribute in financial_balance_mapping) \
+                or any(stock_info.get(attribute, 'N/A') != 'N/A' for attribute in financial_cash_mapping):
+            st.write("#### Financial Highlights")
+            st.markdown("""<hr style="height:2px; margin-top: 10px; margin-bottom: 10px; border:none;color:#333;background-color:#333;" /> """, unsafe_allow_html=True)
+
+            # Check if there is any data from financial_fiscal_mapping
+            if any(stock_info.get(attribute, 'N/A') != 'N/A' for attribute in financial_fiscal_mapping):
+                st.write("##### Fiscal Year")
+                display_stock_info(stock_info, financial_fiscal_mapping)
+                st.markdown("""<hr style="height:2px; margin-top: 5px; margin-bottom: 5px; border:none;color:#333;background-color:#333;" /> """, unsafe_allow_html=True)
+
+            # Check if there is any data from financial_profitability_mapping
+            if any(stock_info.get(attribute, 'N/A') != 'N/A' for attribute in financial_profitability_mapping):
+                st.write("##### Profitability")
+                display_stock_info(stock_info, financial_profitability_mapping)
+                st.markdown("""<hr style="height:2px; margin-top: 5px; margin-bottom: 5px; border:none;color:#333;background-color:#333;" /> """, unsafe_allow_html=True)
+
+            # Check if there is any data from financial_management_mapping
+            if any(stock_info.get(attribute, 'N/A') != 'N/A' for attribute in financial_management_mapping):
+                st.write("##### Management effectiveness")
+                display_stock_info(stock_info, financial_management_mapping)
+                st.markdown("""<hr style="height:2px; margin-top: 5px; margin-bottom: 5px; border:none;color:#333;background-color:#333;" /> """, unsafe_allow_html=True)
+
+            # Check if there is any data from financial_income_mapping
+            if any(stock_info.get(attribute, 'N/A') != 'N/A' for attribute in financial_income_mapping):
+                st.write("##### Income Statement")
+                display_stock_info(stock_info, financial_income_mapping)
+                st.markdown("""<hr style="height:2px; margin-top: 5px; margin-bottom: 5px; border:none;color:#333;background-color:#333;" /> """, unsafe_allow_html=True)
+
+            # Check if there is any data from financial_balance_mapping
+            if any(stock_info.get(attribute, 'N/A') != 'N/A' for attribute in financial_balance_mapping):
+                st.write("##### Balance Sheet")
+                display_stock_info(stock_info, financial_balance_mapping)
+                st.markdown("""<hr style="height:2px; margin-top: 5px; margin-bottom: 5px; border:none;color:#333;background-color:#333;" /> """, unsafe_allow_html=True)
+
+            # Check if there is any data from financial_cash_mapping
+            if any(stock_info.get(attribute, 'N/A') != 'N/A' for attribute in financial_cash_mapping):
+                st.write("##### Cash Flow Statement")
+                display_stock_info(stock_info, financial_cash_mapping)
+
+# Historical Data tab
+def render_historical_data_tab(symbol, prefetch):
+    st.write("#### Historical Data")
+    st.markdown("""<hr style="height:2px; margin-top: 10px; margin-bottom: 10px; border:none;color:#333;background-color:#333;" /> """, unsafe_allow_html=True)
+
+    # Display historical data in a datatable; only the selected period is
+    # read, and a period revisited within its TTL comes from the data cache
+    display_historical_data(symbol, get_historical_data_cached)
+
+# Profile tab
+def render_profile_tab(symbol, prefetch):
+    stock_info = prefetch.result('quote').info
+    st.write("#### Profile")
+    st.markdown("""<hr style="height:2px; margin-top: 10px; margin-bottom: 10px; border:none;color:#333;background-color:#333;" /> """, unsafe_allow_html=True)
+
+    # Separate content into two columns
+    col1, col2 = st.columns(2)
+    with col1:
+        display_stock_info(stock_info, profile1_info_mapping)
+    with col2:
+        display_stock_info(stock_info, profile2_info_mapping)
+        pass
+
+    st.markdown("""<hr style="height:2px; margin-top: 5px; margin-bottom: 5px; border:none;color:#333;background-color:#333;" /> """, unsafe_allow_html=True)
+    st.write("##### Description")
+    display_stock_info(stock_info, profile4_info_mapping)
+    st.markdown("""<hr style="height:2px; margin-top: 5px; margin-bottom: 5px; border:none;color:#333;background-color:#333;" /> """, unsafe_allow_html=True)
+
+    # Call the new display_key_executives function
+    display_key_executives(stock_info)
+
+# Financials tab
+def render_financials_tab(symbol, prefetch):
+    st.write("#### Financials")
+    st.markdown("""<hr style="height:2px; margin-top: 10px; margin-bottom: 10px; border:none;color:#333;background-color:#333;" /> """, unsafe_allow_html=True)
+    # Separate content into two columns
+    col1, col2 = st.columns(2)
+
+    with col1:
+        # Add a button to select statement type
+        statement_type = st.radio("Select Financial Statement:", ('Income Statement', 'Balance Sheet', 'Cash Flow'), key="statement_type")
+
+    with col2:
+        # Add a button to select the period (annual or quarterly)
+        period = st.radio("Select Period:", ('Annual', 'Quarterly'), key="statement_period")
+        selected_period = 'annual' if period == 'Annual' else 'quarterly'
+
+    # Map the user-friendly names to the corresponding API names
+    statement_type_mapping = {
+        'Income Statement': 'income',
+        'Balance Sheet': 'balance',
+        'Cash Flow': 'cashflow'
+    }
+
+    selected_statement_type = statement_type_mapping.get(statement_type)
+
+    st.write(f"#### {selected_statement_type.capitalize()} ({selected_period.capitalize()}) Financials")
+
+    # Fetch financials data, prefetched when the selection was already known
+    if (selected_statement_type, selected_period) == selected_statement(st.session_state):
+        financials_data = prefetch.result('financials_data')
+    else:
+        financials_data = get_financials_data_cached(symbol, selected_statement_type, selected_period)
+
+    # Display financials data
+    display_financials_data(financials_data)
+
+# Holdings tab
+def render_holdings_tab(symbol, prefetch):
+    fund_holdings = prefetch.result('fund_holdings')
+    col1, col2 = st.columns(2)
+    with col1:
+        st.write("#### Overall Portfolio Composition (%)")
+        st.markdown("""<hr style="height:2px; margin-top: 10px; margin-bottom: 10px; border:none;color:#333;background-color:#333;" /> """, unsafe_allow_html=True)
+
+        # Call the function to get position weightings
+        position_weightings = get_position_weightings(fund_holdings)
+
+        # Display position weightings
+        if position_weightings:
+            display_position_info(position_weightings)
+        else:
+            st.warning("No position weightings data available.")
+
+    with col1:
+        st.write("#### Sector Weightings (%)")
+        st.markdown("""<hr style="height:2px; margin-top: 10px; margin-bottom: 10px; border:none;color:#333;background-color:#333;" /> """, unsafe_allow_html=True)
+
+        # Call the function to get sector weightings
+        sector_weightings = get_sector_weightings(fund_holdings)
+
+        # Display sector weightings
+        if sector_weightings:
+            display_sector_info(sector_weightings)
+        else:
+            st.warning("No sector weightings data available.")
+
+    with col2:
+        st.write("#### Equity Holdings")
+        st.markdown("""<hr style="height:2px; margin-top: 10px; margin-bottom: 10px; border:none;color:#333;background-color:#333;" /> """, unsafe_allow_html=True)
+
+        # Call the function to get sector weightings
+        equity_weightings = get_equity_weightings(fund_holdings)
+
+        # Display equity weightings
+        if equity_weightings:
+            display_equity_info(equity_weightings)
+        else:
+            st.warning("No Equity Holdings data available.")
+        st.markdown("""<hr style="height:2px; margin-top: 10px; margin-bottom: 10px; border:none;color:#333;background-color:#333;" /> """, unsafe_allow_html=True)
+        st.write("#### Bond Holdings Data")
+
+        # Call the function to get bond holdings data
+        bond_holdings_data = get_bond_holdings_data(fund_holdings)
+
+        # Display bond holdings data
+        display_bond_holdings_data(bond_holdings_data)
+
+        st.write("#### Bond Ratings")
+        st.markdown("""<hr style="height:2px; margin-top: 10px; margin-bottom: 10px; border:none;color:#333;background-color:#333;" /> """, unsafe_allow_html=True)
+
+        # Call the function to get bond ratings
+        bond_ratings = get_bond_ratings(fund_holdings)
+
+        # Display bond ratings
+        display_bond_ratings(bond_ratings)
+
+
+    st.write("#### Top 10 Holdings")
+    st.markdown("""<hr style="height:2px; margin-top: 10px; margin-bottom: 10px; border:none;color:#333;background-color:#333;" /> """, unsafe_allow_html=True)
+
+    # Call the function to get fund holding information
+    if not fund_holdings.available:
+        st.warning(f"No information available for {symbol}.")
+    fund_holding_info = get_fund_holding_info(fund_holdings)
+
+    # Display fund holding information in a DataFrame
+    display_fund_holding_info(fund_holding_info)
+    # Separate content into two columns
+
+# Analysis tab
+def render_analysis_tab(symbol, prefetch):
+    st.write("#### Analysis")
+    st.markdown("""<hr style="height:2px; margin-top: 10px; margin-bottom: 10px; border:none;color:#333;background-color:#333;" /> """, unsafe_allow_html=True)
+
+    # Fetch earnings trend data
+    earnings_trend_data = get_earnings_trend_data(prefetch.result('modules').analysis().earnings_trend)
+
+    # Display earnings trend data
+    display_earnings_trend_data(earnings_trend_data)
+
+# Options tab
+def render_options_tab(symbol, prefetch):
+    # Placeholder variable for expiration date
+    selected_expiration_date = None
+
+    st.write("#### Options")
+    st.markdown("""<hr style="height:2px; margin-top: 10px; margin-bottom: 10px; border:none;color:#333;background-color:#333;" /> """, unsafe_allow_html=True)
+
+    # Fetch expiration dates only once
+    if selected_expiration_date is None:
+        expiration_dates = prefetch.result('expiration_dates')
+        if not expiration_dates:
+            st.warning("No option chain data available for this stock.")
+        else:
+            selected_expiration_date = expiration_dates[0]
+
+    # Display subheader for Calls and Puts
+    st.markdown(
+        """
+        <style>
+        .split-header {
+            display: flex;
+            justify-content: space-between;
+        }
+        </style>
+        <div class="split-header">
+            <div>Calls</div>
+            <div>Puts</div>
+        </div>
+        """,
+        unsafe_allow_html=True,
+    )
+
+    # Display option chain using the function from option_chain_utils.py
+    selected_expiration_date = display_option_chain(symbol, expiration_dates, selected_expiration_date,
+                                                    prefetch.result('quote'))
+
+# Tabs in display order, each rendering from the symbol and its page's Prefetch
+TAB_RENDERERS = {
+    "Summary": render_summary_tab,
+    "Statistics": render_statistics_tab,
+    "Historical Data": render_historical_data_tab,
+    "Profile": render_profile_tab,
+    "Financials": render_financials_tab,
+    "Holdings": render_holdings_tab,
+    "Analysis": render_analysis_tab,
+    "Options": render_options_tab,
+}
+
+# Statement type and period the Financials radios hold (their defaults
+# before the tab is first shown), for prefetching the statement
+def selected_statement(session_state):
+    statement_type_mapping = {'Income Statement': 'income', 'Balance Sheet': 'balance', 'Cash Flow': 'cashflow'}
+    statement_type = statement_type_mapping[session_state.get("statement_type", 'Income Statement')]
+    period = 'annual' if session_state.get("statement_period", 'Annual') == 'Annual' else 'quarterly'
+    return statement_type, period
+
+# Upstream requests each tab needs before it can render, beyond the header's
+def tab_prefetch_jobs(symbol, selected_tab):
+    if selected_tab == "Summary":
+        # The check and the likely chart bars, from as few downloads as
+        # possible. The plan needs the quote; waiting for it here joins the
+        # header's request rather than making another.
+        selected_option = st.session_state.get('unique_key_for_selectbox')
+
+        def summary_bars():
+            views = [SUMMARY_CHECK_VIEW, summary_chart_view(symbol, get_quote_snapshot(symbol), selected_option)]
+            return fetch_views(views, download_bars)
+        return {
+            'summary_bars': summary_bars,
+            'modules': lambda: get_symbol_modules_cached(symbol),
+        }
+    if selected_tab == "Statistics":
+        return {'valuation_measures': lambda: get_valuation_measures_cached(symbol)}
+    if selected_tab == "Financials":
+        statement_type, period = selected_statement(st.session_state)
+        return {'financials_data': lambda: get_financials_data_cached(symbol, statement_type, period)}
+    if selected_tab == "Holdings":
+        return {'fund_holdings': lambda: get_fund_holdings_cached(symbol)}
+    if selected_tab == "Analysis":
+        return {'modules': lambda: get_symbol_modules_cached(symbol)}
+    if selected_tab == "Options":
+        return {'expiration_dates': lambda: get_expiration_dates(symbol)}
+    return {}
+
+# Start the header's and the selected tab's requests at once
+def start_symbol_prefetch(symbol):
+    selected_tab = st.session_state.get("selected_tab", "Summary")
+    jobs = {
+        'quote': lambda: get_quote_snapshot(symbol),
+    }
+    jobs.update(tab_prefetch_jobs(symbol, selected_tab))
+    return Prefetch(jobs)
+
 def main():
+    warm_data_cache()
+
     # Get query parameters from the URL
     query_params = st.experimental_get_query_params()
 
@@ -372,7 +1237,7 @@ def main():
     symbol = st.text_input("Enter Stock Symbol (e.g., AAPL):", key="stock_symbol", value=symbol)
 
     # Check if the entered symbol is in the list of options
-    symbol_valid = symbol.upper() in stock_options
+    symbol_valid = symbol.upper() in refresh_symbol_index()
     if symbol_valid:
         pass
     elif symbol:
@@ -394,23 +1259,21 @@ def main():
 
             symbol_valid = True  # Set the flag to indicate a valid symbol
 
-    # Placeholder variable for expiration date
-    selected_expiration_date = None
-
     # Continue execution only if the symbol is valid
     if not symbol_valid:
         return
 
     if symbol:
         try:
-            stock_info = get_stock_info(symbol)
+            prefetch = start_symbol_prefetch(symbol)
+            quote = prefetch.result('quote')
 
             # Display shortName as header
-            st.header(f"{stock_info.get('shortName', '')} ({symbol})")
+            st.header(f"{quote.short_name} ({symbol})")
 
             # Additional header for the requested information
-            current_price = get_current_price(symbol)
-            previous_close = stock_info.get('regularMarketPreviousClose', 'N/A')
+            current_price = quote.price
+            previous_close = quote.previous_close
             price_change = round(current_price - previous_close, 4)
             price_change_percentage = round((price_change / previous_close) * 100, 2)
 
@@ -440,749 +1303,14 @@ def main():
             stock_price_at_ask_html = f"<span style='color:#5B565A; font-size:12px;'>Stock Price at Ask | <span style='color:{lighter_color}; font-size:12px;'>% Change from Previous Close</span>"
             st.markdown(stock_price_at_ask_html, unsafe_allow_html=True)
 
-            # Create tabs for each attribute mapping
-            tabs = st.tabs([
-                "Summary",
-                "Statistics",
-                "Historical Data",
-                "Profile",
-                "Financials",
-                "Holdings",
-                "Analysis",
-                "Options"
-            ])
-
-            with tabs[0]:
-                # st.write("#### Summary")
-                
-                # Fetch historical stock data
-                try:
-                    stock_data = yf.download(symbol, period='1mo')
-                    
-                    # Check if stock_data is empty
-                    if stock_data.empty:
-                        st.error(f"No data available for the stock with symbol '{symbol}'. Please enter a valid symbol.")
-                        st.stop()  # Stop further execution of the code
-
-                except IndexError:
-                    st.error(f"Stock with symbol '{symbol}' does not exist. Please enter a valid symbol.")
-                    st.stop()  # Stop further execution of the code
-
-                # Create two columns
-                col1, col2 = st.columns([1, 1])
-
-                # Check if 'Volume' column is present and contains non-zero values
-                if 'Volume' in stock_data.columns and not stock_data['Volume'].eq(0).all():
-                    # If there is minute data available for the most recent day, include intraday options
-                    if has_minute_data_in_last_day(symbol): 
-                        time_period_options = {
-                            '1d': {'interval': '2m', 'period': '1d'},
-                            '5d': {'interval': '15m', 'period': '5d'},
-                            '1mo': {'interval': '30m', 'period': '1mo'},
-                            '6mo': {'interval': '1d', 'period': '6mo'},
-                            'ytd': {'interval': '1d', 'period': 'ytd'},
-                            '1y': {'interval': '1d', 'period': '1y'},
-                            '5y': {'interval': '1wk', 'period': '5y'},
-                            'max': {'interval': '1mo', 'period': 'max'}
-                        }
-                    else:
-                        # If there is no minute data for the most recent day, exclude intraday options
-                        time_period_options = {
-                            '6mo': {'interval': '1d', 'period': '6mo'},
-                            '1y': {'interval': '1d', 'period': '1y'},
-                            '5y': {'interval': '1wk', 'period': '5y'},
-                            'max': {'interval': '1wk', 'period': 'max'}
-                        }
-                else:
-                    # If there is no minute data and no volume data, exclude intraday options
-                    time_period_options = {
-                        '1mo': {'interval': '1d', 'period': '1mo'},
-                        'ytd': {'interval': '1d', 'period': 'ytd'},
-                        '1y': {'interval': '1d', 'period': '1y'},
-                        '5y': {'interval': '1wk', 'period': '5y'},
-                        'max': {'interval': '1mo', 'period': 'max'}
-                    }
-
-                selected_option = col1.selectbox('Select Time Period:', list(time_period_options.keys()), key='unique_key_for_selectbox')
-
-                # Option for selecting chart type
-                chart_type_options = ['Line', 'Area', 'Candlestick']
-                selected_chart_type = col2.selectbox('Select Chart Type:', chart_type_options, index=0, key='unique_key_for_chart_type_selectbox')
-
-                # Fetch historical stock data based on selected time period
-                interval = time_period_options[selected_option]['interval']
-                period = time_period_options[selected_option]['period']
-                stock_data = yf.download(symbol, interval=interval, period=period)
-
-                # Calculate percentage change
-                start_price = stock_data['Close'].iloc[0]
-                end_price = stock_data['Close'].iloc[-1]
-                percentage_change = ((end_price - start_price) / start_price) * 100
-
-                # # Display stock dataframe
-                # st.write(stock_data)
-
-                if 'Volume' in stock_data.columns and not stock_data['Volume'].eq(0).all():
-
-                    if selected_option == '1d':
-                        formatted_dates = stock_data.index.strftime('%I:%M %p')
-                        formatted_labels = stock_data.index.strftime('%I %p')
-                        hover_format = stock_data.index.strftime('%I:%M %p')
-                        tickvals = formatted_dates[::64]  # Display every 125th date
-                        ticktext = formatted_labels[::64]
-                    elif selected_option in ['5d']:
-                        formatted_dates = stock_data.index.strftime('%Y-%m-%d %I:%M %p')
-                        formatted_labels = stock_data.index.strftime('%a')
-                        hover_format = stock_data.index.strftime('%a, %b %d, %I:%M %p')
-                        tickvals = formatted_dates[::30]
-                        ticktext = formatted_labels[::30]
-                    elif selected_option in ['1mo']:
-                        formatted_dates = stock_data.index.strftime('%Y-%m-%d %I:%M %p')
-                        formatted_labels = stock_data.index.strftime('%b %#d')
-                        hover_format = stock_data.index.strftime('%b %#d, %y')
-                        tickvals = formatted_dates[::90]
-                        ticktext = formatted_labels[::90]
-                    elif selected_option in ['6mo']:
-                        formatted_dates = stock_data.index.strftime('%Y-%m-%d %I:%M %p')
-                        formatted_labels = stock_data.index.strftime('%b %#d, %y')
-                        hover_format = stock_data.index.strftime('%b %#d, %y')
-                        tickvals = formatted_dates[::65]
-                        ticktext = formatted_labels[::65]
-                    elif selected_option in ['ytd']:
-                        formatted_dates = stock_data.index.strftime('%Y-%m-%d %I:%M %p')
-                        formatted_labels = stock_data.index.strftime('%b %#d, %y')
-                        hover_format = stock_data.index.strftime('%b %#d, %y')
-                        tickvals = formatted_dates[::125]
-                        ticktext = formatted_labels[::125]
-                    elif selected_option in ['1y']:
-                        formatted_dates = stock_data.index.strftime('%Y-%m-%d %I:%M %p')
-                        formatted_labels = stock_data.index.strftime('%b %#d, %y')
-                        hover_format = stock_data.index.strftime('%b %#d, %y')
-                        tickvals = formatted_dates[::126]
-                        ticktext = formatted_labels[::126]
-                    elif selected_option in ['5y']:
-                        formatted_dates = stock_data.index.strftime('%Y-%m-%d %I:%M %p')
-                        formatted_labels = stock_data.index.strftime('%b %#d, %y')
-                        hover_format = stock_data.index.strftime('%b %#d, %y')
-                        tickvals = formatted_dates[::131]
-                        ticktext = formatted_labels[::131]
-                    elif selected_option in ['max']:
-                        formatted_dates = stock_data.index.strftime('%Y-%m-%d %I:%M %p')
-                        formatted_labels = stock_data.index.strftime('%b %#d, %y')
-                        hover_format = stock_data.index.strftime('%b %#d, %y')
-                        tickvals = formatted_dates[::79]
-                        ticktext = formatted_labels[::79]
-                else:
-                    
-                    if selected_option in ['1mo']:
-                        formatted_dates = stock_data.index.strftime('%Y-%m-%d %I:%M %p')
-                        formatted_labels = stock_data.index.strftime('%b %#d')
-                        hover_format = stock_data.index.strftime('%b %#d, %y')
-                        tickvals = formatted_dates[::7]
-                        ticktext = formatted_labels[::7]
-                    elif selected_option in ['ytd']:
-                        formatted_dates = stock_data.index.strftime('%Y-%m-%d %I:%M %p')
-                        formatted_labels = stock_data.index.strftime('%b %#d, %y')
-                        hover_format = stock_data.index.strftime('%b %#d, %y')
-                        tickvals = formatted_dates[::9]
-                        ticktext = formatted_labels[::9]
-                    elif selected_option in ['1y']:
-                        formatted_dates = stock_data.index.strftime('%Y-%m-%d %I:%M %p')
-                        formatted_labels = stock_data.index.strftime('%b %#d, %y')
-                        hover_format = stock_data.index.strftime('%b %#d, %y')
-                        tickvals = formatted_dates[::126]
-                        ticktext = formatted_labels[::126]
-                    elif selected_option in ['5y']:
-                        formatted_dates = stock_data.index.strftime('%Y-%m-%d %I:%M %p')
-                        formatted_labels = stock_data.index.strftime('%b %#d, %y')
-                        hover_format = stock_data.index.strftime('%b %#d, %y')
-                        tickvals = formatted_dates[::131]
-                        ticktext = formatted_labels[::131]
-                    elif selected_option in ['max']:
-                        formatted_dates = stock_data.index.strftime('%Y-%m-%d %I:%M %p')
-                        formatted_labels = stock_data.index.strftime('%b %#d, %y')
-                        hover_format = stock_data.index.strftime('%b %#d, %y')
-                        tickvals = formatted_dates[::79]
-                        ticktext = formatted_labels[::79]
-
-                # Create subplot with two y-axes
-                fig = make_subplots(specs=[[{"secondary_y": True}]])
-
-                #Add shaded areas for every other tick on the x-axis for background
-                for i in range(0, len(tickvals), 2):
-                    fig.add_shape(
-                        type="rect",
-                        x0=tickvals[i],
-                        x1=tickvals[i + 1] if i + 1 < len(tickvals) else formatted_dates[-1],
-                        y0=-1e9,
-                        y1=1e9,
-                        fillcolor="rgba(245,245,245,1.000)",
-                        opacity=1,
-                        layer="below",
-                        line=dict(width=0),
-                    )
-
-                # Default chart type is 'line'
-                chart_type = selected_chart_type
-
-                # Add trace based on chart type
-                if chart_type == 'Line':
-                    trace = go.Scatter(x=formatted_dates, y=stock_data['Close'], mode='lines', name=f'')
-                elif chart_type == 'Area':
-                    trace = go.Scatter(x=formatted_dates, y=stock_data['Close'], mode='lines', fill='tozeroy', name=f'', fillcolor='rgba(0, 104, 201, 1)')
-                elif chart_type == 'Candlestick':
-                    trace = go.Candlestick(x=formatted_dates,
-                                        open=stock_data['Open'],
-                                        high=stock_data['High'],
-                                        low=stock_data['Low'],
-                                        close=stock_data['Close'],
-                                        name=f'{symbol}',
-                                        hoverinfo='x+text+name')
-                    
-                    # Remove range slider for candlestick chart
-                    fig.update_xaxes(rangeslider_visible=False)
-
-                # Add trace to the subplot
-                fig.add_trace(trace)
-
-                # Check if volume data is available
-                if 'Volume' in stock_data.columns and not stock_data['Volume'].eq(0).all():
-                    # Add bar trace for volume
-                    volume_colors = ['red' if close_price < open_price else 'green' for open_price, close_price in zip(stock_data['Open'], stock_data['Close'])]
-
-                    if chart_type in ['Line', 'Candlestick']:
-                        fig.add_trace(go.Bar(x=formatted_dates, y=stock_data['Volume'], yaxis='y2', name='Volume', marker_color=volume_colors, hoverinfo='skip'))
-                    else:
-                        fig.add_trace(go.Bar(x=formatted_dates, y=stock_data['Volume'], yaxis='y2', name='Volume', marker_color='rgba(160, 198, 255, 1)', hoverinfo='skip'))
-
-                    # Update axis labels and layout for volume data available
-                    fig.update_yaxes(showspikes=True, nticks=5, spikemode="across", spikethickness=-2, side='right')
-                    fig.update_yaxes(showspikes=True, spikemode="across", spikethickness=-2, side='right', secondary_y=True, showticklabels=False)
-
-                    # Add this section to dynamically set the y-axis ranges based on selected_option
-                    if selected_option == '1d':
-                        yaxis_range = [stock_data['Close'].min() * 0.99, stock_data['Close'].max() * 1.01]
-                        yaxis2_range = [stock_data['Volume'].min() * 0.20, stock_data['Volume'].max() * 5.80]
-                    elif selected_option in ['5d']:
-                        yaxis_range = [stock_data['Close'].min() * 0.99, stock_data['Close'].max() * 1.01]
-                        yaxis2_range = [stock_data['Volume'].min() * 0.20, stock_data['Volume'].max() * 4.01]
-                    elif selected_option in ['1mo']:
-                        yaxis_range = [stock_data['Close'].min() * 0.99, stock_data['Close'].max() * 1.01]
-                        yaxis2_range = [stock_data['Volume'].min() * 0.20, stock_data['Volume'].max() * 5.01]
-                    elif selected_option in ['6mo']:
-                        yaxis_range = [stock_data['Close'].min() * 0.99, stock_data['Close'].max() * 1.01]
-                        yaxis2_range = [stock_data['Volume'].min() * 0.20, stock_data['Volume'].max() * 5.80]
-                    elif selected_option in ['ytd']:
-                        yaxis_range = [stock_data['Close'].min() * 0.99, stock_data['Close'].max() * 1.01]
-                        yaxis2_range = [stock_data['Volume'].min() * 0.20, stock_data['Volume'].max() * 5.80]
-                    elif selected_option in ['1y']:
-                        yaxis_range = [stock_data['Close'].min() * 0.99, stock_data['Close'].max() * 1.01]
-                        yaxis2_range = [stock_data['Volume'].min() * 0.20, stock_data['Volume'].max() * 5.80]
-                    elif selected_option in ['5y']:
-                        yaxis_range = [stock_data['Close'].min() * 0.99, stock_data['Close'].max() * 1.01]
-                        yaxis2_range = [stock_data['Volume'].min() * 0.20, stock_data['Volume'].max() * 5.80]
-                    elif selected_option in ['max']:
-                        yaxis_range = [stock_data['Close'].min() * 0.99, stock_data['Close'].max() * 1.01]
-                        yaxis2_range = [stock_data['Volume'].min() * 0.20, stock_data['Volume'].max() * 5.80]
-
-                else:
-                    # Update axis labels and layout for no volume data available
-                    fig.update_yaxes(showspikes=True, nticks=5, spikemode="across", spikethickness=-2, side='right')
-                    fig.update_yaxes(showspikes=True, spikemode="across", spikethickness=-2, side='right', secondary_y=True, showticklabels=False)
-
-                    # Add this section to dynamically set the y-axis ranges based on selected_option
-                    if selected_option in ['1mo']:
-                        yaxis_range = [stock_data['Close'].min() * 0.99, stock_data['Close'].max() * 1.01]
-                        yaxis2_range = None
-                    elif selected_option in ['ytd']:
-                        yaxis_range = [stock_data['Close'].min() * 0.99, stock_data['Close'].max() * 1.01]
-                        yaxis2_range = None
-                    elif selected_option in ['1y']:
-                        yaxis_range = [stock_data['Close'].min() * 0.99, stock_data['Close'].max() * 1.01]
-                        yaxis2_range = None    
-                    elif selected_option in ['5y']:
-                        yaxis_range = [stock_data['Close'].min() * 0.99, stock_data['Close'].max() * 1.01]
-                        yaxis2_range = None
-                    elif selected_option in ['max']:
-                        yaxis_range = [stock_data['Close'].min() * 0.99, stock_data['Close'].max() * 1.01]
-                        yaxis2_range = None
-
-                fig.update_layout(
-                    height=500,
-                    hovermode='closest',
-                    hoverlabel=dict(bgcolor="white", font_color="black", font_size=14, font_family="Arial", bordercolor="black"),
-                    xaxis=dict(showspikes=True, spikemode="across", ticktext=ticktext, tickvals=tickvals, spikethickness=-2, fixedrange=True),
-                    yaxis=dict(side='right', range=yaxis_range, fixedrange=True),
-                    yaxis2=dict(showticklabels=False, overlaying='y', showgrid=False, range=yaxis2_range, fixedrange=True),
-                    showlegend=False,
-                    margin=dict(b=0, t=90)
-                )
-
-                # Add this section to dynamically set the hovertemplate and text for update_traces
-                if selected_option == '1d':
-                    hover_template = '%{text}<br>'
-                elif selected_option in ['5d']:
-                    hover_template = '%{text}<br>'
-                elif selected_option in ['1mo']:
-                    hover_template = '%{text}<br>'
-                elif selected_option in ['6mo']:
-                    hover_template = '%{text}<br>'
-                elif selected_option in ['ytd']:
-                    hover_template = '%{text}<br>'
-                elif selected_option in ['1y']:
-                    hover_template = '%{text}<br>'
-                elif selected_option in ['5y']:
-                    hover_template = '%{text}<br>'
-                elif selected_option in ['max']:
-                    hover_template = '%{text}<br>'
-
-                # Find the most recent closing price
-                most_recent_close = stock_data['Close'].iloc[-1]
-
-                # Add a scatter trace so annotation can find y-axis of the most recent price
-                fig.add_trace(go.Scatter(
-                    x=[formatted_dates[-1]],
-                    y=[most_recent_close],
-                    mode='markers',
-                    marker=dict(color='red', size=10),
-                    showlegend=False,
-                    hoverinfo='none',
-                    visible=False
-                ))
-
-                # Update the layout to ensure the annotation stays on the y-axis
-                fig.update_layout(
-                    annotations=[
-                        dict(
-                            x=1,  # Adjust this value to control the x-position of the annotation
-                            y=most_recent_close,
-                            xref='paper',
-                            yref='y',
-                            text=f'${most_recent_close:.2f}',  # Display the price value
-                            showarrow=False,
-                            font=dict(color='White', size=12),
-                            align='left',
-                            # bordercolor='red',
-                            # borderwidth=1,
-                            # borderpad=4,
-                            bgcolor='rgba(0, 104, 201, 1)'
-                        )
-                    ]
-                )
-
-                # Trace for Line & Area
-                fig.update_traces(
-                    hovertemplate=hover_template,
-                    hoverinfo='x',
-                    text=[f'{symbol}<br>{hover_format[i]}<br>${open_price:.2f} Open<br>${high_price:.2f} High<br>${low_price:.2f} Low<br>${close_price:.2f} Close<br>{format_volume(volume)} Volume'
-                        for i, (open_price, high_price, low_price, close_price, volume) in enumerate(
-                            zip(stock_data['Open'], stock_data['High'], stock_data['Low'], stock_data['Close'], stock_data['Volume']))],
-                    selector=dict(type='scatter')
-                )
-
-                # Get the current high and low for the corresponding time period option.
-                current_high = stock_data['Close'].max()
-                current_low = stock_data['Close'].min()
-
-                # Calculate the percentage from the current low and high
-                percent_from_low = ((most_recent_close - current_low) / current_low) * 100
-                percent_from_high = ((most_recent_close - current_high) / current_high) * 100
-
-                # Percent Change of symbol
-                bgcolor = "green" if percentage_change >= 0 else "red"
-                fig.add_annotation(
-                    text=f'({selected_option}) {symbol} {stock_data["Close"].iloc[-1]:.2f} {percentage_change:.2f}%',
-                    xref='paper', yref='paper',
-                    x=0.00, y=1.20,
-                    showarrow=False,
-                    font=dict(size=13, color="black", family="Arial Black"),
-                    bgcolor=bgcolor,  # Set bgcolor based on the sign of percentage_change
-                )
-
-                fig.add_annotation(
-                    text=f'L {current_low:.2f}\n {percent_from_low:.2f}%\n',
-                    xref='paper', yref='paper',
-                    x=0.00, y=1.10,
-                    showarrow=False,
-                    font=dict(size=13, color="black", family="Arial Black"),
-                    bgcolor='rgba(245,245,245,1.000)',
-                )
-
-                # Get the width of the low value annotation
-                low_annotation_width = 0.94  # Adjust this value based on your layout
-
-                fig.add_annotation(
-                    text=f'H {current_high:.2f}\n {percent_from_high:.2f}%\n',
-                    xref='paper', yref='paper',
-                    x=low_annotation_width,  # Set the x-coordinate to be the right edge of the low annotation
-                    y=1.10,
-                    showarrow=False,
-                    font=dict(size=13, color="black", family="Arial Black"),
-                    bgcolor='rgba(245,245,245,1.000)',
-                )
-
-                # Border top-side
-                fig.add_shape(
-                            type="line",
-                            xref="paper",
-                            yref="paper",
-                            x0=0,
-                            y0=1.12,
-                            x1=.94,
-                            y1=1.12,
-                            line=dict(
-                                color="white",
-                                width=2,
-                            )
-                        )
-
-                # Border bot-side
-                fig.add_shape(
-                            type="line",
-                            xref="paper",
-                            yref="paper",
-                            x0=0,
-                            y0=0,
-                            x1=.94,
-                            y1=0,
-                            line=dict(
-                                color="rgba(245,245,245,1.000)",
-                                width=2,
-                            )
-                        )
-
-                # Border right-side
-                fig.add_shape(
-                            type="line",
-                            xref="paper",
-                            yref="paper",
-                            x0=.94,
-                            y0=1.12,
-                            x1=.94,
-                            y1=0,
-                            line=dict(
-                                color="rgba(245,245,245,1.000)",
-                                width=3,
-                            )
-                        )
-
-                # Set hoverinfo and text for Candlestick
-                hoverinfo_candlestick = 'text'
-                text_candlestick = [
-                    f'${open_price:.2f} Open<br>${high_price:.2f} High<br>${low_price:.2f} Low<br>${close_price:.2f} Close<br>{format_volume(volume)} Volume'
-                    for open_price, high_price, low_price, close_price, volume in
-                    zip(stock_data['Open'], stock_data['High'], stock_data['Low'], stock_data['Close'], stock_data['Volume'])
-                ]
-
-                # Trace for Candlestick
-                fig.update_traces(
-                    hoverinfo='text',
-                    text=[f'{symbol}<br>{hover_format[i]}<br>${open_price:.2f} Open<br>${high_price:.2f} High<br>${low_price:.2f} Low<br>${close_price:.2f} Close<br>{format_volume(volume)} Volume'
-                        for i, (open_price, high_price, low_price, close_price, volume) in enumerate(
-                            zip(stock_data['Open'], stock_data['High'], stock_data['Low'], stock_data['Close'], stock_data['Volume']))],
-                    selector=dict(type='candlestick')
-                )
-
-                # Hides the tools on the Mode Bar
-                config = {'displayModeBar': False}
-                st.plotly_chart(fig, config=config, use_container_width=True)
-
-                
-                st.markdown("""<hr style="height:2px; margin-top: 10px; margin-bottom: 10px; border:none;color:#333;background-color:#333;" /> """, unsafe_allow_html=True)
-                # Separate content into two columns
-                col1, col2 = st.columns(2)
-            with col1:
-                display_stock_info(stock_info, summary1_info_mapping)
-
-                # Call the function to get fund weightings
-                fund_weightings = get_fund_weightings_cached(symbol)
-
-                # Display fund weightings if available
-                if fund_weightings:
-                    display_fund_info(fund_weightings)
-                else:
-                    # Instead of displaying a warning, simply don't display anything
-                    pass
-                
-                # Call the function to get profile weightings
-                profile_weightings = get_profile_weightings_cached(symbol)
-
-                # Display fund weightings if available
-                if profile_weightings:
-                    display_profile_info(profile_weightings)
-                else:
-                    # Instead of displaying a warning, simply don't display anything
-                    pass
-
-                # Call the function to get category weightings
-                category_weightings = get_category_weightings_cached(symbol)
-
-                # Display fund weightings if available
-                if category_weightings:
-                    display_category_info(category_weightings)
-                else:
-                    # Instead of displaying a warning, simply don't display anything
-                    pass
-            
-            with col2:
-                display_stock_info(stock_info, summary2_info_mapping)
-                
-                # Call the function to get performance weightings
-                performance_weightings = get_performance_weightings_cached(symbol)
-
-                # Display performance weightings if available
-                if performance_weightings:
-                    display_performance_info(performance_weightings)
-                else:
-                    # Instead of displaying a warning, simply don't display anything
-                    pass
-
-            st.markdown("""<hr style="height:2px; margin-top: 10px; margin-bottom: 10px; border:none;color:#333;background-color:#333;" /> """, unsafe_allow_html=True)
-
-            with tabs[1]:
-                st.write("#### Valuation Measures")
-                st.markdown("""<hr style="height:2px; margin-top: 10px; margin-bottom: 10px; border:none;color:#333;background-color:#333;" /> """, unsafe_allow_html=True)
-
-                # Display the valuation measures
-                display_valuation_measures_cached(symbol)
-
-                col1, col2 = st.columns(2)
-
-                with col1:
-                    st.write("#### Trading Information")
-                    st.markdown("""<hr style="height:2px; margin-top: 10px; margin-bottom: 10px; border:none;color:#333;background-color:#333;" /> """, unsafe_allow_html=True)
-
-                    st.write("##### Stock Price History")
-                    display_stock_info(stock_info, financial_stock_mapping)
-                    st.markdown("""<hr style="height:2px; margin-top: 5px; margin-bottom: 5px; border:none;color:#333;background-color:#333;" /> """, unsafe_allow_html=True)
-
-                    st.write("##### Share Statistics")
-                    display_stock_info(stock_info, financial_share_mapping)
-                    st.markdown("""<hr style="height:2px; margin-top: 5px; margin-bottom: 5px; border:none;color:#333;background-color:#333;" /> """, unsafe_allow_html=True)
-
-                    st.write("##### Dividends & Splits")
-                    display_stock_info(stock_info, financial_dividends_mapping)
-
-                with col2:
-                    # Check if there is any data from financial_fiscal_mapping, financial_profitability_mapping, and financial_management_mapping
-                    if any(stock_info.get(attribute, 'N/A') != 'N/A' for attribute in financial_fiscal_mapping) \
-                            or any(stock_info.get(attribute, 'N/A') != 'N/A' for attribute in financial_profitability_mapping) \
-                            or any(stock_info.get(attribute, 'N/A') != 'N/A' for attribute in financial_management_mapping) \
-                            or any(stock_info.get(attribute, 'N/A') != 'N/A' for attribute in financial_income_mapping) \
-                            or any(stock_info.get(attribute, 'N/A') != 'N/A' for attribute in financial_balance_mapping) \
-                            or any(stock_info.get(attribute, 'N/A') != 'N/A' for attribute in financial_cash_mapping):
-                        st.write("#### Financial Highlights")
-                        st.markdown("""<hr style="height:2px; margin-top: 10px; margin-bottom: 10px; border:none;color:#333;background-color:#333;" /> """, unsafe_allow_html=True)
-                
-                        # Check if there is any data from financial_fiscal_mapping
-                        if any(stock_info.get(attribute, 'N/A') != 'N/A' for attribute in financial_fiscal_mapping):
-                            st.write("##### Fiscal Year")
-                            display_stock_info(stock_info, financial_fiscal_mapping)
-                            st.markdown("""<hr style="height:2px; margin-top: 5px; margin-bottom: 5px; border:none;color:#333;background-color:#333;" /> """, unsafe_allow_html=True)
-                        
-                        # Check if there is any data from financial_profitability_mapping
-                        if any(stock_info.get(attribute, 'N/A') != 'N/A' for attribute in financial_profitability_mapping):
-                            st.write("##### Profitability")
-                            display_stock_info(stock_info, financial_profitability_mapping)
-                            st.markdown("""<hr style="height:2px; margin-top: 5px; margin-bottom: 5px; border:none;color:#333;background-color:#333;" /> """, unsafe_allow_html=True)
-                        
-                        # Check if there is any data from financial_management_mapping
-                        if any(stock_info.get(attribute, 'N/A') != 'N/A' for attribute in financial_management_mapping):
-                            st.write("##### Management effectiveness")
-                            display_stock_info(stock_info, financial_management_mapping)
-                            st.markdown("""<hr style="height:2px; margin-top: 5px; margin-bottom: 5px; border:none;color:#333;background-color:#333;" /> """, unsafe_allow_html=True)
-                        
-                        # Check if there is any data from financial_income_mapping
-                        if any(stock_info.get(attribute, 'N/A') != 'N/A' for attribute in financial_income_mapping):
-                            st.write("##### Income Statement")
-                            display_stock_info(stock_info, financial_income_mapping)
-                            st.markdown("""<hr style="height:2px; margin-top: 5px; margin-bottom: 5px; border:none;color:#333;background-color:#333;" /> """, unsafe_allow_html=True)
-                        
-                        # Check if there is any data from financial_balance_mapping
-                        if any(stock_info.get(attribute, 'N/A') != 'N/A' for attribute in financial_balance_mapping):
-                            st.write("##### Balance Sheet")
-                            display_stock_info(stock_info, financial_balance_mapping)
-                            st.markdown("""<hr style="height:2px; margin-top: 5px; margin-bottom: 5px; border:none;color:#333;background-color:#333;" /> """, unsafe_allow_html=True)
-
-                        # Check if there is any data from financial_cash_mapping
-                        if any(stock_info.get(attribute, 'N/A') != 'N/A' for attribute in financial_cash_mapping):
-                            st.write("##### Cash Flow Statement")
-                            display_stock_info(stock_info, financial_cash_mapping)
-
-            with tabs[2]:
-                st.write("#### Historical Data")
-                st.markdown("""<hr style="height:2px; margin-top: 10px; margin-bottom: 10px; border:none;color:#333;background-color:#333;" /> """, unsafe_allow_html=True)
-
-                # Fetch historical data
-                historical_data = get_historical_data(symbol)
-
-                # Display historical data in a datatable
-                display_historical_data(symbol, historical_data)
-
-            with tabs[3]:
-                st.write("#### Profile")
-                st.markdown("""<hr style="height:2px; margin-top: 10px; margin-bottom: 10px; border:none;color:#333;background-color:#333;" /> """, unsafe_allow_html=True)
-
-                # Separate content into two columns
-                col1, col2 = st.columns(2)
-                with col1:
-                    display_stock_info(stock_info, profile1_info_mapping)
-                with col2:
-                    display_stock_info(stock_info, profile2_info_mapping)
-                    pass
-
-                st.markdown("""<hr style="height:2px; margin-top: 5px; margin-bottom: 5px; border:none;color:#333;background-color:#333;" /> """, unsafe_allow_html=True)
-                st.write("##### Description")
-                display_stock_info(stock_info, profile4_info_mapping)
-                st.markdown("""<hr style="height:2px; margin-top: 5px; margin-bottom: 5px; border:none;color:#333;background-color:#333;" /> """, unsafe_allow_html=True)
-
-                # Call the new display_key_executives function
-                display_key_executives(stock_info)
-
-
-                with tabs[4]:
-                    st.write("#### Financials")
-                    st.markdown("""<hr style="height:2px; margin-top: 10px; margin-bottom: 10px; border:none;color:#333;background-color:#333;" /> """, unsafe_allow_html=True)
-                    # Separate content into two columns
-                    col1, col2 = st.columns(2)
-                    
-                    with col1:
-                        # Add a button to select statement type
-                        statement_type = st.radio("Select Financial Statement:", ('Income Statement', 'Balance Sheet', 'Cash Flow'))
-
-                    with col2:
-                        # Add a button to select the period (annual or quarterly)
-                        period = st.radio("Select Period:", ('Annual', 'Quarterly'))
-                        selected_period = 'annual' if period == 'Annual' else 'quarterly'
-                    
-                    # Map the user-friendly names to the corresponding API names
-                    statement_type_mapping = {
-                        'Income Statement': 'income',
-                        'Balance Sheet': 'balance',
-                        'Cash Flow': 'cashflow'
-                    }
-
-                    selected_statement_type = statement_type_mapping.get(statement_type)
-                    
-                    st.write(f"#### {selected_statement_type.capitalize()} ({selected_period.capitalize()}) Financials")
-                    
-                    # Fetch financials data
-                    financials_data = get_financials_data(symbol, selected_statement_type, selected_period)
-                    
-                    # Display financials data
-                    display_financials_data(financials_data)
-
-            with tabs[5]:
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        st.write("#### Overall Portfolio Composition (%)")
-                        st.markdown("""<hr style="height:2px; margin-top: 10px; margin-bottom: 10px; border:none;color:#333;background-color:#333;" /> """, unsafe_allow_html=True)
-
-                        # Call the function to get position weightings
-                        position_weightings = get_position_weightings_cached(symbol)
-
-                        # Display position weightings
-                        if position_weightings:
-                            display_position_info(position_weightings)
-                        else:
-                            st.warning("No position weightings data available.")
-                                               
-                    with col1:
-                        st.write("#### Sector Weightings (%)")
-                        st.markdown("""<hr style="height:2px; margin-top: 10px; margin-bottom: 10px; border:none;color:#333;background-color:#333;" /> """, unsafe_allow_html=True)
-
-                        # Call the function to get sector weightings
-                        sector_weightings = get_sector_weightings_cached(symbol)
-
-                        # Display sector weightings
-                        if sector_weightings:
-                            display_sector_info(sector_weightings)
-                        else:
-                            st.warning("No sector weightings data available.")
-
-                    with col2:
-                        st.write("#### Equity Holdings")
-                        st.markdown("""<hr style="height:2px; margin-top: 10px; margin-bottom: 10px; border:none;color:#333;background-color:#333;" /> """, unsafe_allow_html=True)
-
-                        # Call the function to get sector weightings
-                        equity_weightings = get_equity_weightings_cached(symbol)
-
-                        # Display equity weightings
-                        if equity_weightings:
-                            display_equity_info(equity_weightings)
-                        else:
-                            st.warning("No Equity Holdings data available.")
-                        st.markdown("""<hr style="height:2px; margin-top: 10px; margin-bottom: 10px; border:none;color:#333;background-color:#333;" /> """, unsafe_allow_html=True)
-                        st.write("#### Bond Holdings Data")
-            
-                        # Call the function to get bond holdings data
-                        bond_holdings_data = get_bond_holdings_data_cached(symbol)
-            
-                        # Display bond holdings data
-                        display_bond_holdings_data(bond_holdings_data)
-
-                        st.write("#### Bond Ratings")
-                        st.markdown("""<hr style="height:2px; margin-top: 10px; margin-bottom: 10px; border:none;color:#333;background-color:#333;" /> """, unsafe_allow_html=True)
-
-                        # Call the function to get bond ratings
-                        bond_ratings = get_bond_ratings_cached(symbol)
-
-                        # Display bond ratings
-                        display_bond_ratings(bond_ratings)
-
-                    
-                    st.write("#### Top 10 Holdings")
-                    st.markdown("""<hr style="height:2px; margin-top: 10px; margin-bottom: 10px; border:none;color:#333;background-color:#333;" /> """, unsafe_allow_html=True)
-
-                    # Call the function to get fund holding information
-                    fund_holding_info = get_fund_holding_info_cached(symbol)
-
-                    # Display fund holding information in a DataFrame
-                    display_fund_holding_info(fund_holding_info)
-                    # Separate content into two columns
-
-            with tabs[6]:
-                st.write("#### Analysis")
-                st.markdown("""<hr style="height:2px; margin-top: 10px; margin-bottom: 10px; border:none;color:#333;background-color:#333;" /> """, unsafe_allow_html=True)
-
-                # Fetch earnings trend data
-                earnings_trend_data = get_earnings_trend_data_cached(symbol)
-
-                # Display earnings trend data
-                display_earnings_trend_data(earnings_trend_data)
-
-            with tabs[7]:
-                st.write("#### Options")
-                st.markdown("""<hr style="height:2px; margin-top: 10px; margin-bottom: 10px; border:none;color:#333;background-color:#333;" /> """, unsafe_allow_html=True)
-
-                # Fetch expiration dates only once
-                if selected_expiration_date is None:
-                    expiration_dates = yf.Ticker(symbol).options
-                    if not expiration_dates:
-                        st.warning("No option chain data available for this stock.")
-                    else:
-                        selected_expiration_date = expiration_dates[0]
-
-                # Display subheader for Calls and Puts
-                st.markdown(
-                    """
-                    <style>
-                    .split-header {
-                        display: flex;
-                        justify-content: space-between;
-                    }
-                    </style>
-                    <div class="split-header">
-                        <div>Calls</div>
-                        <div>Puts</div>
-                    </div>
-                    """,
-                    unsafe_allow_html=True,
-                )
-
-                # Display option chain using the function from option_chain_utils.py
-                selected_expiration_date = display_option_chain(symbol, expiration_dates, selected_expiration_date)
-
+            # Only the selected tab fetches and renders its data. st.tabs would
+            # run every tab's body on each rerun; the selection lives in
+            # session_state under the radio's key, so it survives reruns.
+            selected_tab = st.radio("Select Tab:", list(TAB_RENDERERS), horizontal=True, key="selected_tab",
+                                    label_visibility="collapsed")
+            TAB_RENDERERS[selected_tab](symbol, prefetch)
+            logging.info('Data cache: ' + data_cache.summary())
+            logging.info('Market data: ' + get_provider().summary())
 
         except Exception as e:
             st.error(f"Error: {str(e)}")
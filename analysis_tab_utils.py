@@ -1,16 +1,13 @@
-from yahooquery import Ticker
 import streamlit as st
 import pandas as pd
 
-def get_earnings_trend_data(symbol):
-    stock_ticker = Ticker(symbol)
-    earnings_trend_data = stock_ticker.earnings_trend
-    
+# earnings_trend is the earningsTrend module from data_gateway (AnalysisView)
+def get_earnings_trend_data(earnings_trend):
     periods_data = {}
     
-    # Check if earnings_trend_data is not empty and has the necessary structure
-    if earnings_trend_data and symbol in earnings_trend_data and 'trend' in earnings_trend_data[symbol]:
-        for trend_data in earnings_trend_data[symbol]['trend']:
+    # Check if earnings_trend is not empty and has the necessary structure
+    if earnings_trend and 'trend' in earnings_trend:
+        for trend_data in earnings_trend['trend']:
             period = trend_data.get('period', '')
             if period not in ['+5y', '-5y']:
                 periods_data[period] = {
@@ -0,0 +1,116 @@
+# Plans the bar downloads one render needs, so no range is fetched twice.
+#
+# A view is an (interval, period) pair as yf.download takes them. A view can
+# be derived from a download whose bars are at least as fine (and, for
+# intraday views, divide its interval evenly) and whose period covers it:
+# the download is cut to the view's period and resampled to its interval.
+# plan_downloads picks the fewest downloads for a set of views, widening a
+# download's period to cover the others where Yahoo serves that interval
+# for that long. The Summary tab's 1mo daily check and a 2m/1d chart then
+# share one 2m/1mo download, and a 1wk/5y chart brings the check with it as
+# a 1d/5y download.
+#
+# If a widened intraday download comes back empty (the symbol has no
+# intraday bars), the daily views it was meant to cover are downloaded on
+# their own.
+import datetime
+import re
+
+import pandas as pd
+
+from bar_resample import CALENDAR_INTERVALS, resample_ohlcv
+
+# Longest period Yahoo serves for each intraday interval, in days
+INTRADAY_MAX_DAYS = {'1m': 7, '2m': 60, '5m': 60, '15m': 60, '30m': 60, '60m': 730, '90m': 60, '1h': 730}
+
+INTERVAL_MINUTES = {'1m': 1, '2m': 2, '5m': 5, '15m': 15, '30m': 30, '60m': 60, '90m': 90, '1h': 60,
+                    '1d': 24 * 60, '5d': 5 * 24 * 60, '1wk': 7 * 24 * 60, '1mo': 31 * 24 * 60,
+                    '3mo': 92 * 24 * 60}
+
+PERIOD_PATTERN = re.compile(r'(\d+)(d|mo|y)$')
+
+
+def is_intraday(interval):
+    return interval in INTRADAY_MAX_DAYS
+
+
+def period_days(period, today=None):
+    # Calendar days a period spans (sessions for 'Nd' periods, close enough)
+    if period == 'max':
+        return float('inf')
+    if period == 'ytd':
+        today = today or datetime.date.today()
+        return (today - datetime.date(today.year, 1, 1)).days + 1
+    count, unit = PERIOD_PATTERN.match(period).groups()
+    return int(count) * {'d': 1, 'mo': 31, 'y': 366}[unit]
+
+
+def can_derive(view, download, today=None):
+    interval, period = view
+    base_interval, base_period = download
+    base_minutes, minutes = INTERVAL_MINUTES[base_interval], INTERVAL_MINUTES[interval]
+    if base_minutes > minutes:
+        return False
+    if is_intraday(interval) and minutes % base_minutes:
+        return False
+    if not is_intraday(interval) and interval != base_interval and interval not in CALENDAR_INTERVALS:
+        return False
+    return period_days(base_period, today) >= period_days(period, today)
+
+
+def plan_downloads(views, today=None):
+    # {download view: [views derived from it]}, finest intervals first
+    plan = {}
+    ordered = sorted(set(views), key=lambda view: (INTERVAL_MINUTES[view[0]], -period_days(view[1], today)))
+    for view in ordered:
+        source = next((download for download in plan if can_derive(view, download, today)), None)
+        if source is None:
+            # Widen the download to the longest period it could serve here
+            interval = view[0]
+            limit = INTRADAY_MAX_DAYS.get(interval, float('inf'))
+            periods = [other[1] for other in views
+                       if can_derive(other, (interval, 'max'), today) and period_days(other[1], today) <= limit]
+            source = (interval, max(periods, key=lambda period: period_days(period, today)))
+            plan[source] = []
+        plan[source].append(view)
+    return plan
+
+
+def slice_period(bars, period):
+    # The bars a download of `period` ending at the same bar would return
+    if bars.empty or period == 'max':
+        return bars
+    last = bars.index[-1]
+    if period == 'ytd':
+        return bars[bars.index >= last.normalize().replace(month=1, day=1)]
+    count, unit = PERIOD_PATTERN.match(period).groups()
+    count = int(count)
+    if unit == 'd':
+        # Trading sessions rather than calendar days, like Yahoo
+        sessions = pd.Index(bars.index.normalize().unique())
+        return bars[bars.index >= sessions[-min(count, len(sessions))]]
+    offset = pd.DateOffset(months=count) if unit == 'mo' else pd.DateOffset(years=count)
+    return bars[bars.index >= last.normalize() - offset]
+
+
+def derive_view(bars, download, view):
+    if view == download:
+        return bars
+    bars = slice_period(bars, view[1])
+    return bars if view[0] == download[0] else resample_ohlcv(bars, view[0])
+
+
+def fetch_views(views, download, today=None):
+    # {view: bars} for every view, using download(interval, period) as few
+    # times as the plan allows
+    results = {}
+    for source, derived in plan_downloads(views, today).items():
+        bars = download(*source)
+        if bars.empty and is_intraday(source[0]):
+            # No intraday bars: fetch the daily views on their own
+            for view in [view for view in derived if not is_intraday(view[0])]:
+                results[view] = download(*view)
+                derived.remove(view)
+        for view in derived:
+            results[view] = derive_view(bars, source, view)
+    return results
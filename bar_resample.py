@@ -0,0 +1,109 @@
+# Vectorized OHLCV resampling: merges finer bars into coarser ones.
+#
+# Every bar gets an integer bucket id computed from its exchange-local
+# timestamp (minutes, days, Monday-based weeks, months or quarters), and the
+# bars of each run of equal ids are merged with numpy reduceat, one call per
+# column. Buckets without bars produce no rows, so overnight and weekend gaps
+# need no dropping afterwards.
+#
+# Intervals that are not a multiple of the bars' own (15m from 2m bars) put
+# each straddling bar in the bucket it starts in.
+import re
+
+import numpy as np
+import pandas as pd
+
+MINUTE_INTERVAL = re.compile(r'(\d+)(m|h)$')
+CALENDAR_INTERVALS = {'1d', '1wk', '1mo', '3mo'}
+MINUTE_NS = 60 * 10 ** 9
+DAY_NS = 24 * 60 * MINUTE_NS
+# 1970-01-01 was a Thursday; weeks start on the Monday 4 days later
+WEEK_OFFSET_DAYS = 4
+
+# How each column combines when bars are merged
+COLUMN_AGGREGATES = {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Adj Close': 'last',
+                     'Volume': 'sum', 'Dividends': 'sum', 'Stock Splits': 'sum', 'Capital Gains': 'sum'}
+
+
+def interval_minutes(interval):
+    match = MINUTE_INTERVAL.match(interval)
+    if match is None:
+        return None
+    count, unit = match.groups()
+    return int(count) * (60 if unit == 'h' else 1)
+
+
+def can_resample(interval):
+    return interval in CALENDAR_INTERVALS or interval_minutes(interval) is not None
+
+
+def bucket_ids(local, interval):
+    # Bucket of each bar; local is the bars' index as naive local time
+    ns = local.asi8
+    minutes = interval_minutes(interval)
+    if minutes is not None:
+        return ns // (minutes * MINUTE_NS)
+    if interval == '1d':
+        return ns // DAY_NS
+    if interval == '1wk':
+        return (ns // DAY_NS - WEEK_OFFSET_DAYS) // 7
+    months = local.year.to_numpy() * 12 + local.month.to_numpy() - 1
+    if interval == '1mo':
+        return months
+    if interval == '3mo':
+        return months // 3
+    raise ValueError(f"Cannot resample to {interval}")
+
+
+def bucket_labels(ids, interval):
+    # Start of each bucket, as naive local time
+    minutes = interval_minutes(interval)
+    if minutes is not None:
+        return pd.to_datetime(ids * minutes * MINUTE_NS)
+    if interval == '1d':
+        return pd.to_datetime(ids * DAY_NS)
+    if interval == '1wk':
+        return pd.to_datetime((ids * 7 + WEEK_OFFSET_DAYS) * DAY_NS)
+    months = ids * 3 if interval == '3mo' else ids
+    return pd.to_datetime(pd.DataFrame({'year': months // 12, 'month': months % 12 + 1, 'day': 1}))
+
+
+def _aggregate(values, how, starts, ends):
+    if how == 'first':
+        return values[starts]
+    if how == 'last':
+        return values[ends]
+    if values.dtype.kind not in 'iuf':
+        return values[ends]
+    if how == 'max':
+        return np.fmax.reduceat(values, starts)
+    if how == 'min':
+        return np.fmin.reduceat(values, starts)
+    if values.dtype.kind == 'f':
+        values = np.nan_to_num(values)
+    return np.add.reduceat(values, starts)
+
+
+def resample_ohlcv(bars, interval):
+    # bars (sorted by time) merged into interval bars, labelled by the
+    # start of their bucket. Columns are named like yf.download's, flat
+    # ('Close') or per ticker (('Close', 'AAPL')).
+    if bars.empty:
+        return bars
+    index = bars.index
+    tz = index.tz
+    local = index.tz_localize(None) if tz is not None else index
+    ids = bucket_ids(local, interval)
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(ids)) + 1))
+    ends = np.concatenate((starts[1:], [len(ids)])) - 1
+
+    columns = {}
+    for column in bars.columns:
+        name = column[0] if isinstance(column, tuple) else column
+        columns[column] = _aggregate(bars[column].to_numpy(), COLUMN_AGGREGATES.get(name, 'last'), starts, ends)
+    labels = pd.DatetimeIndex(bucket_labels(ids[starts], interval), name=index.name)
+    if tz is not None:
+        labels = labels.tz_localize(tz, ambiguous=np.zeros(len(labels), dtype=bool), nonexistent='shift_forward')
+    resampled = pd.DataFrame(columns, index=labels)
+    resampled.columns = bars.columns
+    return resampled
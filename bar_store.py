@@ -0,0 +1,293 @@
+# Local store of OHLCV bars per (symbol, interval), kept up to date by
+# fetching only the bars after the last one stored.
+#
+# The first read of a symbol downloads all the history Yahoo has for the
+# interval. Later reads fetch from the last stored bar on (it may have been
+# an unfinished session) once market_calendar says new bars can exist, and
+# append them as a new Parquet segment. Segments are never rewritten: a bar
+# stored twice is read from the newest segment. Reads pass their date range
+# to read_parquet as filters, so pyarrow skips the row groups outside it.
+# pyarrow only compares a timestamp column with bounds of the same unit and
+# timezone, so the metadata keeps the bars' timezone name next to the last
+# timestamp and every bound is converted to it (_bound).
+#
+# Prices are split and dividend adjusted, so a tail containing a new split
+# or dividend invalidates the stored history; it is then downloaded again in
+# full. So is an intraday series whose last bar is older than Yahoo keeps
+# that interval, since a tail fetch from there returns nothing. A tail that
+# comes back empty while the market is trading leaves the series stale, so
+# the next read tries again. A full download without bars (an unknown
+# symbol, or no bars at the interval) stores no segment and reads as an
+# empty frame until it is stale. Segments are compacted into one once there
+# are MAX_SEGMENTS.
+#
+# Chart views are read from a few base series and resampled locally (see
+# bar_resample): 2m bars for intraday views within Yahoo's 2m limit, daily
+# bars for daily, weekly and monthly ones. Any period at any of those
+# intervals then costs no download beyond keeping the bases up to date.
+#
+# Layout: <BAR_STORE_DIR>/<interval>/<symbol>/
+#   segment-000001.parquet ...   timestamp column plus the history() columns
+#   _meta.json                   {"last": ..., "tz": ..., "checked_at": ..., "segments": n, ...}
+# Everything but the segments starts with '_', which pyarrow skips when it
+# reads the directory as one dataset.
+import datetime
+import glob
+import json
+import os
+import re
+import threading
+import time
+
+import pandas as pd
+
+from bar_planner import INTRADAY_MAX_DAYS, PERIOD_PATTERN, is_intraday, period_days, slice_period
+from bar_resample import can_resample, resample_ohlcv
+from data_cache import DATA_CLASS_TTLS
+from market_calendar import market_expiry, next_change
+from market_data import get_provider
+
+BAR_STORE_DIR = os.environ.get('BAR_STORE_DIR',
+                               os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bar_store'))
+MAX_SEGMENTS = 32
+SEGMENT_PATTERN = re.compile(r'segment-(\d+)\.parquet$')
+TIMESTAMP = 'timestamp'
+SEGMENT = 'segment'
+
+INTRADAY_BASE = '2m'
+DAILY_BASE = '1d'
+
+# Columns that change every stored price when non-zero
+ADJUSTING_ACTIONS = ['Dividends', 'Stock Splits']
+
+DAY_SECONDS = 24 * 60 * 60
+
+
+def fetch_history(symbol, interval, start=None):
+    # All bars Yahoo has for the interval, or those from start on
+    provider = get_provider()
+    if start is not None:
+        return provider.history(symbol, interval, start=start)
+    if is_intraday(interval):
+        # Yahoo rejects intraday periods reaching past its limit
+        return provider.history(symbol, interval, period=f"{INTRADAY_MAX_DAYS[interval] - 1}d")
+    return provider.history(symbol, interval, period='max')
+
+
+def base_interval(interval, period):
+    # Stored series a view is derived from
+    if is_intraday(interval):
+        if interval == '1m' or period_days(period) >= INTRADAY_MAX_DAYS[INTRADAY_BASE]:
+            # Finer than the base, or longer than Yahoo keeps 2m bars
+            return interval
+        return INTRADAY_BASE
+    return DAILY_BASE if can_resample(interval) else interval
+
+
+def period_start(period, now):
+    # Earliest timestamp a read of `period` ending now can need; 'Nd' counts
+    # sessions, so it reaches back far enough to cover weekends and holidays
+    if period == 'max':
+        return None
+    if period == 'ytd':
+        return now.normalize().replace(month=1, day=1)
+    count, unit = PERIOD_PATTERN.match(period).groups()
+    count = int(count)
+    if unit == 'd':
+        return now.normalize() - pd.Timedelta(days=2 * count + 7)
+    offset = pd.DateOffset(months=count) if unit == 'mo' else pd.DateOffset(years=count)
+    return now.normalize() - offset
+
+
+class BarStore:
+
+    def __init__(self, directory=BAR_STORE_DIR, fetch=fetch_history, clock=time.time):
+        self.directory = directory
+        self.fetch = fetch
+        self.clock = clock
+        self.locks = {}
+        self.locks_lock = threading.Lock()
+
+    def _lock(self, symbol, interval):
+        with self.locks_lock:
+            return self.locks.setdefault((symbol, interval), threading.Lock())
+
+    def series_dir(self, symbol, interval):
+        return os.path.join(self.directory, interval, symbol.upper())
+
+    def _meta_path(self, symbol, interval):
+        return os.path.join(self.series_dir(symbol, interval), '_meta.json')
+
+    def meta(self, symbol, interval):
+        try:
+            with open(self._meta_path(symbol, interval), encoding='UTF-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _write_meta(self, symbol, interval, meta):
+        path = self._meta_path(symbol, interval)
+        with open(path + '.tmp', 'w', encoding='UTF-8') as f:
+            json.dump(meta, f)
+        os.replace(path + '.tmp', path)
+
+    def segments(self, symbol, interval):
+        paths = glob.glob(os.path.join(self.series_dir(symbol, interval), 'segment-*.parquet'))
+        return sorted(paths, key=lambda path: int(SEGMENT_PATTERN.search(path).group(1)))
+
+    def _write_segment(self, symbol, interval, bars, number):
+        frame = bars.rename_axis(TIMESTAMP).reset_index()
+        frame[TIMESTAMP] = frame[TIMESTAMP].dt.as_unit('ns')
+        frame[SEGMENT] = number
+        directory = self.series_dir(symbol, interval)
+        tmp_path = os.path.join(directory, f"_segment-{number:06d}.tmp")
+        frame.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, os.path.join(directory, f"segment-{number:06d}.parquet"))
+
+    def _replace(self, symbol, interval, bars, checked_at):
+        # Start the series over with bars as its only segment, or with no
+        # segment when the fetch returned no bars
+        directory = self.series_dir(symbol, interval)
+        os.makedirs(directory, exist_ok=True)
+        old_segments = self.segments(symbol, interval)
+        number = int(SEGMENT_PATTERN.search(old_segments[-1]).group(1)) + 1 if old_segments else 1
+        if has_bars(bars):
+            self._write_segment(symbol, interval, bars, number)
+        for path in old_segments:
+            os.remove(path)
+        self._write_meta(symbol, interval, {
+            'last': bars.index[-1].isoformat() if has_bars(bars) else None,
+            'tz': str(bars.index.tz) if has_bars(bars) and bars.index.tz is not None else None,
+            'checked_at': checked_at,
+            'segments': 1,
+            'next_segment': number + 1,
+        })
+
+    def _data_class(self, interval):
+        return 'intraday' if is_intraday(interval) else 'daily'
+
+    def is_stale(self, symbol, interval, meta):
+        data_class = self._data_class(interval)
+        expires_at = market_expiry(data_class, DATA_CLASS_TTLS[data_class], meta['checked_at'], symbol)
+        return self.clock() >= expires_at
+
+    def update(self, symbol, interval):
+        # Brings the stored series up to date; returns its metadata
+        with self._lock(symbol, interval):
+            meta = self.meta(symbol, interval)
+            now = self.clock()
+            if meta is not None and not self.is_stale(symbol, interval, meta):
+                return meta
+            if meta is None or meta['last'] is None or 'tz' not in meta:
+                self._replace(symbol, interval, self.fetch(symbol, interval), now)
+                return self.meta(symbol, interval)
+
+            last = last_bar(meta)
+            if is_intraday(interval) and now - last.timestamp() >= INTRADAY_MAX_DAYS[interval] * DAY_SECONDS:
+                # Yahoo has no bars that far back to continue from
+                self._replace(symbol, interval, self.fetch(symbol, interval), now)
+                return self.meta(symbol, interval)
+
+            tail = self.fetch(symbol, interval, start=last)
+            tail = tail[tail.index >= last] if has_bars(tail) else pd.DataFrame()
+            if tail.empty and is_trading(symbol, now):
+                # Not even the last stored bar came back: the fetch failed,
+                # so leave the series stale rather than serve it as fresh
+                return meta
+            actions = [column for column in ADJUSTING_ACTIONS if column in tail.columns]
+            if actions and (tail[tail.index > last][actions] != 0).any().any():
+                # A new split or dividend re-adjusts every stored price
+                self._replace(symbol, interval, self.fetch(symbol, interval), now)
+                return self.meta(symbol, interval)
+
+            if not tail.empty:
+                self._write_segment(symbol, interval, tail, meta['next_segment'])
+                meta['last'] = tail.index[-1].isoformat()
+                meta['segments'] += 1
+                meta['next_segment'] += 1
+            meta['checked_at'] = now
+            self._write_meta(symbol, interval, meta)
+            if meta['segments'] >= MAX_SEGMENTS:
+                self._replace(symbol, interval, self._read(symbol, interval, meta['tz']), now)
+                meta = self.meta(symbol, interval)
+            return meta
+
+    def _read(self, symbol, interval, tz, start=None, end=None):
+        filters = []
+        if start is not None:
+            filters.append((TIMESTAMP, '>=', _bound(start, tz)))
+        if end is not None:
+            filters.append((TIMESTAMP, '<', _bound(end, tz)))
+        frame = pd.read_parquet(self.series_dir(symbol, interval), filters=filters or None)
+        # A bar stored in several segments is taken from the newest one
+        frame = frame.sort_values([TIMESTAMP, SEGMENT]).drop_duplicates(TIMESTAMP, keep='last')
+        return frame.drop(columns=SEGMENT).set_index(TIMESTAMP).rename_axis(
+            'Datetime' if is_intraday(interval) else 'Date')
+
+    def read(self, symbol, interval='1d', start=None, end=None):
+        # Bars with start <= timestamp < end, after fetching any missing tail
+        meta = self.update(symbol, interval)
+        if meta['last'] is None:
+            return pd.DataFrame()
+        return self._read(symbol, interval, meta['tz'], start, end)
+
+    def read_period(self, symbol, interval='1d', period='1mo'):
+        # The bars a download of period would return
+        meta = self.update(symbol, interval)
+        if meta['last'] is None:
+            return pd.DataFrame()
+        bars = self._read(symbol, interval, meta['tz'], period_start(period, last_bar(meta)))
+        return slice_period(bars, period)
+
+    def read_view(self, symbol, interval, period):
+        # What yf.download(symbol, interval=interval, period=period) would
+        # return, derived from the base series
+        base = base_interval(interval, period)
+        bars = self.read_period(symbol, base, period)
+        return bars if base == interval else resample_ohlcv(bars, interval)
+
+
+def is_trading(symbol, now):
+    # True while the symbol's market data can change (open or settling)
+    moment = datetime.datetime.fromtimestamp(now, datetime.timezone.utc)
+    return next_change(moment, symbol) <= moment
+
+
+def has_bars(frame):
+    # False for yfinance's empty_df(), which it returns for unknown symbols,
+    # errors and intervals the symbol has no bars at; its index is not even
+    # a DatetimeIndex
+    return not frame.empty and isinstance(frame.index, pd.DatetimeIndex)
+
+
+def last_bar(meta):
+    # Timestamp of the last stored bar, in the bars' own timezone
+    last = pd.Timestamp(meta['last'])
+    return last.tz_convert(meta['tz']) if meta['tz'] is not None else last
+
+
+def _bound(timestamp, tz):
+    # A read bound as pyarrow compares it with the stored column: in
+    # nanoseconds and the column's timezone. Naive bounds are taken as local
+    # time of the bars.
+    timestamp = pd.Timestamp(timestamp)
+    if tz is None:
+        timestamp = timestamp.tz_localize(None) if timestamp.tzinfo is not None else timestamp
+    elif timestamp.tzinfo is None:
+        timestamp = timestamp.tz_localize(tz)
+    else:
+        timestamp = timestamp.tz_convert(tz)
+    return timestamp.as_unit('ns')
+
+
+_bar_store = None
+_bar_store_lock = threading.Lock()
+
+
+def get_bar_store():
+    # One store per process
+    global _bar_store
+    with _bar_store_lock:
+        if _bar_store is None:
+            _bar_store = BarStore()
+        return _bar_store
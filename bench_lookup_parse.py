@@ -0,0 +1,68 @@
+# Parse-throughput benchmark for the lookup page parser in
+# findtickersymbolyfinance, against the old slice-and-eval approach.
+#
+# Pages saved by `symbol_crawler.py --save-pages DIR` are used when DIR is
+# given; otherwise synthetic pages padded to roughly the size of a real one.
+#
+# Usage: python bench_lookup_parse.py [DIR]
+import glob
+import os
+import sys
+import time
+
+from findtickersymbolyfinance import iter_lookup_documents
+from bench_symbol_crawler import build_universe, render_page
+
+
+# The old process_one parsing: slice out the documents array and eval it
+def eval_documents(body):
+    pos_beg = body.find('"documents":')
+    pos_end = body.find('"searchString":', pos_beg+1)
+    return eval(body[pos_beg+12: pos_end-1])
+
+
+def synthetic_pages(count=50, padding=400_000):
+    universe = build_universe('ABCDEFGH', 20000)
+    filler = '<div class="filler">' + 'x' * padding + '</div>'
+    return [filler + render_page(universe, universe[i * 37][0][:1], 0, 100) for i in range(count)]
+
+
+def time_parser(parse, pages, rounds=5):
+    docs = 0
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for body in pages:
+            docs += len(parse(body))
+    return time.perf_counter() - start, docs
+
+
+def main():
+    if len(sys.argv) > 1:
+        pages = []
+        for path in sorted(glob.glob(os.path.join(sys.argv[1], '*.html'))):
+            with open(path, encoding='UTF-8') as f:
+                pages.append(f.read())
+        pages = [body for body in pages if '"documents":' in body]
+    else:
+        pages = synthetic_pages()
+
+    size_mb = sum(len(body) for body in pages) / 1e6
+    print(f"{len(pages)} pages, {size_mb:.1f} MB")
+
+    parsers = [('streaming', lambda body: list(iter_lookup_documents(body))), ('eval', eval_documents)]
+    for label, parse in parsers:
+        try:
+            elapsed, docs = time_parser(parse, pages)
+        except Exception as e:
+            print(f"  {label:<10} failed: {e!r}")
+            continue
+        rounds_mb = size_mb * 5
+        print(f"  {label:<10} {rounds_mb / elapsed:8.1f} MB/s {docs / elapsed:12.0f} docs/s")
+
+    same = all([doc['symbol'] for doc in iter_lookup_documents(body)] == [doc['symbol'] for doc in eval_documents(body)]
+               for body in pages)
+    print(f"  same symbols as eval: {same}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+# Load test for request coalescing in data_cache: N threads ask for the
+# same symbol at the same moment through a cached fetch function that
+# sleeps like a Yahoo request, and the upstream calls are counted.
+#
+# Usage: python bench_singleflight.py [threads] [latency ms]
+import sys
+import threading
+import time
+
+from data_cache import TTLCache, cached
+
+
+def run(threads, latency, cache):
+    calls = []
+    calls_lock = threading.Lock()
+
+    @cached('quote', cache=cache)
+    def get_stock_info(symbol):
+        with calls_lock:
+            calls.append(symbol)
+        time.sleep(latency)
+        return {'symbol': symbol, 'ask': 123.45}
+
+    barrier = threading.Barrier(threads)
+    results = [None] * threads
+
+    def session(i):
+        barrier.wait()
+        results[i] = get_stock_info('NVDA')
+
+    workers = [threading.Thread(target=session, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+    same = all(result is results[0] for result in results)
+    return len(calls), elapsed, same
+
+
+def main():
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    latency = (int(sys.argv[2]) if len(sys.argv) > 2 else 300) / 1000
+
+    cache = TTLCache()
+    upstream, elapsed, same = run(threads, latency, cache)
+    print(f"{threads} concurrent sessions, {latency * 1000:.0f} ms upstream latency")
+    print(f"  upstream calls: {upstream} (coalesced {cache.flight.shared}), "
+          f"{elapsed * 1000:.0f} ms, same result object: {same}")
+    print(f"  exactly one upstream call: {upstream == 1}")
+
+
+if __name__ == '__main__':
+    main()
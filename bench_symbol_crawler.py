@@ -0,0 +1,115 @@
+# Benchmark for symbol_crawler against a local stub of the Yahoo lookup pages.
+#
+# The stub serves a synthetic universe with a fixed per-request latency, so
+# the numbers show how throughput scales with the number of workers.
+# --dense adds that many symbols under one two-letter prefix, enough to make
+# the crawler split it. --server-rate makes the stub answer 429 above that
+# many requests per second, to compare crawler budgets (--rate) against it.
+#
+# Usage: python bench_symbol_crawler.py [--latency 0.02] [--letters ABCD]
+#                                       [--dense 12000] [--server-rate 100 --rate 80,400]
+import argparse
+import contextlib
+import io
+import json
+import random
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import symbol_crawler
+from crawler_http import HttpThrottle, TokenBucket
+
+
+def build_universe(letters, size, seed=3, dense=0, dense_prefix='AB'):
+    rng = random.Random(seed)
+    alphabet = symbol_crawler.SEARCH_SET
+    universe = {}
+    while len(universe) < size:
+        symbol = rng.choice(letters) + ''.join(rng.choice(alphabet) for _ in range(rng.randint(1, 4)))
+        universe[symbol] = f"{symbol} Holdings Inc."
+    while len(universe) < size + dense:
+        symbol = dense_prefix + ''.join(rng.choice(alphabet) for _ in range(rng.randint(1, 4)))
+        universe[symbol] = f"{symbol} Holdings Inc."
+    return sorted(universe.items())
+
+
+def render_page(universe, srch, block, count):
+    lo = bisect_left(universe, (srch,))
+    hi = bisect_left(universe, (srch + '\U0010ffff',), lo)
+    matches = universe[lo:hi]
+    documents = [{'symbol': symbol, 'shortName': name, 'exchange': 'NYQ', 'type': 'S', 'industryName': 'Stub'}
+                 for symbol, name in matches[block:block + count]]
+    if not documents:
+        return f"<html><span>No Results for '{srch}'</span><span>All (0)</span></html>"
+    lookup = (f'"lookupData":{{"start":{block},"count":{count},"total":{len(matches)},'
+              f'"documents":{json.dumps(documents)},"searchString":"{srch}"}}')
+    return f"<html><span>All ({len(matches)})</span><script>{{{lookup}}}</script></html>"
+
+
+def start_stub_server(universe, latency, server_rate=None):
+    # Throttles like Yahoo does: over budget requests get a 429
+    limit = TokenBucket(server_rate, burst=max(1.0, server_rate / 10)) if server_rate else None
+
+    class LookupHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            query = parse_qs(urlparse(self.path).query)
+            time.sleep(latency)
+            if limit is not None and not limit.try_acquire():
+                self.send_response(429)
+                self.send_header('Retry-After', '0')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            body = render_page(universe, query['s'][0], int(query['b'][0]), int(query['c'][0])).encode('UTF-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), LookupHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--latency', type=float, default=0.02)
+    parser.add_argument('--letters', default='ABCD')
+    parser.add_argument('--size', type=int, default=20000)
+    parser.add_argument('--workers', default='1,4,16')
+    parser.add_argument('--dense', type=int, default=0)
+    parser.add_argument('--server-rate', type=float)
+    parser.add_argument('--rate', default='1000', help="crawler request budgets to try, comma separated")
+    args = parser.parse_args()
+
+    universe = build_universe(args.letters, args.size, dense=args.dense)
+    server = start_stub_server(universe, args.latency, args.server_rate)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    print(f"stub universe: {len(universe)} symbols, {args.latency * 1000:.0f} ms latency per request, "
+          f"server limit {args.server_rate or 'none'}")
+
+    for rate in map(float, args.rate.split(',')):
+        for workers in map(int, args.workers.split(',')):
+            prefixes = [letter + term for letter in args.letters for term in symbol_crawler.SEARCH_SET]
+            state = symbol_crawler.CrawlState(path=None, prefixes=prefixes)
+            throttle = HttpThrottle(rate, base_delay=0.05, max_delay=1.0)
+            crawler = symbol_crawler.SymbolCrawler(state, max_workers=workers, base_url=base_url,
+                                                   save_every=10 ** 9, throttle=throttle)
+            with contextlib.redirect_stdout(io.StringIO()):
+                symbols = crawler.run()
+            missing = len(universe) - len(symbols)
+            print(f"  rate={rate:<6g} workers={workers:<3} {len(symbols)} symbols ({missing} missed), "
+                  f"{crawler.stats.summary()}")
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
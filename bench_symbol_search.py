@@ -0,0 +1,129 @@
+# Benchmark for symbol_search.SymbolIndex against the linear scan that
+# find_related_options used to run on every rerun, plus latency and recall of
+# the fuzzy (typo-tolerant) mode.
+#
+# Usage: python bench_symbol_search.py
+import random
+import time
+
+from symbol_search import SymbolIndex
+
+
+# The original find_related_options loop, kept here as the baseline
+def linear_scan(stock_options, user_input, limit=5):
+    user_input = user_input.upper()
+    related_options = []
+    for option, full_name in stock_options.items():
+        option_upper = option.upper()
+        full_name_upper = full_name.upper()
+        if user_input in option_upper or user_input in full_name_upper:
+            related_options.append((option, full_name))
+            if len(related_options) == limit:
+                break
+    return related_options
+
+
+# Simulates someone typing symbols and company names one keystroke at a time
+def build_queries(stock_options, count=300, seed=7):
+    rng = random.Random(seed)
+    items = list(stock_options.items())
+    queries = []
+    while len(queries) < count:
+        symbol, full_name = rng.choice(items)
+        text = symbol if rng.random() < 0.5 else full_name
+        for end in range(1, min(len(text), 12) + 1):
+            queries.append(text[:end])
+    # A few strings that match nothing
+    queries += ['ZZZZQ', 'QQXJ', 'MIRCOSOFT', '#$%']
+    return queries
+
+
+# One random edit (delete, swap, replace or insert) applied to a company
+# name or symbol, paired with the symbol it came from
+def build_typos(stock_options, count=300, seed=11):
+    rng = random.Random(seed)
+    items = list(stock_options.items())
+    typos = []
+    while len(typos) < count:
+        symbol, full_name = rng.choice(items)
+        text = (symbol if rng.random() < 0.3 else full_name.split(',')[0]).upper()
+        if len(text) < 4:
+            continue
+        i = rng.randrange(1, len(text) - 1)
+        edit = rng.choice('dsri')
+        if edit == 'd':
+            text = text[:i] + text[i + 1:]
+        elif edit == 's':
+            text = text[:i] + text[i + 1] + text[i] + text[i + 2:]
+        elif edit == 'r':
+            text = text[:i] + rng.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZ') + text[i + 1:]
+        else:
+            text = text[:i] + rng.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZ') + text[i:]
+        typos.append((text, symbol))
+    return typos
+
+
+# Ranked results must be real matches, as many as the scan finds (up to the
+# limit), with tiers never getting better further down the list
+def is_valid(index, stock_options, query, limit=5):
+    ranked = index.ranked_search(query, limit)
+    tiers = [tier for tier, _ in ranked]
+    upper = query.upper()
+    return (len(ranked) == len(linear_scan(stock_options, query, limit))
+            and all(upper in symbol.upper() or upper in full_name.upper() for _, (symbol, full_name) in ranked)
+            and tiers == sorted(tiers))
+
+
+def percentile(samples, pct):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
+
+
+def time_calls(func, queries):
+    samples = []
+    for query in queries:
+        start = time.perf_counter()
+        func(query)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def report(label, samples):
+    print(f"  {label:<8} mean {sum(samples) / len(samples):8.3f} ms   "
+          f"p50 {percentile(samples, 50):8.3f} ms   p99 {percentile(samples, 99):8.3f} ms")
+
+
+def run(name, stock_options):
+    start = time.perf_counter()
+    index = SymbolIndex(stock_options)
+    build_ms = (time.perf_counter() - start) * 1000
+    queries = build_queries(stock_options)
+
+    invalid = [query for query in queries if not is_valid(index, stock_options, query)]
+
+    print(f"{name}: {len(stock_options)} symbols, {len(queries)} queries, index built in {build_ms:.0f} ms")
+    report('scan', time_calls(lambda query: linear_scan(stock_options, query), queries))
+    report('index', time_calls(index.search, queries))
+    print(f"  invalid results: {len(invalid)} {invalid[:5]}")
+    for query in ('A', 'MICRO', 'APPLE'):
+        print(f"  {query!r}: {[symbol for symbol, _ in index.search(query)]}")
+
+    # Typo-tolerant mode, where the scan would find nothing at all. Recall
+    # counts a typo as found when some top-5 hit has the original's name.
+    typos = build_typos(stock_options)
+    report('fuzzy', time_calls(index.fuzzy_search, [typo for typo, _ in typos]))
+    found = sum(any(full_name == stock_options[symbol] for _, full_name in index.fuzzy_search(typo))
+                for typo, symbol in typos)
+    print(f"  fuzzy recall@5: {found / len(typos):.1%}")
+
+
+def main():
+    from stock_tickers import stock_options
+    run('stock_tickers', stock_options)
+
+    from stock_options1 import stock_options as all_stock_options
+    run('stock_options1', all_stock_options)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,363 @@
+# Cache shared between processes, so several dynos or Streamlit processes
+# fetch each symbol from Yahoo once instead of once each.
+#
+# data_cache stays the first level in every process; on a miss it asks the
+# shared backend before fetching, and writes what it fetches back to it.
+# Entries keep the in-process cache's semantics: the same keys (with the
+# disk cache's schema version), pickled values, and the absolute expiry time
+# computed by the process that fetched them.
+#
+# Unpickling runs code chosen by whoever wrote the bytes, so every entry is
+# signed with HMAC-SHA256 over its key and payload using CACHE_SIGNING_KEY,
+# and entries that fail the check, or do not decode, count as misses. The
+# shared cache stays off until CACHE_SIGNING_KEY is set (to the same secret
+# in every process). rediss:// verifies the server certificate; for a server
+# with a self-signed one (Heroku Redis) point REDIS_TLS_CA_FILE at its CA, or
+# set REDIS_TLS_VERIFY=0 to skip the check.
+#
+# Backends:
+#   RedisBackend   any server speaking the Redis protocol (RESP), selected by
+#                  REDIS_URL: redis://[:password@]host[:port][/db], rediss://
+#                  for TLS, or unix:///path/to/socket
+#   LocalBackend   an in-process dict with the same interface, for tests
+#
+# LocalCacheServer serves a LocalBackend over a Unix socket with the few
+# Redis commands RedisBackend uses, for sharing a cache between local
+# processes without a Redis install:
+#   python cache_backends.py /tmp/stockquote-cache.sock
+#   REDIS_URL=unix:///tmp/stockquote-cache.sock CACHE_SIGNING_KEY=... streamlit run StockQuote.py
+import hashlib
+import hmac
+import logging
+import os
+import pickle
+import socket
+import socketserver
+import ssl
+import sys
+import threading
+import time
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from disk_cache import SCHEMA_VERSION, disk_key
+
+KEY_PREFIX = 'stockquote:'
+SOCKET_TIMEOUT = 2.0
+SIGNATURE_SIZE = hashlib.sha256().digest_size
+
+# Seconds to stay on the in-process cache alone after the backend failed
+RECONNECT_INTERVAL = 30
+
+
+def backend_key(memory_key):
+    return f"{KEY_PREFIX}v{SCHEMA_VERSION}:{disk_key(memory_key)}"
+
+
+def _signature(signing_key, key, payload):
+    # Binds the payload to its key, so a valid entry cannot be replayed
+    # under another one
+    return hmac.new(signing_key, key.encode() + b'\0' + payload, hashlib.sha256).digest()
+
+
+def encode_entry(key, value, data_class, expires_at, signing_key):
+    payload = pickle.dumps((data_class, expires_at, value), protocol=pickle.HIGHEST_PROTOCOL)
+    return _signature(signing_key, key, payload) + payload
+
+
+def decode_entry(key, data, signing_key):
+    # (value, data class, expires_at), or None unless data was signed with
+    # signing_key for key and decodes
+    signature, payload = data[:SIGNATURE_SIZE], data[SIGNATURE_SIZE:]
+    if not hmac.compare_digest(signature, _signature(signing_key, key, payload)):
+        logging.warning(f"Ignoring shared cache entry with a bad signature: {key}")
+        return None
+    try:
+        data_class, expires_at, value = pickle.loads(payload)
+    except Exception as e:
+        logging.warning(f"Ignoring unreadable shared cache entry {key}: {e}")
+        return None
+    return value, data_class, expires_at
+
+
+class CacheBackend:
+    # Stores signed, encoded entries until their expiry time. get returns
+    # (value, data class, expires_at) or None; failures count as misses.
+
+    def __init__(self, signing_key, clock=time.time):
+        self.signing_key = signing_key
+        self.clock = clock
+
+    def get_bytes(self, key):
+        raise NotImplementedError
+
+    def set_bytes(self, key, data, ttl):
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def get(self, memory_key):
+        key = backend_key(memory_key)
+        data = self.get_bytes(key)
+        entry = decode_entry(key, data, self.signing_key) if data is not None else None
+        if entry is None or entry[2] <= self.clock():
+            return None
+        return entry
+
+    def set(self, memory_key, value, data_class, expires_at):
+        ttl = expires_at - self.clock()
+        if ttl > 0:
+            key = backend_key(memory_key)
+            self.set_bytes(key, encode_entry(key, value, data_class, expires_at, self.signing_key), ttl)
+
+    def close(self):
+        pass
+
+
+class LocalBackend(CacheBackend):
+    # In-process stand-in for a Redis server
+
+    def __init__(self, signing_key=None, clock=time.time):
+        super().__init__(signing_key or os.urandom(32), clock)
+        self.entries = {}
+        self.lock = threading.Lock()
+
+    def get_bytes(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            data, expires_at = entry
+            if expires_at <= self.clock():
+                del self.entries[key]
+                return None
+            return data
+
+    def set_bytes(self, key, data, ttl):
+        with self.lock:
+            self.entries[key] = (data, self.clock() + ttl)
+
+    def delete(self, key):
+        with self.lock:
+            return int(self.entries.pop(key, None) is not None)
+
+    def flush(self):
+        with self.lock:
+            self.entries.clear()
+
+
+class RedisError(Exception):
+    # An error reply from the server
+    pass
+
+
+def encode_command(*args):
+    parts = [b'*%d\r\n' % len(args)]
+    for arg in args:
+        arg = arg if isinstance(arg, bytes) else str(arg).encode()
+        parts.append(b'$%d\r\n%s\r\n' % (len(arg), arg))
+    return b''.join(parts)
+
+
+def read_reply(stream):
+    line = stream.readline()
+    if not line.endswith(b'\r\n'):
+        raise ConnectionError('Connection closed by the cache server')
+    kind, body = line[:1], line[1:-2]
+    if kind == b'+':
+        return body
+    if kind == b'-':
+        raise RedisError(body.decode(errors='replace'))
+    if kind == b':':
+        return int(body)
+    if kind == b'$':
+        length = int(body)
+        if length < 0:
+            return None
+        data = stream.read(length + 2)
+        if len(data) != length + 2:
+            raise ConnectionError('Connection closed by the cache server')
+        return data[:-2]
+    if kind == b'*':
+        length = int(body)
+        return None if length < 0 else [read_reply(stream) for _ in range(length)]
+    raise ConnectionError(f"Unexpected reply from the cache server: {line!r}")
+
+
+class RedisBackend(CacheBackend):
+    # Minimal Redis client: one connection shared by all threads, used for
+    # GET, SET ... PX and DEL. After a failure the backend is skipped for
+    # RECONNECT_INTERVAL seconds rather than slowing every request down.
+
+    def __init__(self, url, signing_key, clock=time.time, timeout=SOCKET_TIMEOUT, tls_verify=True, tls_ca_file=None):
+        super().__init__(signing_key, clock)
+        self.url = urlsplit(url)
+        if self.url.scheme not in ('redis', 'rediss', 'unix'):
+            raise ValueError(f"Unsupported cache URL scheme: {self.url.scheme}")
+        self.timeout = timeout
+        self.tls_verify = tls_verify
+        self.tls_ca_file = tls_ca_file
+        self.sock = None
+        self.stream = None
+        self.failed_at = None
+        self.lock = threading.Lock()
+
+    def _connect(self):
+        if self.url.scheme == 'unix':
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.url.path)
+            db = parse_qs(self.url.query).get('db', ['0'])[0]
+        else:
+            sock = socket.create_connection((self.url.hostname or 'localhost', self.url.port or 6379),
+                                            timeout=self.timeout)
+            if self.url.scheme == 'rediss':
+                context = ssl.create_default_context(cafile=self.tls_ca_file)
+                if not self.tls_verify:
+                    context.check_hostname = False
+                    context.verify_mode = ssl.CERT_NONE
+                sock = context.wrap_socket(sock, server_hostname=self.url.hostname)
+            db = self.url.path.lstrip('/') or '0'
+        self.sock = sock
+        self.stream = sock.makefile('rb')
+        if self.url.password:
+            if self.url.username:
+                self._command('AUTH', unquote(self.url.username), unquote(self.url.password))
+            else:
+                self._command('AUTH', unquote(self.url.password))
+        if db != '0':
+            self._command('SELECT', db)
+
+    def _disconnect(self):
+        if self.sock is not None:
+            try:
+                self.sock.close()
+            except OSError:
+                pass
+        self.sock = None
+        self.stream = None
+
+    def _command(self, *args):
+        self.sock.sendall(encode_command(*args))
+        return read_reply(self.stream)
+
+    def execute(self, *args, default=None):
+        # Reply to a command, or default if the server cannot be reached
+        with self.lock:
+            if self.failed_at is not None and self.clock() - self.failed_at < RECONNECT_INTERVAL:
+                return default
+            try:
+                if self.sock is None:
+                    self._connect()
+                reply = self._command(*args)
+                self.failed_at = None
+                return reply
+            except (OSError, ConnectionError, RedisError, ValueError) as e:
+                logging.warning(f"Shared cache unavailable, using the local cache only: {e}")
+                self._disconnect()
+                self.failed_at = self.clock()
+                return default
+
+    def get_bytes(self, key):
+        return self.execute('GET', key)
+
+    def set_bytes(self, key, data, ttl):
+        self.execute('SET', key, data, 'PX', max(1, int(ttl * 1000)))
+
+    def delete(self, key):
+        return self.execute('DEL', key, default=0)
+
+    def close(self):
+        with self.lock:
+            self._disconnect()
+
+
+class LocalCacheServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    # The subset of Redis RedisBackend speaks, over a Unix socket
+    daemon_threads = True
+
+    def __init__(self, path, backend=None):
+        if os.path.exists(path):
+            os.unlink(path)
+        self.backend = backend or LocalBackend()
+        super().__init__(path, _LocalCacheHandler)
+
+
+class _LocalCacheHandler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        while True:
+            try:
+                command = read_reply(self.rfile)
+            except (ConnectionError, RedisError, ValueError):
+                return
+            self.wfile.write(self.server_reply(command))
+
+    def server_reply(self, command):
+        if not isinstance(command, list) or not command:
+            return b'-ERR expected a command array\r\n'
+        name = command[0].upper()
+        args = command[1:]
+        backend = self.server.backend
+        if name == b'PING':
+            return b'+PONG\r\n'
+        if name in (b'AUTH', b'SELECT'):
+            return b'+OK\r\n'
+        if name == b'GET' and len(args) == 1:
+            data = backend.get_bytes(args[0])
+            return b'$-1\r\n' if data is None else b'$%d\r\n%s\r\n' % (len(data), data)
+        if name == b'SET' and len(args) in (2, 4):
+            ttl = float('inf')
+            if len(args) == 4:
+                unit = args[2].upper()
+                if unit not in (b'PX', b'EX'):
+                    return b'-ERR syntax error\r\n'
+                ttl = int(args[3]) / 1000 if unit == b'PX' else int(args[3])
+            backend.set_bytes(args[0], args[1], ttl)
+            return b'+OK\r\n'
+        if name == b'DEL':
+            return b':%d\r\n' % sum(backend.delete(key) for key in args)
+        if name == b'FLUSHDB':
+            backend.flush()
+            return b'+OK\r\n'
+        return b"-ERR unknown command '%s'\r\n" % name
+
+
+_backend = None
+_backend_lock = threading.Lock()
+_backend_failed = False
+
+
+def get_shared_backend():
+    # The backend named by REDIS_URL, or None to use the in-process cache alone
+    global _backend, _backend_failed
+    with _backend_lock:
+        url = os.environ.get('REDIS_URL')
+        if _backend is None and url and not _backend_failed:
+            signing_key = os.environ.get('CACHE_SIGNING_KEY')
+            try:
+                if not signing_key:
+                    raise ValueError('CACHE_SIGNING_KEY is not set')
+                _backend = RedisBackend(url, signing_key.encode(),
+                                        tls_verify=os.environ.get('REDIS_TLS_VERIFY', '1') != '0',
+                                        tls_ca_file=os.environ.get('REDIS_TLS_CA_FILE'))
+            except ValueError as e:
+                _backend_failed = True
+                logging.warning(f"Shared cache disabled: {e}")
+        return _backend
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else '/tmp/stockquote-cache.sock'
+    with LocalCacheServer(path) as server:
+        print(f"Serving the shared cache on unix://{path}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            os.unlink(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+# Shared rate limiting and retry policy for the Yahoo lookup crawler.
+#
+# Every request first takes a token from a TokenBucket shared by all worker
+# threads, so the crawler never exceeds its request budget however many
+# workers it runs. Throttling answers (429) halve the bucket's rate and
+# successful requests slowly raise it back towards the configured budget, so
+# a run settles near the highest rate Yahoo tolerates. Failed requests are
+# retried with jittered exponential backoff up to a fixed number of times,
+# and every response status (or exception type) is counted.
+import collections
+import logging
+import random
+import threading
+import time
+
+import requests
+
+# Statuses worth retrying; any other 4xx means the request itself is wrong
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+THROTTLE_STATUS = 429
+REQUEST_TIMEOUT = 30
+
+
+class RetryError(Exception):
+    # Raised once a request has used up its retries
+    pass
+
+
+class TokenBucket:
+    # Thread-safe token bucket whose refill rate adapts to throttling:
+    # halved on every throttle, raised by a fraction of the budget per success
+
+    def __init__(self, rate, burst=None, min_rate=0.5, recovery=0.02):
+        self.max_rate = float(rate)
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else max(1.0, rate))
+        self.min_rate = min(min_rate, self.max_rate)
+        self.recovery = recovery
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self):
+        # Takes a token if one is available, without waiting
+        with self.lock:
+            self._refill(time.monotonic())
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+    def acquire(self):
+        # Blocks until a token is available
+        while True:
+            with self.lock:
+                self._refill(time.monotonic())
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def slow_down(self):
+        with self.lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            # Drop the saved-up burst too, or it would be spent straight away
+            self.tokens = min(self.tokens, 0.0)
+
+    def speed_up(self):
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate * self.recovery)
+
+
+class Backoff:
+    # Exponential backoff with full jitter: attempt n waits uniformly in
+    # [0, min(max_delay, base_delay * 2**n)]
+
+    def __init__(self, base_delay=0.5, max_delay=30.0, max_retries=6, rng=None):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retries = max_retries
+        self.rng = rng or random.Random()
+
+    def delay(self, attempt, retry_after=None):
+        delay = self.rng.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        if retry_after is not None:
+            delay = max(delay, min(self.max_delay, retry_after))
+        return delay
+
+
+def retry_after_seconds(response):
+    value = response.headers.get('Retry-After')
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class HttpThrottle:
+    # Rate limit, retries and per-status counters shared by all workers
+
+    def __init__(self, rate=10.0, burst=None, max_retries=6, base_delay=0.5, max_delay=30.0,
+                 timeout=REQUEST_TIMEOUT):
+        self.bucket = TokenBucket(rate, burst)
+        self.backoff = Backoff(base_delay, max_delay, max_retries)
+        self.timeout = timeout
+        self.status_counts = collections.Counter()
+        self.retries = 0
+        self.lock = threading.Lock()
+
+    def _count(self, status):
+        with self.lock:
+            self.status_counts[status] += 1
+
+    def get(self, session, url, headers):
+        # Returns the response text, or raises RetryError once every retry
+        # has failed. Non-retryable HTTP errors are raised straight away.
+        attempt = 0
+        while True:
+            self.bucket.acquire()
+            retry_after = None
+            try:
+                r = session.get(url, headers=headers, timeout=self.timeout)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                self._count(type(e).__name__)
+                error = e
+                logging.warning("Request error for " + url + ": " + str(e))
+            else:
+                self._count(r.status_code)
+                if r.status_code < 400:
+                    self.bucket.speed_up()
+                    return r.text
+                if r.status_code not in RETRY_STATUSES:
+                    r.raise_for_status()
+                if r.status_code == THROTTLE_STATUS:
+                    self.bucket.slow_down()
+                    retry_after = retry_after_seconds(r)
+                error = requests.exceptions.HTTPError(f"{r.status_code} for {url}", response=r)
+                logging.warning("Http Error: " + str(error))
+
+            if attempt >= self.backoff.max_retries:
+                raise RetryError(f"Giving up on {url} after {attempt + 1} attempts: {error}")
+            with self.lock:
+                self.retries += 1
+            time.sleep(self.backoff.delay(attempt, retry_after))
+            attempt += 1
+
+    def summary(self):
+        statuses = ', '.join(f"{status}: {count}" for status, count in sorted(self.status_counts.items(), key=str))
+        return f"rate {self.bucket.rate:.1f}/s, {self.retries} retries, statuses {{{statuses}}}"
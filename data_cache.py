@@ -0,0 +1,245 @@
+# In-process cache for upstream market data.
+#
+# Every entry belongs to a data class that sets how long it stays fresh:
+# quotes for seconds, intraday bars for minutes, fundamentals and profiles
+# for hours. All entries share one memory budget; when it is exceeded the
+# least recently used entries are evicted first. Hits, misses, expirations
+# and evictions are counted per data class.
+#
+# An expiry policy can stretch an entry's lifetime past its TTL; the shared
+# cache uses market_calendar.market_expiry, so quotes and bars cached after
+# the close are kept until the next session opens.
+#
+# Functions cached with persist=True are also written to disk_cache, which
+# outlives the process; a memory miss is then served from disk if possible.
+# With REDIS_URL and CACHE_SIGNING_KEY set, every cached function also shares
+# its entries with the other processes through cache_backends, checked before
+# the disk.
+# Concurrent misses for one key are coalesced by singleflight, so only the
+# first of them loads the value.
+#
+# Usage:
+#     @cached('fundamentals')
+#     def get_valuation_measures(symbol): ...
+import functools
+import logging
+import os
+import pickle
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
+
+import pandas as pd
+
+from cache_backends import get_shared_backend
+from disk_cache import PRELOAD_ENTRIES, get_disk_cache
+from market_calendar import market_expiry
+from singleflight import SingleFlight
+
+# Seconds an entry of each data class stays fresh
+DATA_CLASS_TTLS = {
+    'quote': 15,
+    'options': 60,
+    'intraday': 5 * 60,
+    'daily': 60 * 60,
+    'fundamentals': 6 * 60 * 60,
+    'profile': 24 * 60 * 60,
+}
+
+MEMORY_BUDGET = int(os.environ.get('DATA_CACHE_MB', 256)) * 1024 * 1024
+
+_MISSING = object()
+
+
+def fixed_expiry(data_class, ttl, now, symbol=None):
+    return now + ttl
+
+
+def estimate_size(value):
+    # Approximate bytes held by a cached value
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum()) if isinstance(usage, pd.Series) else int(usage)
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return sys.getsizeof(value)
+
+
+class CacheEntry:
+    __slots__ = ('value', 'expires_at', 'size', 'data_class')
+
+    def __init__(self, value, expires_at, size, data_class):
+        self.value = value
+        self.expires_at = expires_at
+        self.size = size
+        self.data_class = data_class
+
+
+class TTLCache:
+    # Thread-safe LRU cache with per-data-class TTLs and a byte budget
+
+    def __init__(self, budget=MEMORY_BUDGET, ttls=None, clock=time.time, expiry=fixed_expiry):
+        self.budget = budget
+        self.ttls = dict(DATA_CLASS_TTLS, **(ttls or {}))
+        self.clock = clock
+        self.expiry = expiry
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = Counter()
+        self.misses = Counter()
+        self.expirations = Counter()
+        self.evictions = Counter()
+        self.lock = threading.Lock()
+        self.flight = SingleFlight()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _drop(self, key):
+        entry = self.entries.pop(key)
+        self.size -= entry.size
+        return entry
+
+    def get(self, key, data_class, default=None):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry.expires_at <= self.clock():
+                self._drop(key)
+                self.expirations[data_class] += 1
+                entry = None
+            if entry is None:
+                self.misses[data_class] += 1
+                return default
+            self.entries.move_to_end(key)
+            self.hits[data_class] += 1
+            return entry.value
+
+    def expires_at(self, data_class, ttl=None, symbol=None):
+        # When an entry of data_class stored now should expire
+        ttl = self.ttls[data_class] if ttl is None else ttl
+        return self.expiry(data_class, ttl, self.clock(), symbol)
+
+    def peek(self, key, default=None):
+        # Live value without counting a hit or miss or refreshing its recency
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry.expires_at <= self.clock():
+                return default
+            return entry.value
+
+    def set(self, key, value, data_class, ttl=None, symbol=None, expires_at=None):
+        size = estimate_size(value)
+        if size > self.budget:
+            # Would evict everything else and still not fit
+            return value
+        if expires_at is None:
+            expires_at = self.expires_at(data_class, ttl, symbol)
+        with self.lock:
+            if key in self.entries:
+                self._drop(key)
+            self.entries[key] = CacheEntry(value, expires_at, size, data_class)
+            self.size += size
+            while self.size > self.budget:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= evicted.size
+                self.evictions[evicted.data_class] += 1
+        return value
+
+    def preload(self, entries):
+        # Stores (key, value, data class, expires_at) tuples, e.g. the hot
+        # rows of the disk cache, without counting them as misses
+        for key, value, data_class, expires_at in entries:
+            self.set(key, value, data_class, expires_at=expires_at)
+        return len(entries)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def stats(self):
+        # {data class: {'hits', 'misses', 'expirations', 'evictions'}}
+        with self.lock:
+            classes = set(self.hits) | set(self.misses) | set(self.expirations) | set(self.evictions)
+            return {data_class: {
+                'hits': self.hits[data_class],
+                'misses': self.misses[data_class],
+                'expirations': self.expirations[data_class],
+                'evictions': self.evictions[data_class],
+            } for data_class in sorted(classes)}
+
+    def summary(self):
+        parts = []
+        for data_class, counts in self.stats().items():
+            lookups = counts['hits'] + counts['misses']
+            hit_rate = counts['hits'] / lookups if lookups else 0
+            parts.append(f"{data_class}: {counts['hits']}/{lookups} hits ({hit_rate:.0%}), "
+                         f"{counts['expirations']} expired, {counts['evictions']} evicted")
+        return (f"{len(self)} entries, {self.size / 1024 / 1024:.1f}/{self.budget / 1024 / 1024:.0f} MiB, "
+                f"{self.flight.shared} coalesced"
+                + ('; ' + '; '.join(parts) if parts else ''))
+
+
+# One cache per process, shared by every session like st.cache_resource
+data_cache = TTLCache(expiry=market_expiry)
+
+
+def preload_data_cache(limit=PRELOAD_ENTRIES):
+    # Loads the most read disk cache rows into the shared cache
+    disk = get_disk_cache()
+    if disk is None:
+        return 0
+    return data_cache.preload(disk.hot_entries(limit))
+
+
+def cached(data_class, cache=None, persist=False):
+    # Decorator caching a fetch function's result under its name and arguments.
+    # A leading string argument is taken as the symbol for the expiry policy.
+    # persist=True also keeps results in the disk cache; only use it for
+    # picklable values that stay valid across deploys of the same schema.
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            target = cache if cache is not None else data_cache
+            shared = get_shared_backend()
+            disk = get_disk_cache() if persist else None
+            key = (func.__module__, func.__qualname__, args, tuple(sorted(kwargs.items())))
+            value = target.get(key, data_class, _MISSING)
+            if value is not _MISSING:
+                if disk is not None:
+                    disk.record_hit(key)
+                return value
+
+            def load():
+                # A flight that finished between the lookup above and joining
+                # this one has already stored the value
+                value = target.peek(key, _MISSING)
+                if value is not _MISSING:
+                    return value
+                stored = shared.get(key) if shared is not None else None
+                if stored is not None:
+                    value, _, expires_at = stored
+                    return target.set(key, value, data_class, expires_at=expires_at)
+                stored = disk.get(key) if disk is not None else None
+                if stored is not None:
+                    value, expires_at = stored
+                    if shared is not None:
+                        shared.set(key, value, data_class, expires_at)
+                    return target.set(key, value, data_class, expires_at=expires_at)
+
+                symbol = args[0] if args and isinstance(args[0], str) else None
+                expires_at = target.expires_at(data_class, symbol=symbol)
+                value = target.set(key, func(*args, **kwargs), data_class, expires_at=expires_at)
+                if shared is not None:
+                    shared.set(key, value, data_class, expires_at)
+                if disk is not None:
+                    disk.set(key, value, data_class, expires_at)
+                logging.debug('Cache miss for %s%r', func.__qualname__, args)
+                return value
+
+            # Concurrent misses for the same key wait for one load
+            return target.flight.do(key, load)
+        return wrapper
+    return decorator
@@ -0,0 +1,119 @@
+# One upstream request per symbol for the quoteSummary modules the page needs.
+#
+# The tab utils used to build a fresh yahooquery.Ticker for every value they
+# show, so one fund page asked for fundPerformance and fundProfile twice each.
+# fetch_symbol_modules asks for all of them in a single Ticker.get_modules
+# call, and the views below hand each tab only the modules it reads.
+#
+# Quote figures come from one yfinance info request per symbol in the same
+# way: QuoteSnapshot holds it, and the header, the tabs and the option chain
+# all read their price, previous close and bid/ask from it. Both requests go
+# through the market_data provider.
+from dataclasses import dataclass
+
+from market_data import get_provider
+
+# quoteSummary modules read by each tab
+SUMMARY_MODULES = ['fundPerformance', 'fundProfile']
+HOLDINGS_MODULES = ['topHoldings']
+ANALYSIS_MODULES = ['earningsTrend']
+PAGE_MODULES = SUMMARY_MODULES + HOLDINGS_MODULES + ANALYSIS_MODULES
+
+
+def _module(modules, name):
+    # Module data, or None if Yahoo has no such module for the symbol
+    data = modules.get(name)
+    return data if isinstance(data, dict) else None
+
+
+@dataclass(frozen=True)
+class SummaryView:
+    fund_performance: dict | None
+    fund_profile: dict | None
+
+
+@dataclass(frozen=True)
+class FundHoldingsSnapshot:
+    # The topHoldings module, read by every getter in holdings_tab_utils
+    top_holdings: dict | None
+
+    @property
+    def available(self):
+        return self.top_holdings is not None
+
+    @property
+    def bond_holdings(self):
+        # What yahooquery's fund_bond_holdings returns
+        if self.top_holdings is None:
+            return None
+        return _module(self.top_holdings, 'bondHoldings')
+
+
+@dataclass(frozen=True)
+class AnalysisView:
+    earnings_trend: dict | None
+
+
+@dataclass(frozen=True)
+class SymbolModules:
+    # Raw {module name: data} for one symbol, split into per-tab views
+    symbol: str
+    modules: dict
+
+    def summary(self):
+        return SummaryView(_module(self.modules, 'fundPerformance'), _module(self.modules, 'fundProfile'))
+
+    def holdings(self):
+        return FundHoldingsSnapshot(_module(self.modules, 'topHoldings'))
+
+    def analysis(self):
+        return AnalysisView(_module(self.modules, 'earningsTrend'))
+
+
+def _price(value):
+    # Yahoo reports a missing bid/ask as 0 outside market hours
+    return value if isinstance(value, (int, float)) and value > 0 else None
+
+
+@dataclass(frozen=True)
+class QuoteSnapshot:
+    # yfinance's info dict for one symbol, fetched once per refresh
+    symbol: str
+    info: dict
+
+    @property
+    def short_name(self):
+        return self.info.get('shortName', '')
+
+    @property
+    def quote_type(self):
+        return self.info.get('quoteType')
+
+    @property
+    def exchange(self):
+        return self.info.get('exchange')
+
+    @property
+    def bid(self):
+        return _price(self.info.get('bid'))
+
+    @property
+    def ask(self):
+        return _price(self.info.get('ask'))
+
+    @property
+    def previous_close(self):
+        return self.info.get('regularMarketPreviousClose', self.info.get('previousClose', 'N/A'))
+
+    @property
+    def price(self):
+        # The ask, or the previous close when there is no ask
+        return self.ask if self.ask is not None else self.previous_close
+
+
+def fetch_quote_snapshot(symbol):
+    return QuoteSnapshot(symbol, get_provider().quote(symbol))
+
+
+def fetch_symbol_modules(symbol, modules=PAGE_MODULES):
+    return SymbolModules(symbol, get_provider().modules(symbol, modules))
@@ -0,0 +1,175 @@
+# SQLite store behind data_cache for slow-changing per-symbol data, so a
+# restarted process does not refetch every symbol's fundamentals.
+#
+# Rows are keyed by the cache key and the schema version of the values: bump
+# SCHEMA_VERSION whenever a cached function starts returning a different
+# shape (a new data_gateway view, renamed columns...), and rows written by
+# the old code are dropped instead of being handed to the new one. Each row
+# keeps its expiry time and how often it was read, and the most read live
+# rows are loaded into memory when the process starts. Hits served from
+# memory are only counted in memory and written with the next fill, so the
+# read path never waits on SQLite.
+#
+# The directory comes from DISK_CACHE_DIR. On Heroku the dyno filesystem is
+# reset by every restart, so point it at storage that outlives the dyno.
+import atexit
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+DISK_CACHE_DIR = os.environ.get('DISK_CACHE_DIR',
+                                os.path.join(os.path.dirname(os.path.abspath(__file__)), 'disk_cache'))
+DISK_CACHE_FILE = 'data_cache.sqlite3'
+SCHEMA_VERSION = 1
+
+# Rows loaded into memory at boot
+PRELOAD_ENTRIES = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT NOT NULL,
+    schema INTEGER NOT NULL,
+    memory_key BLOB NOT NULL,
+    data_class TEXT NOT NULL,
+    value BLOB NOT NULL,
+    created_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0,
+    last_hit REAL,
+    PRIMARY KEY (key, schema)
+)
+"""
+
+
+def disk_key(memory_key):
+    # Stable text form of a data_cache key (module, qualname, args, kwargs)
+    return repr(memory_key)
+
+
+class DiskCache:
+    # One SQLite file shared by every thread of the process
+
+    def __init__(self, directory=DISK_CACHE_DIR, schema=SCHEMA_VERSION, clock=time.time):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, DISK_CACHE_FILE)
+        self.schema = schema
+        self.clock = clock
+        self.lock = threading.Lock()
+        # {memory key: [hits, last hit]} not yet written to the rows
+        self.pending_hits = {}
+        self.pending_lock = threading.Lock()
+        self.connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.execute(_SCHEMA)
+        self.purge()
+
+    def purge(self):
+        # Drop expired rows and rows written under another schema version
+        with self.lock:
+            self.connection.execute('DELETE FROM entries WHERE schema != ? OR expires_at <= ?',
+                                    (self.schema, self.clock()))
+
+    def get(self, memory_key):
+        # (value, expires_at) of a live row, or None; counts the hit
+        key = disk_key(memory_key)
+        now = self.clock()
+        with self.lock:
+            row = self.connection.execute(
+                'SELECT value, expires_at FROM entries WHERE key = ? AND schema = ? AND expires_at > ?',
+                (key, self.schema, now)).fetchone()
+            if row is None:
+                return None
+            self.connection.execute('UPDATE entries SET hits = hits + 1, last_hit = ? WHERE key = ? AND schema = ?',
+                                    (now, key, self.schema))
+        return pickle.loads(row[0]), row[1]
+
+    def record_hit(self, memory_key):
+        # Counts a hit served from memory, so preloading sees real usage. The
+        # count is kept in memory until flush_hits.
+        now = self.clock()
+        with self.pending_lock:
+            pending = self.pending_hits.get(memory_key)
+            if pending is None:
+                self.pending_hits[memory_key] = [1, now]
+            else:
+                pending[0] += 1
+                pending[1] = now
+
+    def flush_hits(self):
+        # Writes the hits counted by record_hit in one statement
+        with self.pending_lock:
+            pending, self.pending_hits = self.pending_hits, {}
+        if not pending:
+            return
+        rows = [(hits, last_hit, disk_key(memory_key), self.schema)
+                for memory_key, (hits, last_hit) in pending.items()]
+        with self.lock:
+            self.connection.executemany(
+                'UPDATE entries SET hits = hits + ?, last_hit = MAX(COALESCE(last_hit, 0), ?) '
+                'WHERE key = ? AND schema = ?', rows)
+
+    def set(self, memory_key, value, data_class, expires_at):
+        self.flush_hits()
+        row = (disk_key(memory_key), self.schema, pickle.dumps(memory_key), data_class,
+               pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), self.clock(), expires_at)
+        with self.lock:
+            # A refreshed row keeps the hits of the one it replaces
+            self.connection.execute(
+                'INSERT INTO entries (key, schema, memory_key, data_class, value, created_at, expires_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT (key, schema) DO UPDATE SET value = excluded.value, '
+                'created_at = excluded.created_at, expires_at = excluded.expires_at', row)
+
+    def hot_entries(self, limit=PRELOAD_ENTRIES):
+        # (memory key, value, data class, expires_at) of the most read live rows
+        self.flush_hits()
+        with self.lock:
+            rows = self.connection.execute(
+                'SELECT memory_key, value, data_class, expires_at FROM entries '
+                'WHERE schema = ? AND expires_at > ? ORDER BY hits DESC, last_hit DESC LIMIT ?',
+                (self.schema, self.clock(), limit)).fetchall()
+        entries = []
+        for memory_key, value, data_class, expires_at in rows:
+            try:
+                entries.append((pickle.loads(memory_key), pickle.loads(value), data_class, expires_at))
+            except Exception as e:
+                logging.warning(f"Skipping unreadable disk cache row: {e}")
+        return entries
+
+    def entries(self, data_class):
+        # (memory key, value, expires_at) of every live row of a data class
+        with self.lock:
+            rows = self.connection.execute(
+                'SELECT memory_key, value, expires_at FROM entries '
+                'WHERE schema = ? AND data_class = ? AND expires_at > ?',
+                (self.schema, data_class, self.clock())).fetchall()
+        return [(pickle.loads(memory_key), pickle.loads(value), expires_at) for memory_key, value, expires_at in rows]
+
+    def __len__(self):
+        with self.lock:
+            return self.connection.execute('SELECT COUNT(*) FROM entries WHERE schema = ?',
+                                           (self.schema,)).fetchone()[0]
+
+
+_disk_cache = None
+_disk_cache_lock = threading.Lock()
+_disk_cache_failed = False
+
+
+def get_disk_cache():
+    # One store per process, or None if the directory cannot be used; the
+    # app then runs on the in-memory cache alone
+    global _disk_cache, _disk_cache_failed
+    with _disk_cache_lock:
+        if _disk_cache is None and not _disk_cache_failed:
+            try:
+                _disk_cache = DiskCache()
+                atexit.register(_disk_cache.flush_hits)
+            except (OSError, sqlite3.Error) as e:
+                _disk_cache_failed = True
+                logging.warning(f"Disk cache disabled: {e}")
+        return _disk_cache
@@ -1,28 +1,9 @@
-import yfinance as yf
 import streamlit as st
+from market_data import get_provider
 
 def get_financials_data(symbol, statement_type='income', period='annual'):
-    stock = yf.Ticker(symbol)
-    
-    if statement_type == 'income':
-        if period == 'annual':
-            data = stock.income_stmt
-        elif period == 'quarterly':
-            data = stock.quarterly_income_stmt
-    elif statement_type == 'balance':
-        if period == 'annual':
-            data = stock.balance_sheet
-        elif period == 'quarterly':
-            data = stock.quarterly_balance_sheet
-    elif statement_type == 'cashflow':
-        if period == 'annual':
-            data = stock.cashflow
-        elif period == 'quarterly':
-            data = stock.quarterly_cashflow
-    else:
-        raise ValueError("Invalid statement_type. Use 'income', 'balance', or 'cashflow'")
-    
-    return data
+    # Raises ValueError for an unknown statement_type or period
+    return get_provider().statement(symbol, statement_type, period)
 
 def display_financials_data(data):
     # Display financials data in a DataFrame
@@ -1,21 +1,30 @@
 # historical_data_utils.py
-import yfinance as yf
 import pandas as pd
 import streamlit as st
 
-def get_historical_data(symbol, start_date=None, end_date=None, period=None):
-    stock = yf.Ticker(symbol)
+from bar_store import get_bar_store
+
+ACTION_COLUMNS = ['Dividends', 'Stock Splits']
+
+# Daily bars come from the local bar store, which only downloads the bars
+# after the last one it has
+def get_historical_data(symbol, start_date=None, end_date=None, period=None, actions=True):
+    store = get_bar_store()
 
     if start_date and end_date:
-        historical_data = stock.history(start=start_date, end=end_date, actions=True)
+        historical_data = store.read(symbol, '1d', start=start_date, end=end_date)
     elif period:
-        historical_data = stock.history(period=period, actions=True)
+        historical_data = store.read_period(symbol, '1d', period)
     else:
-        historical_data = stock.history(period="1y", actions=True)  # Default to 1 year if no start_date, end_date, or period provided
+        historical_data = store.read_period(symbol, '1d', "1y")  # Default to 1 year if no start_date, end_date, or period provided
 
+    if not actions:
+        historical_data = historical_data.drop(columns=ACTION_COLUMNS, errors='ignore')
     return historical_data
 
-def display_historical_data(symbol, historical_data):
+# Only the bars for the selected period or range are read, through loader
+# (StockQuote passes a cached one)
+def display_historical_data(symbol, loader=get_historical_data):
     # Add an option to select time period
     time_period_options = ["1D", "5D", "1M", "3M", "6M", "YTD", "1Y", "5Y", "Max", "Custom"]
     selected_time_period = st.selectbox("Select Time Period", time_period_options, index=time_period_options.index("1M"))
@@ -29,7 +38,7 @@ def display_historical_data(symbol, historical_data):
             st.error("End date must be after start date. Please select valid dates.")
             return
 
-        historical_data = get_historical_data(symbol, start_date=start_date, end_date=end_date)
+        historical_data = loader(symbol, start_date=start_date, end_date=end_date)
     else:
         # Convert time period to corresponding yfinance period string
         if selected_time_period == "1D":
@@ -52,7 +61,7 @@ def display_historical_data(symbol, historical_data):
             period = "max"
 
         # Fetch historical data based on the selected time period
-        historical_data = get_historical_data(symbol, period=period)
+        historical_data = loader(symbol, period=period)
 
     # Add an option to select frequency
     frequency_options = ["Daily", "Weekly", "Monthly"]
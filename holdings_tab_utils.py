@@ -1,10 +1,11 @@
-from yahooquery import Ticker
 import streamlit as st
 import pandas as pd
 
-def get_position_weightings(symbol):
-    fund = Ticker(symbol)
-    fund_info = fund.fund_holding_info[symbol]
+# The getters below all read one data_gateway.FundHoldingsSnapshot, the
+# topHoldings module fetched once per symbol
+
+def get_position_weightings(snapshot):
+    fund_info = snapshot.top_holdings
 
     # Check if fund_info is a dictionary
     if not isinstance(fund_info, dict):
@@ -58,9 +59,8 @@ def display_position_info(position_weightings):
             unsafe_allow_html=True
         )
 
-def get_sector_weightings(symbol):
-    fund = Ticker(symbol)
-    fund_info = fund.fund_holding_info[symbol]
+def get_sector_weightings(snapshot):
+    fund_info = snapshot.top_holdings
 
     # Check if fund_info is a dictionary
     if not isinstance(fund_info, dict):
@@ -112,9 +112,8 @@ def display_sector_info(sector_weightings):
             unsafe_allow_html=True
         )
 
-def get_equity_weightings(symbol):
-    fund = Ticker(symbol)
-    fund_info = fund.fund_holding_info[symbol]
+def get_equity_weightings(snapshot):
+    fund_info = snapshot.top_holdings
 
     # Check if fund_info is a dictionary
     if not isinstance(fund_info, dict):
@@ -171,15 +170,14 @@ def display_equity_info(equity_weightings):
             unsafe_allow_html=True
         )
 
-def get_bond_holdings_data(ticker):
+def get_bond_holdings_data(snapshot):
     try:
-        fund = Ticker(ticker)
-        bond_holdings = fund.fund_bond_holdings
+        bond_holdings = snapshot.bond_holdings
 
-        maturity = bond_holdings[ticker]['maturity']
-        duration = bond_holdings[ticker]['duration']
-        maturity_cat = bond_holdings[ticker]['maturityCat']
-        duration_cat = bond_holdings[ticker]['durationCat']
+        maturity = bond_holdings['maturity']
+        duration = bond_holdings['duration']
+        maturity_cat = bond_holdings['maturityCat']
+        duration_cat = bond_holdings['durationCat']
 
         return {
             "maturity": maturity,
@@ -224,13 +222,12 @@ def display_bond_holdings_data(bond_holdings_data):
 
     st.markdown("""<hr style="height:2px; margin-top: 10px; margin-bottom: 10px; border:none;color:#333;background-color:#333;" /> """, unsafe_allow_html=True)
 
-def get_bond_ratings(symbol):
-    fund = Ticker(symbol)
-    fund_holding_info = fund.fund_holding_info
+def get_bond_ratings(snapshot):
+    fund_holding_info = snapshot.top_holdings
 
-    # Check if symbol is in fund_holding_info and if 'bondRatings' key is present
-    if symbol in fund_holding_info and 'bondRatings' in fund_holding_info[symbol]:
-        bond_ratings = fund_holding_info[symbol]['bondRatings']
+    # Check if there is holdings data and if 'bondRatings' key is present
+    if fund_holding_info is not None and 'bondRatings' in fund_holding_info:
+        bond_ratings = fund_holding_info['bondRatings']
         return bond_ratings
     else:
         return []
@@ -274,20 +271,14 @@ def display_bond_ratings(bond_ratings):
     else:
         st.warning("No Bond Ratings data available.")
 
-def get_fund_holding_info(symbol):
-    # Use Yahooquery or any other suitable method to retrieve fund holding information
-    fund = Ticker(symbol)
-    holding_info = fund.fund_holding_info
+# Pure data access; the caller warns when the snapshot has no data at all
+def get_fund_holding_info(snapshot):
+    holding_info = snapshot.top_holdings
 
-    # Check if the symbol is present in the holding_info dictionary
-    if symbol in holding_info:
-        # Check if 'holdings' key is present in the dictionary for the given symbol
-        if 'holdings' in holding_info[symbol]:
-            return holding_info[symbol]['holdings']
-        else:
-            return None
+    # Check if 'holdings' key is present in the dictionary for the given symbol
+    if holding_info is not None and 'holdings' in holding_info:
+        return holding_info['holdings']
     else:
-        st.warning(f"No information available for {symbol}.")
         return None
 
 def display_fund_holding_info(fund_holding_info):
@@ -0,0 +1,116 @@
+# Which symbols have intraday bars, learned from the bars the app fetches.
+#
+# The Summary tab only offers its 1d/5d/1mo intraday views for symbols that
+# trade intraday. It used to find out by downloading a day of 1m bars on
+# every render. The registry answers from memory instead:
+#   1. what the symbol's own intraday bars showed (MIN_INTRADAY_BARS or
+#      more), recorded whenever the Summary tab charts intraday bars;
+#   2. otherwise what most recorded symbols of the same quote type and
+#      exchange showed;
+#   3. otherwise the quote type alone: mutual funds only publish a daily NAV.
+# A wrong guess corrects itself: the first intraday download for the symbol
+# records what it really has.
+#
+# A session that has just opened has only a few bars, so a short view of a
+# single session never counts against the symbol; only a view without any
+# bars, or one spanning several sessions, records that it has none. Those
+# records expire after NO_INTRADAY_TTL, so a wrong one hides the intraday
+# periods for an hour at most.
+#
+# Records are written to the disk cache with a week's TTL (an hour for
+# symbols without intraday bars) and loaded back when the registry is first
+# used.
+import threading
+import time
+from collections import Counter
+
+from disk_cache import get_disk_cache
+
+MIN_INTRADAY_BARS = 5
+CAPABILITY_TTL = 7 * 24 * 60 * 60
+NO_INTRADAY_TTL = 60 * 60
+CAPABILITY_CLASS = 'capability'
+
+# Quote types without intraday bars; everything else is assumed to have them
+DAILY_ONLY_QUOTE_TYPES = {'MUTUALFUND'}
+
+
+def is_intraday_interval(interval):
+    return interval.endswith(('m', 'h')) and interval != '1mo'
+
+
+def _record_key(symbol):
+    return ('intraday_registry', symbol)
+
+
+class IntradayRegistry:
+
+    def __init__(self, disk=None, clock=time.time, ttl=CAPABILITY_TTL, negative_ttl=NO_INTRADAY_TTL):
+        self.disk = disk
+        self.clock = clock
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        # symbol: (has intraday bars, quote type, exchange, expires_at)
+        self.symbols = {}
+        # (quote type, exchange): Counter of has-intraday answers
+        self.groups = {}
+        self.lock = threading.Lock()
+        self.loaded = False
+
+    def _load(self):
+        # Reads the persisted records once, on first use
+        if self.loaded:
+            return
+        self.loaded = True
+        disk = self.disk if self.disk is not None else get_disk_cache()
+        self.disk = disk
+        if disk is None:
+            return
+        for key, (has_intraday, quote_type, exchange), expires_at in disk.entries(CAPABILITY_CLASS):
+            self._remember(key[1], has_intraday, quote_type, exchange, expires_at)
+
+    def _remember(self, symbol, has_intraday, quote_type, exchange, expires_at):
+        previous = self.symbols.get(symbol)
+        if previous is not None:
+            self.groups[previous[1:3]][previous[0]] -= 1
+        self.symbols[symbol] = (has_intraday, quote_type, exchange, expires_at)
+        self.groups.setdefault((quote_type, exchange), Counter())[has_intraday] += 1
+
+    def record(self, symbol, has_intraday, quote_type=None, exchange=None):
+        now = self.clock()
+        ttl = self.ttl if has_intraday else self.negative_ttl
+        expires_at = now + ttl
+        with self.lock:
+            self._load()
+            known = self.symbols.get(symbol)
+            if known is not None and known[:3] == (has_intraday, quote_type, exchange) \
+                    and known[3] - now > ttl / 2:
+                # Nothing new; rewritten only once the record is half expired
+                return
+            self._remember(symbol, has_intraday, quote_type, exchange, expires_at)
+            disk = self.disk
+        if disk is not None:
+            disk.set(_record_key(symbol), (has_intraday, quote_type, exchange), CAPABILITY_CLASS, expires_at)
+
+    def record_bars(self, symbol, interval, bars, quote_type=None, exchange=None):
+        # Learns from intraday bars the app downloaded anyway
+        if not is_intraday_interval(interval):
+            return
+        if len(bars) >= MIN_INTRADAY_BARS:
+            self.record(symbol, True, quote_type, exchange)
+        elif bars.empty or bars.index.normalize().nunique() > 1:
+            self.record(symbol, False, quote_type, exchange)
+
+    def has_intraday(self, symbol, quote_type=None, exchange=None):
+        with self.lock:
+            self._load()
+            known = self.symbols.get(symbol)
+            if known is not None and known[3] > self.clock():
+                return known[0]
+            answers = self.groups.get((quote_type, exchange))
+            if answers and answers[True] != answers[False]:
+                return answers[True] > answers[False]
+        return quote_type not in DAILY_ONLY_QUOTE_TYPES
+
+
+intraday_registry = IntradayRegistry()
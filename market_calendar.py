@@ -0,0 +1,175 @@
+# US equity market calendar and the cache expiry policy built on it.
+#
+# NYSE and Nasdaq share one calendar: regular sessions run 9:30-16:00
+# America/New_York on weekdays, except full-day holidays and the early
+# (13:00) closes around Independence Day, Thanksgiving and Christmas.
+# Holidays falling on a Saturday are observed the Friday before and those on
+# a Sunday the Monday after, except New Year's Day, which is not moved back
+# into the previous year.
+#
+# Quotes, bars and option chains of a US-listed symbol cannot change between
+# one session's close and the next one's open, so market_expiry keeps them
+# cached until that open instead of refetching them every few seconds.
+# Currencies, futures and crypto trade around the clock, and other markets
+# (MSFT.MX, 7203.T, ^N225) keep hours this calendar does not know: all of
+# them keep their TTLs.
+#
+# Usage: python market_calendar.py [year]   (lists the year's holidays and early closes)
+import datetime
+import functools
+import re
+import sys
+from zoneinfo import ZoneInfo
+
+EASTERN = ZoneInfo('America/New_York')
+REGULAR_OPEN = datetime.time(9, 30)
+REGULAR_CLOSE = datetime.time(16, 0)
+EARLY_CLOSE = datetime.time(13, 0)
+
+# Yahoo keeps amending the last bars and quote for a while after the close
+SETTLE_DELAY = datetime.timedelta(minutes=15)
+
+# Data classes that only change while the market is open
+MARKET_HOURS_CLASSES = {'quote', 'intraday', 'daily', 'options'}
+
+# Currencies (EURUSD=X), futures (ES=F) and crypto pairs (BTC-USD)
+CONTINUOUS_SYMBOL = re.compile(r'.*=[XF]$|^[A-Z0-9]+-(USD|USDT|EUR|GBP|JPY|BTC|ETH)$')
+
+# Indices calculated during US sessions; other indices (^N225, ^FTSE) follow
+# their own market's hours
+US_INDICES = {'^GSPC', '^DJI', '^DJT', '^DJU', '^IXIC', '^NDX', '^NYA', '^XAX', '^RUT', '^OEX', '^SOX',
+              '^SP400', '^SP600', '^VIX'}
+
+
+def easter(year):
+    # Gregorian Easter Sunday (anonymous Gregorian algorithm)
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return datetime.date(year, month, day + 1)
+
+
+def _nth_weekday(year, month, weekday, n):
+    # n-th (1-based) given weekday of a month, or the last one for n=-1
+    if n > 0:
+        first = datetime.date(year, month, 1)
+        return first + datetime.timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = datetime.date(year + month // 12, month % 12 + 1, 1) - datetime.timedelta(days=1)
+    return last - datetime.timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _observed(day):
+    if day.weekday() == 5:
+        return day - datetime.timedelta(days=1)
+    if day.weekday() == 6:
+        return day + datetime.timedelta(days=1)
+    return day
+
+
+@functools.lru_cache(maxsize=None)
+def holidays(year):
+    # {date: name} of the full-day market holidays in a year
+    days = {}
+    new_year = datetime.date(year, 1, 1)
+    if new_year.weekday() != 5:
+        days[_observed(new_year)] = "New Year's Day"
+    days[_nth_weekday(year, 1, 0, 3)] = 'Martin Luther King Jr. Day'
+    days[_nth_weekday(year, 2, 0, 3)] = "Washington's Birthday"
+    days[easter(year) - datetime.timedelta(days=2)] = 'Good Friday'
+    days[_nth_weekday(year, 5, 0, -1)] = 'Memorial Day'
+    if year >= 2022:
+        days[_observed(datetime.date(year, 6, 19))] = 'Juneteenth'
+    days[_observed(datetime.date(year, 7, 4))] = 'Independence Day'
+    days[_nth_weekday(year, 9, 0, 1)] = 'Labor Day'
+    days[_nth_weekday(year, 11, 3, 4)] = 'Thanksgiving Day'
+    days[_observed(datetime.date(year, 12, 25))] = 'Christmas Day'
+    return days
+
+
+def is_trading_day(day):
+    return day.weekday() < 5 and day not in holidays(day.year)
+
+
+@functools.lru_cache(maxsize=None)
+def early_closes(year):
+    # {date: name} of the sessions closing at 13:00
+    candidates = {
+        datetime.date(year, 7, 3): 'Independence Day Eve',
+        _nth_weekday(year, 11, 3, 4) + datetime.timedelta(days=1): 'Day after Thanksgiving',
+        datetime.date(year, 12, 24): 'Christmas Eve',
+    }
+    return {day: name for day, name in candidates.items() if is_trading_day(day)}
+
+
+def session(day):
+    # (open, close) of a day's regular session in Eastern time, or None
+    if not is_trading_day(day):
+        return None
+    close = EARLY_CLOSE if day in early_closes(day.year) else REGULAR_CLOSE
+    return (datetime.datetime.combine(day, REGULAR_OPEN, EASTERN),
+            datetime.datetime.combine(day, close, EASTERN))
+
+
+def is_open(moment):
+    hours = session(moment.astimezone(EASTERN).date())
+    return hours is not None and hours[0] <= moment < hours[1]
+
+
+def next_open(moment):
+    # Open of the first session starting after moment
+    day = moment.astimezone(EASTERN).date()
+    while True:
+        hours = session(day)
+        if hours is not None and hours[0] > moment:
+            return hours[0]
+        day += datetime.timedelta(days=1)
+
+
+def is_us_listing(symbol):
+    # Yahoo marks other exchanges with a suffix (MSFT.MX, 7203.T) and writes
+    # US share classes with a dash (BRK-B)
+    symbol = symbol.upper()
+    if symbol.startswith('^'):
+        return symbol in US_INDICES
+    return '.' not in symbol and not CONTINUOUS_SYMBOL.match(symbol)
+
+
+def next_change(moment, symbol=None):
+    # Earliest moment a symbol's market data can differ from what it is at
+    # moment: moment itself while its market is open or settling, and always
+    # for symbols not traded on this calendar (or not known)
+    if symbol is None or not is_us_listing(symbol):
+        return moment
+    hours = session(moment.astimezone(EASTERN).date())
+    if hours is not None and hours[0] <= moment < hours[1] + SETTLE_DELAY:
+        return moment
+    return next_open(moment)
+
+
+def market_expiry(data_class, ttl, now, symbol=None):
+    # Expiry policy for data_cache: an entry lives for its TTL, or for a US
+    # listing until the next open if the data cannot change before then
+    expires_at = now + ttl
+    if data_class not in MARKET_HOURS_CLASSES:
+        return expires_at
+    moment = datetime.datetime.fromtimestamp(now, datetime.timezone.utc)
+    return max(expires_at, next_change(moment, symbol).timestamp())
+
+
+def main():
+    year = int(sys.argv[1]) if len(sys.argv) > 1 else datetime.date.today().year
+    closed = [(day, name, 'closed') for day, name in holidays(year).items()]
+    early = [(day, name, f"closes {EARLY_CLOSE:%H:%M}") for day, name in early_closes(year).items()]
+    for day, name, hours in sorted(closed + early):
+        print(f"{day:%a %Y-%m-%d}  {hours:<12} {name}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,402 @@
+# One interface for every upstream market-data call the app makes.
+#
+# The tab utils, data_gateway and bar_store ask get_provider() for quotes,
+# bars, quoteSummary modules, valuation measures, statements and options
+# instead of building yfinance or yahooquery objects themselves, so caching,
+# batching, metrics and offline runs are handled in this one layer.
+#
+# Backends:
+#   YFinanceProvider     yfinance: every method; modules and valuation
+#                        measures converted to the shapes YahooQueryProvider
+#                        returns
+#   YahooQueryProvider   yahooquery: every method; history, statements and
+#                        options converted to the shapes YFinanceProvider
+#                        returns
+#   RoutedProvider       each method from the backend the app has always
+#                        used for it (the default)
+#   FixtureProvider      replays responses recorded by RecordingProvider
+#                        from a directory, for tests and offline benchmarks
+#
+# YFinanceProvider.modules relies on yfinance's private YfData session, and
+# valuation_measures on Ticker.get_valuation_measures, which older releases
+# lack; with a yfinance missing either they raise ProviderError saying so.
+#
+# MARKET_DATA_PROVIDER selects the backend: 'default', 'yfinance',
+# 'yahooquery', 'record' (default backend, saving every response to
+# MARKET_DATA_FIXTURES) or 'fixtures' (replay only). Every provider is
+# wrapped in an InstrumentedProvider counting calls, errors and time per
+# method.
+import collections
+import hashlib
+import logging
+import os
+import pickle
+import threading
+import time
+
+import pandas as pd
+import yfinance as yf
+from yahooquery import Ticker
+
+try:
+    # Not public API: the session holding the cookie and crumb Yahoo requires
+    from yfinance.data import YfData
+except ImportError:
+    YfData = None
+
+FIXTURE_DIR = os.environ.get('MARKET_DATA_FIXTURES',
+                             os.path.join(os.path.dirname(os.path.abspath(__file__)), 'market_data_fixtures'))
+
+# The interface; what each method returns is commented on MarketDataProvider
+PROVIDER_METHODS = ['quote', 'history', 'modules', 'valuation_measures', 'statement',
+                    'option_expirations', 'option_chain']
+
+STATEMENT_TYPES = ['income', 'balance', 'cashflow']
+
+QUOTE_SUMMARY_URL = 'https://query2.finance.yahoo.com/v10/finance/quoteSummary'
+
+# yfinance's valuation measure labels and yahooquery's column names
+VALUATION_COLUMNS = {
+    'Market Cap': 'MarketCap',
+    'Enterprise Value': 'EnterpriseValue',
+    'Trailing P/E': 'PeRatio',
+    'Forward P/E': 'ForwardPeRatio',
+    'PEG Ratio (5yr expected)': 'PegRatio',
+    'Price/Sales': 'PsRatio',
+    'Price/Book': 'PbRatio',
+    'Enterprise Value/Revenue': 'EnterprisesValueRevenueRatio',
+    'Enterprise Value/EBITDA': 'EnterprisesValueEBITDARatio',
+}
+
+
+class MarketDataProvider:
+
+    def quote(self, symbol):
+        # yfinance-style info dict: shortName, regularMarketPreviousClose,
+        # bid, ask, quoteType, exchange, ...
+        raise NotImplementedError
+
+    def history(self, symbol, interval='1d', period=None, start=None):
+        # OHLCV bars with Dividends and Stock Splits columns, split and
+        # dividend adjusted, indexed by timestamp
+        raise NotImplementedError
+
+    def modules(self, symbol, modules):
+        # {module name: data} for the quoteSummary modules Yahoo has
+        raise NotImplementedError
+
+    def valuation_measures(self, symbol):
+        # One row per asOfDate, or a non-DataFrame when there is none
+        raise NotImplementedError
+
+    def statement(self, symbol, statement_type='income', period='annual'):
+        # Line items as rows, one column per fiscal period, newest first
+        raise NotImplementedError
+
+    def option_expirations(self, symbol):
+        # Expiration dates as 'YYYY-MM-DD' strings, nearest first
+        raise NotImplementedError
+
+    def option_chain(self, symbol, expiration):
+        # (calls, puts) DataFrames with lastPrice, change, percentChange,
+        # volume, openInterest and strike columns
+        raise NotImplementedError
+
+
+class ProviderError(Exception):
+    # The backend cannot make a call with the installed libraries
+    pass
+
+
+def _check_statement(statement_type, period):
+    if statement_type not in STATEMENT_TYPES:
+        raise ValueError("Invalid statement_type. Use 'income', 'balance', or 'cashflow'")
+    if period not in ('annual', 'quarterly'):
+        raise ValueError("Invalid period. Use 'annual' or 'quarterly'")
+
+
+class YFinanceProvider(MarketDataProvider):
+
+    STATEMENT_ATTRIBUTES = {
+        ('income', 'annual'): 'income_stmt',
+        ('income', 'quarterly'): 'quarterly_income_stmt',
+        ('balance', 'annual'): 'balance_sheet',
+        ('balance', 'quarterly'): 'quarterly_balance_sheet',
+        ('cashflow', 'annual'): 'cashflow',
+        ('cashflow', 'quarterly'): 'quarterly_cashflow',
+    }
+
+    def quote(self, symbol):
+        return yf.Ticker(symbol).info
+
+    def history(self, symbol, interval='1d', period=None, start=None):
+        if start is not None:
+            return yf.Ticker(symbol).history(interval=interval, start=start, actions=True)
+        return yf.Ticker(symbol).history(interval=interval, period=period or '1mo', actions=True)
+
+    def modules(self, symbol, modules):
+        # yf.Ticker only asks for a fixed set of modules (no fundPerformance
+        # or topHoldings), so ask quoteSummary directly through yfinance's
+        # session, which holds the cookie and crumb Yahoo requires
+        if YfData is None:
+            raise ProviderError('yfinance.data.YfData is missing from this yfinance; '
+                                "use MARKET_DATA_PROVIDER=default for quoteSummary modules")
+        params = {'modules': ','.join(modules), 'formatted': 'false', 'symbol': symbol,
+                  'corsDomain': 'finance.yahoo.com'}
+        try:
+            response = YfData().get(f"{QUOTE_SUMMARY_URL}/{symbol}", params=params)
+        except TypeError as e:
+            raise ProviderError(f"yfinance's YfData.get has changed: {e}") from e
+        if response.status_code == 404:
+            # Unknown symbol
+            return {}
+        response.raise_for_status()
+        results = (response.json().get('quoteSummary') or {}).get('result') or []
+        return results[0] if results else {}
+
+    def valuation_measures(self, symbol):
+        # Measures as rows and 'Current' plus dates as columns: turn it the
+        # way yahooquery has it, one row per asOfDate
+        ticker = yf.Ticker(symbol)
+        if not hasattr(ticker, 'get_valuation_measures'):
+            raise ProviderError('Ticker.get_valuation_measures is missing from this yfinance; '
+                                "use MARKET_DATA_PROVIDER=default for valuation measures")
+        data = ticker.get_valuation_measures(periods=None)
+        if not isinstance(data, pd.DataFrame) or data.empty:
+            return None
+        data = data.rename(index=VALUATION_COLUMNS).T
+        current = data.index == 'Current'
+        as_of = [pd.Timestamp.now().normalize() if label == 'Current' else pd.to_datetime(label, format='%m/%d/%Y')
+                 for label in data.index]
+        data.insert(0, 'periodType', ['TTM' if is_current else '3M' for is_current in current])
+        data.insert(0, 'asOfDate', as_of)
+        return data.reset_index(drop=True)
+
+    def statement(self, symbol, statement_type='income', period='annual'):
+        _check_statement(statement_type, period)
+        return getattr(yf.Ticker(symbol), self.STATEMENT_ATTRIBUTES[(statement_type, period)])
+
+    def option_expirations(self, symbol):
+        return yf.Ticker(symbol).options
+
+    def option_chain(self, symbol, expiration):
+        chain = yf.Ticker(symbol).option_chain(expiration)
+        return chain.calls, chain.puts
+
+
+class YahooQueryProvider(MarketDataProvider):
+
+    HISTORY_COLUMNS = {'open': 'Open', 'high': 'High', 'low': 'Low', 'close': 'Close', 'volume': 'Volume',
+                       'adjclose': 'Adj Close', 'dividends': 'Dividends', 'splits': 'Stock Splits'}
+    STATEMENT_METHODS = {'income': 'income_statement', 'balance': 'balance_sheet', 'cashflow': 'cash_flow'}
+    STATEMENT_META_COLUMNS = ['symbol', 'asOfDate', 'periodType', 'currencyCode']
+
+    def modules(self, symbol, modules):
+        data = Ticker(symbol).get_modules(modules)
+
+        # {symbol: {module: data}}, or {symbol: error message} for unknown symbols.
+        # yahooquery unwraps the module level when only one module is asked for.
+        symbol_modules = data.get(symbol) if isinstance(data, dict) else None
+        if not isinstance(symbol_modules, dict):
+            return {}
+        if len(modules) == 1:
+            return {modules[0]: symbol_modules}
+        return symbol_modules
+
+    def quote(self, symbol):
+        # price, summaryDetail and quoteType together carry the info keys
+        # the app reads
+        info = {}
+        for data in self.modules(symbol, ['price', 'summaryDetail', 'quoteType']).values():
+            if isinstance(data, dict):
+                info.update(data)
+        return info
+
+    def history(self, symbol, interval='1d', period=None, start=None):
+        ticker = Ticker(symbol)
+        if start is not None:
+            bars = ticker.history(interval=interval, start=start, adj_ohlc=True)
+        else:
+            bars = ticker.history(interval=interval, period=period or '1mo', adj_ohlc=True)
+        if not isinstance(bars, pd.DataFrame) or bars.empty:
+            return pd.DataFrame()
+        if isinstance(bars.index, pd.MultiIndex):
+            bars = bars.xs(symbol, level='symbol')
+        bars = bars.rename(columns=self.HISTORY_COLUMNS)
+        bars.index = pd.to_datetime(bars.index)
+        for column in ['Dividends', 'Stock Splits']:
+            if column not in bars.columns:
+                bars[column] = 0.0
+        return bars.drop(columns=['Adj Close'], errors='ignore')
+
+    def valuation_measures(self, symbol):
+        return Ticker(symbol).valuation_measures
+
+    def statement(self, symbol, statement_type='income', period='annual'):
+        _check_statement(statement_type, period)
+        method = getattr(Ticker(symbol), self.STATEMENT_METHODS[statement_type])
+        data = method(frequency='a' if period == 'annual' else 'q', trailing=False)
+        if not isinstance(data, pd.DataFrame) or data.empty:
+            return pd.DataFrame()
+        # One row per period, items as columns: turn it the way yfinance has it
+        data = data.reset_index(drop=True).set_index('asOfDate').sort_index(ascending=False)
+        return data.drop(columns=self.STATEMENT_META_COLUMNS, errors='ignore').T
+
+    def _options(self, symbol):
+        chain = Ticker(symbol).option_chain
+        return chain if isinstance(chain, pd.DataFrame) else pd.DataFrame()
+
+    def option_expirations(self, symbol):
+        chain = self._options(symbol)
+        if chain.empty:
+            return ()
+        expirations = sorted(set(chain.index.get_level_values('expiration')))
+        return tuple(pd.Timestamp(expiration).strftime('%Y-%m-%d') for expiration in expirations)
+
+    def option_chain(self, symbol, expiration):
+        chain = self._options(symbol)
+        if chain.empty:
+            return pd.DataFrame(), pd.DataFrame()
+        dates = chain.index.get_level_values('expiration')
+        chain = chain[dates == pd.Timestamp(expiration)]
+        kinds = chain.index.get_level_values('optionType')
+        return chain[kinds == 'calls'].reset_index(drop=True), chain[kinds == 'puts'].reset_index(drop=True)
+
+
+class RoutedProvider(MarketDataProvider):
+    # Each method from the backend the app has always used for it
+
+    def __init__(self, yfinance=None, yahooquery=None):
+        yfinance = yfinance or YFinanceProvider()
+        yahooquery = yahooquery or YahooQueryProvider()
+        self.quote = yfinance.quote
+        self.history = yfinance.history
+        self.modules = yahooquery.modules
+        self.valuation_measures = yahooquery.valuation_measures
+        self.statement = yfinance.statement
+        self.option_expirations = yfinance.option_expirations
+        self.option_chain = yfinance.option_chain
+
+
+class FixtureMissing(KeyError):
+    # A replayed call that was never recorded
+    pass
+
+
+def fixture_key(method, args, kwargs):
+    call = repr((method, args, tuple(sorted(kwargs.items()))))
+    return hashlib.sha1(call.encode()).hexdigest(), call
+
+
+class FixtureProvider(MarketDataProvider):
+    # Responses recorded under a directory, one pickle per call
+
+    def __init__(self, directory=FIXTURE_DIR):
+        self.directory = directory
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + '.pickle')
+
+    def load(self, method, args, kwargs):
+        key, call = fixture_key(method, args, kwargs)
+        try:
+            with open(self._path(key), 'rb') as f:
+                return pickle.load(f)['response']
+        except FileNotFoundError:
+            raise FixtureMissing(f"No recorded response for {call}") from None
+
+    def save(self, method, args, kwargs, response):
+        key, call = fixture_key(method, args, kwargs)
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + '.tmp', 'wb') as f:
+            pickle.dump({'call': call, 'response': response}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(path + '.tmp', path)
+
+    def __getattribute__(self, name):
+        if name in PROVIDER_METHODS:
+            return lambda *args, **kwargs: self.load(name, args, kwargs)
+        return super().__getattribute__(name)
+
+
+class RecordingProvider(MarketDataProvider):
+    # Passes calls to a backend and saves each response as a fixture
+
+    def __init__(self, provider, fixtures):
+        self.provider = provider
+        self.fixtures = fixtures
+
+    def __getattribute__(self, name):
+        if name in PROVIDER_METHODS:
+            def record(*args, **kwargs):
+                response = getattr(self.provider, name)(*args, **kwargs)
+                self.fixtures.save(name, args, kwargs, response)
+                return response
+            return record
+        return super().__getattribute__(name)
+
+
+class InstrumentedProvider(MarketDataProvider):
+    # Counts calls, errors and seconds spent per method
+
+    def __init__(self, provider):
+        self.provider = provider
+        self.calls = collections.Counter()
+        self.errors = collections.Counter()
+        self.seconds = collections.Counter()
+        self.lock = threading.Lock()
+
+    def __getattribute__(self, name):
+        if name in PROVIDER_METHODS:
+            method = getattr(self.provider, name)
+
+            def timed(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return method(*args, **kwargs)
+                except Exception:
+                    with self.lock:
+                        self.errors[name] += 1
+                    raise
+                finally:
+                    with self.lock:
+                        self.calls[name] += 1
+                        self.seconds[name] += time.perf_counter() - start
+            return timed
+        return super().__getattribute__(name)
+
+    def summary(self):
+        with self.lock:
+            parts = [f"{name}: {self.calls[name]} calls, {self.errors[name]} errors, "
+                     f"{self.seconds[name] / self.calls[name] * 1000:.0f} ms avg"
+                     for name in PROVIDER_METHODS if self.calls[name]]
+        return '; '.join(parts) or 'no calls'
+
+
+def create_provider(name=None, fixtures_dir=FIXTURE_DIR):
+    name = name or os.environ.get('MARKET_DATA_PROVIDER', 'default')
+    if name == 'default':
+        return RoutedProvider()
+    if name == 'yfinance':
+        return YFinanceProvider()
+    if name == 'yahooquery':
+        return YahooQueryProvider()
+    if name == 'record':
+        return RecordingProvider(RoutedProvider(), FixtureProvider(fixtures_dir))
+    if name == 'fixtures':
+        return FixtureProvider(fixtures_dir)
+    raise ValueError(f"Unknown market data provider: {name}")
+
+
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def get_provider():
+    # One instrumented provider per process
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            _provider = InstrumentedProvider(create_provider())
+            logging.info(f"Market data provider: {type(_provider.provider).__name__}")
+        return _provider
@@ -1,11 +1,10 @@
 # option_chain_utils.py
 import streamlit as st
-import yfinance as yf
 import pandas as pd
+from market_data import get_provider
 
-def display_option_chain(symbol, expiration_dates, selected_expiration_date):
+def display_option_chain(symbol, expiration_dates, selected_expiration_date, quote):
     try:
-        stock = yf.Ticker(symbol)
         if not expiration_dates:
             st.warning("No option chain data available for this stock.")
             return
@@ -14,9 +13,7 @@ def display_option_chain(symbol, expiration_dates, selected_expiration_date):
         selected_expiration_date = st.selectbox("Select Expiration Date:", expiration_dates, index=expiration_dates.index(selected_expiration_date))
 
         # Fetch option chain data for the selected expiration date
-        option_chain = stock.option_chain(selected_expiration_date)
-        calls = option_chain.calls
-        puts = option_chain.puts
+        calls, puts = get_provider().option_chain(symbol, selected_expiration_date)
 
         # Columns to display for both calls and puts
         columns_to_display = ["lastPrice", "change", "percentChange", "volume", "openInterest", "strike"]
@@ -24,9 +21,10 @@ def display_option_chain(symbol, expiration_dates, selected_expiration_date):
         # Merge calls and puts on the 'strike' column
         option_chain_combined = pd.merge(calls[columns_to_display], puts[columns_to_display], on="strike", how='outer', suffixes=('_Call', '_Put'))
 
-        # Add a new column to store in-the-money information
-        option_chain_combined["In the Money Call"] = option_chain_combined["strike"] <= stock.info["ask"]
-        option_chain_combined["In the Money Put"] = option_chain_combined["strike"] >= stock.info["ask"]
+        # Add a new column to store in-the-money information, against the
+        # page's quote rather than a fresh info request
+        option_chain_combined["In the Money Call"] = option_chain_combined["strike"] <= quote.price
+        option_chain_combined["In the Money Put"] = option_chain_combined["strike"] >= quote.price
 
         # Sort the DataFrame by the 'strike' column
         option_chain_combined = option_chain_combined.sort_values(by='strike')
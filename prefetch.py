@@ -0,0 +1,49 @@
+# Starts a page's independent upstream requests together on a bounded thread
+# pool, so a symbol load waits about as long as its slowest request instead
+# of the sum of all of them. Renderers take the results from the futures.
+#
+# Jobs run off the script thread, so they must only fetch: any st.* element
+# call belongs in the renderer that consumes the result.
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+PREFETCH_WORKERS = 8
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    # One pool per process, shared by every session
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=PREFETCH_WORKERS, thread_name_prefix='prefetch')
+        return _executor
+
+
+def _with_script_run_ctx(job, ctx):
+    # Lets jobs use st.cache_resource functions, which look up the session
+    # through the current thread's script run context
+    def run():
+        add_script_run_ctx(threading.current_thread(), ctx)
+        return job()
+    return run
+
+
+class Prefetch:
+    # Named futures for one page render
+
+    def __init__(self, jobs, executor=None):
+        executor = executor or get_executor()
+        ctx = get_script_run_ctx()
+        self.futures = {name: executor.submit(_with_script_run_ctx(job, ctx)) for name, job in jobs.items()}
+
+    def __contains__(self, name):
+        return name in self.futures
+
+    def result(self, name):
+        # Waits for the job and returns its result, or raises its exception
+        return self.futures[name].result()
@@ -1,4 +1,3 @@
-import yfinance as yf
 import streamlit as st
 import pandas as pd
 
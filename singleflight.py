@@ -0,0 +1,59 @@
+# Coalesces concurrent calls for the same key into one.
+#
+# When many sessions open a trending symbol together, they all miss the
+# cache at the same moment. With SingleFlight the first caller for a key
+# runs the fetch and the others wait for its result (or its exception)
+# instead of each going upstream. Nothing is kept once the call finishes;
+# caching the result is data_cache's job.
+import threading
+
+
+class _Call:
+    __slots__ = ('done', 'value', 'error', 'waiters')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+
+    def __init__(self):
+        self.calls = {}
+        self.lock = threading.Lock()
+        # Calls that were answered by another caller's fetch
+        self.shared = 0
+
+    def do(self, key, fn):
+        # fn() for the first caller of key, that call's outcome for callers
+        # arriving while it runs
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.calls[key] = _Call()
+            else:
+                call.waiters += 1
+                self.shared += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        try:
+            call.value = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+            call.done.set()
+        return call.value
+
+    def in_flight(self):
+        with self.lock:
+            return len(self.calls)
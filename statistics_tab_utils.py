@@ -1,6 +1,6 @@
-from yahooquery import Ticker
 import streamlit as st
 import pandas as pd
+from market_data import get_provider
 
 def format_market_cap(value):
     if pd.notna(value):
@@ -20,10 +20,10 @@ def format_values(valuation_measures):
         valuation_measures[column] = valuation_measures[column].apply(format_market_cap)
     return valuation_measures
 
-def display_valuation_measures(symbol):
-    t = Ticker(symbol)
-    valuation_measures = t.valuation_measures
-    
+def get_valuation_measures(symbol):
+    return get_provider().valuation_measures(symbol)
+
+def display_valuation_measures(valuation_measures):
     # Check if valuation_measures is a DataFrame
     if not isinstance(valuation_measures, pd.DataFrame):
         st.warning("No valuation data available.")
@@ -1,9 +1,10 @@
-from yahooquery import Ticker
 import streamlit as st
 
-def get_fund_weightings(symbol):
-    fund = Ticker(symbol)
-    fund_info = fund.fund_performance[symbol]
+# The getters below read quoteSummary module data fetched once per symbol by
+# data_gateway.fetch_symbol_modules (see SummaryView)
+
+def get_fund_weightings(fund_performance):
+    fund_info = fund_performance
 
     # Check if fund_info is a dictionary
     if not isinstance(fund_info, dict):
@@ -51,9 +52,8 @@ def display_fund_info(fund_weightings):
             unsafe_allow_html=True
         )
 
-def get_profile_weightings(symbol):
-    fund = Ticker(symbol)
-    fund_info = fund.fund_profile[symbol]
+def get_profile_weightings(fund_profile):
+    fund_info = fund_profile
 
     # Check if fund_info is a dictionary
     if not isinstance(fund_info, dict):
@@ -101,9 +101,8 @@ def display_profile_info(profile_weightings):
             unsafe_allow_html=True
         )
 
-def get_category_weightings(symbol):
-    fund = Ticker(symbol)
-    fund_info = fund.fund_profile[symbol]
+def get_category_weightings(fund_profile):
+    fund_info = fund_profile
 
     # Check if fund_info is a dictionary
     if not isinstance(fund_info, dict):
@@ -137,9 +136,8 @@ def display_category_info(category_weightings):
         unsafe_allow_html=True
     )
 
-def get_performance_weightings(symbol):
-    fund = Ticker(symbol)
-    fund_info = fund.fund_performance[symbol]
+def get_performance_weightings(fund_performance):
+    fund_info = fund_performance
 
     # Check if fund_info is a dictionary
     if not isinstance(fund_info, dict):
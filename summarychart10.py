@@ -1,4 +1,3 @@
-import yfinance as yf
 import streamlit as st
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots  # Add this line
@@ -13,9 +12,3 @@ def format_volume(volume):
         return f"{volume / 1_000:.2f}K"
     else:
         return f"{volume}"
-
-# Used as a conditional check for assets that do not have minute intraday data.
-def has_minute_data_in_last_day(ticker):
-    # Fetch historical stock data with '1m' interval for the last day
-    stock_data = yf.download(ticker, interval='1m', period='1d')
-    return not stock_data.empty and len(stock_data) >= 5
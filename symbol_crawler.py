@@ -0,0 +1,303 @@
+# Concurrent, resumable version of findtickersymbolyfinance.main.
+#
+# The lookup pages are fetched by a bounded thread pool sharing one
+# requests.Session. Every prefix probe and result block is a task in a
+# work queue persisted to a JSON state file together with the symbols found
+# so far, so a killed run picks up where it stopped. PrefixScheduler decides
+# from each prefix's first page whether it is done, needs paging or has to
+# be split into longer prefixes. Alongside symbol -> shortName it keeps each
+# symbol's full lookup document (exchange, type, industryName, ...) as
+# metadata. All workers share one crawler_http.HttpThrottle, which keeps the
+# run within its request budget and retries throttled or failed pages.
+#
+# A finished crawl is committed to universe_snapshots as the next snapshot
+# version. --prefixes re-crawls only those prefixes and patches them into the
+# latest snapshot.
+#
+# Usage: python symbol_crawler.py [--workers 8] [--state crawl_state.json]
+#                                 [--rate 10] [--max-retries 6] [--save-pages DIR]
+#                                 [--prefixes AB,CD]
+import argparse
+import json
+import heapq
+import logging
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import requests
+
+from crawler_http import HttpThrottle
+from findtickersymbolyfinance import call_url, get_counts, hdr, process_one
+from universe_snapshots import SNAPSHOT_DIR, SnapshotStore
+
+BASE_URL = "https://finance.yahoo.com"
+STATE_PATH = "crawl_state.json"
+OUTPUT_PATH = "alltickersyfinance"
+METADATA_PATH = "alltickersyfinance_meta.json"
+
+# 0-9 and A-Z, as in findtickersymbolyfinance.main
+SEARCH_SET = [chr(x) for x in range(65, 91)] + [chr(x) for x in range(48, 58)]
+
+# Yahoo stops paging around 9999 results, so prefixes with more than
+# SPLIT_THRESHOLD hits are split into longer prefixes, up to MAX_PREFIX_LEN.
+# Below that, paging is always cheaper than splitting: a split costs one probe
+# per child on top of the same result pages.
+SPLIT_THRESHOLD = 9000
+MAX_PREFIX_LEN = 4
+MAX_BLOCK = 9999
+PAGE_SIZE = 100
+
+# Task kinds: probe a prefix (its first page, which also carries the count),
+# or fetch one later block of its results
+PREFIX = 'prefix'
+BLOCK = 'block'
+
+# Task kind written by older state files, when counts had their own page
+COUNT = 'count'
+
+
+def task_key(task):
+    kind, prefix, block = task
+    return f"{kind}:{prefix}:{block}"
+
+
+def task_priority(task):
+    # Probes before blocks, shorter prefixes first, so splits are found early
+    # and the deep parts of the tree start while the pool is still busy
+    kind, prefix, block = task
+    return (0 if kind == PREFIX else 1, len(prefix), prefix, block)
+
+
+def lookup_url(base_url, srch, block, count):
+    return base_url + "/lookup/all?s=" + srch + "&t=A&b=" + str(block) + "&c=" + str(count)
+
+
+class CrawlStats:
+    # Throughput counters for one run, plus the throttle's status counters
+
+    def __init__(self, throttle=None):
+        self.throttle = throttle
+        self.started = time.monotonic()
+        self.requests = 0
+        self.bytes = 0
+        self.symbols = 0
+        self.failures = 0
+
+    def record(self, body_len, new_symbols):
+        self.requests += 1
+        self.bytes += body_len
+        self.symbols += new_symbols
+
+    def summary(self):
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        summary = (f"{self.requests} requests in {elapsed:.1f}s "
+                   f"({self.requests / elapsed:.2f} req/s, {self.bytes / elapsed / 1024:.1f} KiB/s, "
+                   f"{self.symbols / elapsed:.1f} new symbols/s, {self.failures} failed)")
+        if self.throttle is not None:
+            summary += ', ' + self.throttle.summary()
+        return summary
+
+
+class CrawlState:
+    # Pending tasks and collected symbols, persisted between runs
+
+    def __init__(self, path=STATE_PATH, prefixes=None):
+        self.path = path
+        if path and os.path.exists(path):
+            with open(path, encoding='UTF-8') as f:
+                saved = json.load(f)
+            tasks = [(PREFIX if kind == COUNT else kind, srch, block) for kind, srch, block in saved['pending']]
+            self.pending = {task_key(task): task for task in tasks}
+            self.symbols = saved['symbols']
+            self.metadata = saved.get('metadata', {})
+            self.scope = saved.get('scope')
+        else:
+            # Prefixes given explicitly make this a partial crawl of them
+            self.scope = prefixes
+            if prefixes is None:
+                prefixes = [term_1 + term_2 for term_1 in SEARCH_SET for term_2 in SEARCH_SET]
+            tasks = [(PREFIX, srch, 0) for srch in prefixes]
+            self.pending = {task_key(task): task for task in tasks}
+            self.symbols = {}
+            self.metadata = {}
+
+    def save(self):
+        if not self.path:
+            return
+        # Write to a temporary file first so a kill never leaves a torn state
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='UTF-8') as f:
+            json.dump({'pending': list(self.pending.values()), 'symbols': self.symbols, 'metadata': self.metadata,
+                       'scope': self.scope}, f)
+        os.replace(tmp_path, self.path)
+
+
+class PrefixScheduler:
+    # Orders the crawl's tasks and plans new ones from each prefix's count
+
+    def __init__(self, state):
+        self.state = state
+        self.queue = [(task_priority(task), task) for task in state.pending.values()]
+        heapq.heapify(self.queue)
+
+    def __len__(self):
+        return len(self.queue)
+
+    def push(self, task):
+        key = task_key(task)
+        if key not in self.state.pending:
+            self.state.pending[key] = task
+            heapq.heappush(self.queue, (task_priority(task), task))
+
+    def pop(self):
+        # Next task to run, or None once the queue is empty
+        if not self.queue:
+            return None
+        return heapq.heappop(self.queue)[1]
+
+    def plan(self, srch, total):
+        # Tasks left for a probed prefix: nothing if its first page held
+        # everything, the remaining pages if Yahoo can page through them,
+        # otherwise a probe for every longer prefix
+        if total <= PAGE_SIZE:
+            return []
+        if total < SPLIT_THRESHOLD or len(srch) >= MAX_PREFIX_LEN:
+            return [(BLOCK, srch, block) for block in range(PAGE_SIZE, min(total, MAX_BLOCK + 1), PAGE_SIZE)]
+        return [(PREFIX, srch + term, 0) for term in SEARCH_SET]
+
+
+class SymbolCrawler:
+
+    def __init__(self, state=None, max_workers=8, base_url=BASE_URL, save_every=50, pages_dir=None, throttle=None):
+        self.state = state if state is not None else CrawlState()
+        self.max_workers = max_workers
+        self.base_url = base_url
+        self.save_every = save_every
+        self.pages_dir = pages_dir
+        self.throttle = throttle if throttle is not None else HttpThrottle()
+        self.stats = CrawlStats(self.throttle)
+
+        # One connection per worker, all sharing the session's cookies
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def _fetch(self, srch, block, count):
+        url = lookup_url(self.base_url, srch, block, count)
+        body = call_url(url, dict(hdr, path=url), self.session, self.throttle)
+        if self.pages_dir:
+            with open(os.path.join(self.pages_dir, f"{srch}_{block}_{count}.html"), 'w', encoding='UTF-8') as f:
+                f.write(body)
+        return body
+
+    # Runs on a worker thread: fetch and parse only, the main thread owns the
+    # state. Returns the prefix's total for probes, None for blocks.
+    def _run_task(self, task):
+        kind, srch, block = task
+        body = self._fetch(srch, block, PAGE_SIZE)
+        found = {}
+        metadata = {}
+        result = process_one(body, srch, found, metadata)
+
+        total = None
+        if kind == PREFIX:
+            total = 0 if result == -1 and not found else int(get_counts(body, srch))
+            print(srch, 'Total:', total)
+        return len(body), total, found, metadata
+
+    def run(self):
+        state = self.state
+        scheduler = PrefixScheduler(state)
+        completed = 0
+        futures = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while True:
+                # Keep just enough tasks in flight for the pool, so the
+                # scheduler's order holds as new tasks are planned
+                while len(futures) < 2 * self.max_workers:
+                    task = scheduler.pop()
+                    if task is None:
+                        break
+                    futures[pool.submit(self._run_task, task)] = task
+                if not futures:
+                    break
+
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    task = futures.pop(future)
+                    try:
+                        body_len, total, found, metadata = future.result()
+                    except Exception as e:
+                        # Leave the task pending so the next run retries it
+                        self.stats.failures += 1
+                        logging.error('Task ' + task_key(task) + ' failed: ' + str(e))
+                        continue
+
+                    new_symbols = sum(1 for symbol in found if symbol not in state.symbols)
+                    state.symbols.update(found)
+                    state.metadata.update(metadata)
+                    self.stats.record(body_len, new_symbols)
+                    del state.pending[task_key(task)]
+                    if total is not None:
+                        for new_task in scheduler.plan(task[1], total):
+                            scheduler.push(new_task)
+
+                    completed += 1
+                    if completed % self.save_every == 0:
+                        state.save()
+                        print("Symbols stored so far: ", len(state.symbols), '|', self.stats.summary())
+                        logging.info('Progress: ' + self.stats.summary())
+
+        state.save()
+        print("Total symbols: ", len(state.symbols), '|', self.stats.summary())
+        logging.info('Done: ' + self.stats.summary())
+        return state.symbols
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Crawl the Yahoo lookup pages for every symbol")
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--state', default=STATE_PATH)
+    parser.add_argument('--base-url', default=BASE_URL)
+    parser.add_argument('--rate', type=float, default=10.0, help="request budget, requests per second")
+    parser.add_argument('--burst', type=float, help="requests allowed back to back, defaults to the rate")
+    parser.add_argument('--max-retries', type=int, default=6)
+    parser.add_argument('--output', default=OUTPUT_PATH)
+    parser.add_argument('--metadata-output', default=METADATA_PATH)
+    parser.add_argument('--save-pages', help="directory to keep every fetched page in, e.g. for bench_lookup_parse.py")
+    parser.add_argument('--prefixes', help="comma separated prefixes to re-crawl instead of the whole universe")
+    parser.add_argument('--snapshots', default=SNAPSHOT_DIR)
+    args = parser.parse_args()
+
+    if args.save_pages:
+        os.makedirs(args.save_pages, exist_ok=True)
+    prefixes = [prefix.strip().upper() for prefix in args.prefixes.split(',')] if args.prefixes else None
+    throttle = HttpThrottle(args.rate, args.burst, args.max_retries)
+    crawler = SymbolCrawler(CrawlState(args.state, prefixes), max_workers=args.workers, base_url=args.base_url,
+                            pages_dir=args.save_pages, throttle=throttle)
+    yh_all_sym = crawler.run()
+
+    if crawler.state.pending:
+        print(len(crawler.state.pending), "tasks still pending, rerun to resume")
+        return
+
+    f = open(args.output, "w", encoding='UTF-8')
+    f.write(str(yh_all_sym))
+    f.close()
+
+    with open(args.metadata_output, "w", encoding='UTF-8') as f:
+        json.dump(crawler.state.metadata, f)
+
+    delta = SnapshotStore(args.snapshots).commit(yh_all_sym, crawler.state.scope)
+    print(f"Snapshot {delta['version']}: {len(delta['added'])} added, {len(delta['removed'])} removed, "
+          f"{len(delta['renamed'])} renamed")
+
+    # The crawl is committed, so the next run starts a fresh one
+    if os.path.exists(args.state):
+        os.remove(args.state)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,717 @@
+import copy
+import heapq
+import logging
+import mmap
+import os
+import re
+import struct
+import zlib
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter
+
+from fuzzywuzzy import fuzz
+
+# Gram sizes kept in the inverted index. Queries up to the largest size are
+# answered straight from a posting list, longer ones are filtered through
+# their rarest trigram and then verified.
+GRAM_SIZES = (1, 2, 3)
+
+# Separates the symbol from the company name so no gram spans both fields
+FIELD_SEPARATOR = '\n'
+
+# Fuzzy matching works on the words of symbols and company names. Words up to
+# NEIGHBOURHOOD_MAX_LEN letters are matched by probing every string one edit
+# away; longer ones through a padded trigram filter over the vocabulary.
+WORD_PATTERN = re.compile(r'[A-Z0-9]+')
+WORD_ALPHABET = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789'
+NEIGHBOURHOOD_MAX_LEN = 5
+FUZZY_MIN_SCORE = 70
+FUZZY_WORD_CANDIDATES = 40
+FUZZY_WORDS_PER_TERM = 8
+FUZZY_MAX_ENTRIES = 250
+
+
+def _entry_text(symbol, full_name):
+    return symbol.upper() + FIELD_SEPARATOR + full_name.upper()
+
+
+def _grams(text, sizes=GRAM_SIZES):
+    return {text[i:i + size] for size in sizes for i in range(len(text) - size + 1)}
+
+
+def _word_trigrams(word):
+    return _grams(' ' + word + ' ', sizes=(3,))
+
+
+# Every string one deletion, transposition, substitution or insertion away
+def _edits1(word):
+    splits = [(word[:i], word[i:]) for i in range(len(word) + 1)]
+    deletes = [left + right[1:] for left, right in splits if right]
+    transposes = [left + right[1] + right[0] + right[2:] for left, right in splits if len(right) > 1]
+    replaces = [left + c + right[1:] for left, right in splits if right for c in WORD_ALPHABET]
+    inserts = [left + c + right for left, right in splits for c in WORD_ALPHABET]
+    return set(deletes + transposes + replaces + inserts)
+
+
+# Listing classes used as the first ranking feature: plain symbols rank ahead
+# of exchange-suffixed listings (MSFT.MX), which rank ahead of indices,
+# currencies and futures (^GSPC, EURUSD=X)
+PRIMARY_LISTING = 0
+SUFFIXED_LISTING = 1
+SPECIAL_LISTING = 2
+
+# Above this many vocabulary words sharing the input's first word as a
+# prefix, name word-prefix matches are found by walking the n-gram posting
+# list instead of merging every word's posting list
+WORD_PREFIX_MAX_WORDS = 256
+
+# Match tiers, best first
+EXACT_SYMBOL = 0
+SYMBOL_PREFIX = 1
+NAME_WORD_PREFIX = 2
+SUBSTRING = 3
+
+
+def listing_class(symbol):
+    if '^' in symbol or '=' in symbol:
+        return SPECIAL_LISTING
+    if '.' in symbol:
+        return SUFFIXED_LISTING
+    return PRIMARY_LISTING
+
+
+def _is_name_word_prefix(full_name_upper, query):
+    # True if query occurs in the name starting at a word boundary
+    pos = full_name_upper.find(query)
+    while pos != -1:
+        if pos == 0 or full_name_upper[pos - 1] not in WORD_ALPHABET:
+            return True
+        pos = full_name_upper.find(query, pos + 1)
+    return False
+
+
+# The index is a block of flat arrays, so the index of a SymbolUniverse is
+# kept in a file next to it and memory-mapped like the universe itself:
+# processes on a dyno share its pages and hold no per-entry Python objects.
+#
+# Layout (arrays in native byte order, the file is built where it is read):
+#   header    magic b'SQSI', version (I), entry count (I), then the byte
+#             length of each section (I each)
+#   sections  INDEX_SECTIONS in order, each padded to a multiple of 4 bytes
+INDEX_MAGIC = b'SQSI'
+INDEX_VERSION = 1
+INDEX_SUFFIX = '.index'
+
+# The parts of a PostingTable and their array types
+POSTING_TABLE_PARTS = [('keys', 'B'), ('key_offsets', 'I'), ('slots', 'I'), ('offsets', 'I'), ('ids', 'I')]
+POSTING_TABLES = ['grams', 'words', 'word_grams']
+
+# Per-entry arrays by entry id, the entry ids in symbol order, then the
+# posting tables: n-grams and words to entry ids, word trigrams to word ids
+INDEX_SECTIONS = [('entry_sources', 'I'), ('listing_classes', 'B'), ('symbol_lengths', 'H'), ('sorted_ids', 'I')] + [
+    (f"{table}_{part}", typecode) for table in POSTING_TABLES for part, typecode in POSTING_TABLE_PARTS]
+INDEX_HEADER = struct.Struct(f'<4sII{len(INDEX_SECTIONS)}I')
+
+
+class PostingTable:
+    # Read-only {key: ids} over flat arrays: the keys' UTF-8 bytes back to
+    # back in sorted order, so key ids are sort positions, an open-addressing
+    # hash of them for exact lookups, and each key's ids back to back
+
+    def __init__(self, keys, key_offsets, slots, offsets, ids):
+        self._keys = keys
+        self._key_offsets = key_offsets
+        self._slots = slots
+        self._mask = len(slots) - 1
+        self._offsets = offsets
+        self._ids = ids
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def key(self, key_id):
+        return str(self._keys[self._key_offsets[key_id]:self._key_offsets[key_id + 1]], 'utf-8')
+
+    def key_length(self, key_id):
+        # Length of a key's UTF-8 bytes
+        return self._key_offsets[key_id + 1] - self._key_offsets[key_id]
+
+    def find(self, key):
+        # Id of key, or -1
+        data = key.encode('utf-8')
+        slot = zlib.crc32(data) & self._mask
+        while True:
+            key_id = self._slots[slot] - 1
+            if key_id < 0 or self._keys[self._key_offsets[key_id]:self._key_offsets[key_id + 1]] == data:
+                return key_id
+            slot = (slot + 1) & self._mask
+
+    def find_all(self, keys):
+        # Ids of those of keys present; find with the lookups kept local, for
+        # probing many candidate keys at once
+        keys_data, key_offsets, slots, mask = self._keys, self._key_offsets, self._slots, self._mask
+        found = []
+        for key in keys:
+            data = key.encode('utf-8')
+            slot = zlib.crc32(data) & mask
+            key_id = slots[slot] - 1
+            while key_id >= 0:
+                if keys_data[key_offsets[key_id]:key_offsets[key_id + 1]] == data:
+                    found.append(key_id)
+                    break
+                slot = (slot + 1) & mask
+                key_id = slots[slot] - 1
+        return found
+
+    def ids(self, key_id):
+        return self._ids[self._offsets[key_id]:self._offsets[key_id + 1]]
+
+    def get(self, key):
+        key_id = self.find(key)
+        return self.ids(key_id) if key_id >= 0 else None
+
+
+def _posting_table_arrays(table):
+    # The POSTING_TABLE_PARTS of a PostingTable holding table ({key: ids})
+    keys = sorted(table)
+    key_bytes = bytearray()
+    key_offsets = array('I', [0])
+    offsets = array('I', [0])
+    ids = array('I')
+    # At most half full, so probes stay short
+    slots = array('I', bytes(4 << max(1, 2 * len(keys) - 1).bit_length()))
+    mask = len(slots) - 1
+    for key_id, key in enumerate(keys):
+        data = key.encode('utf-8')
+        key_bytes += data
+        key_offsets.append(len(key_bytes))
+        ids.extend(table[key])
+        offsets.append(len(ids))
+        slot = zlib.crc32(data) & mask
+        while slots[slot]:
+            slot = (slot + 1) & mask
+        slots[slot] = key_id + 1
+    return [key_bytes, key_offsets, slots, offsets, ids]
+
+
+def build_index(entries, sources=None):
+    # Header and sections of the index of entries, (symbol, full name) pairs
+    # in universe order. sources[position] is what the index keeps to find
+    # an entry again (its record position in a SymbolUniverse); by default
+    # its position in entries.
+    count = len(entries)
+    listing_classes = array('B')
+    symbol_lengths = array('H')
+    symbols = []
+    for symbol, _ in entries:
+        listing_classes.append(listing_class(symbol))
+        symbol_lengths.append(len(symbol))
+        symbols.append(symbol.upper())
+
+    # Entry ids are given in ranking order: by listing class, then symbol
+    # length, then universe order
+    order = sorted(range(count), key=lambda position: (listing_classes[position], symbol_lengths[position], position))
+    sorted_ids = array('I', sorted(range(count), key=lambda entry_id: symbols[order[entry_id]]))
+
+    # n-gram inverted index over symbols and company names, and the word
+    # vocabulary used for word-prefix and fuzzy matching. Ids are added in
+    # increasing order, so every posting list is sorted best-ranked first.
+    grams = {}
+    words = {}
+    for entry_id, position in enumerate(order):
+        text = _entry_text(*entries[position])
+        for gram in _grams(text):
+            posting = grams.get(gram)
+            if posting is None:
+                posting = grams[gram] = array('I')
+            posting.append(entry_id)
+        for word in set(WORD_PATTERN.findall(text)):
+            posting = words.get(word)
+            if posting is None:
+                posting = words[word] = array('I')
+            posting.append(entry_id)
+
+    # Trigram candidate filter over the vocabulary for fuzzy matching; word
+    # ids are the words' sorted positions
+    word_grams = {}
+    for word_id, word in enumerate(sorted(words)):
+        for gram in _word_trigrams(word):
+            posting = word_grams.get(gram)
+            if posting is None:
+                posting = word_grams[gram] = array('I')
+            posting.append(word_id)
+
+    sections = [
+        array('I', order if sources is None else (sources[position] for position in order)),
+        array('B', (listing_classes[position] for position in order)),
+        array('H', (symbol_lengths[position] for position in order)),
+        sorted_ids,
+    ]
+    for table in (grams, words, word_grams):
+        sections += _posting_table_arrays(table)
+    sections = [bytes(section) for section in sections]
+    header = INDEX_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, count, *(len(section) for section in sections))
+    return [header] + [section + bytes(-len(section) % 4) for section in sections]
+
+
+def read_index(buffer):
+    # (entry count, {section name: memoryview}) of an index, or None if
+    # buffer does not hold one
+    if len(buffer) < INDEX_HEADER.size:
+        return None
+    magic, version, count, *lengths = INDEX_HEADER.unpack_from(buffer, 0)
+    if magic != INDEX_MAGIC or version != INDEX_VERSION:
+        return None
+    view = memoryview(buffer)
+    sections = {}
+    offset = INDEX_HEADER.size
+    for (name, typecode), length in zip(INDEX_SECTIONS, lengths):
+        sections[name] = view[offset:offset + length].cast(typecode)
+        offset += length + -length % 4
+    return count, sections
+
+
+def default_index_path(universe_path):
+    return os.path.splitext(universe_path)[0] + INDEX_SUFFIX
+
+
+def _build_universe_index(universe):
+    # Entries of a SymbolUniverse are found again by their record position
+    return build_index(universe.entries(), [universe.sorted_position(position) for position in range(len(universe))])
+
+
+def write_index_file(universe, path):
+    sections = _build_universe_index(universe)
+    # Written under a per-process name, so processes building it together
+    # never write into one file
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        for section in sections:
+            f.write(section)
+    os.replace(tmp_path, path)
+    return path
+
+
+def _map_index(path, count):
+    with open(path, 'rb') as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    index = read_index(buffer)
+    if index is None or index[0] != count:
+        buffer.close()
+        return None
+    return buffer
+
+
+# The index of a SymbolUniverse, memory-mapped from its index file, which is
+# built first if it is missing or older than the universe file. Without a
+# writable directory the index is kept in memory instead.
+def load_index(universe, path=None):
+    path = path or default_index_path(universe.path)
+    if os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(universe.path):
+        buffer = _map_index(path, len(universe))
+        if buffer is not None:
+            return buffer
+    try:
+        write_index_file(universe, path)
+        return _map_index(path, len(universe))
+    except OSError as e:
+        logging.warning(f"Keeping the symbol index in memory: {e}")
+        return b''.join(_build_universe_index(universe))
+
+
+class SymbolIndex:
+    # Search structures over a {symbol: full name} universe, read from an
+    # index built by build_index (see the layout above).
+    #
+    # Entries get internal ids in ranking order: by listing class, then
+    # symbol length, then universe order. These per-entry features are
+    # computed once at build time, and because every posting list is sorted
+    # by id, walking any of them yields matches best-ranked first.
+    #
+    # apply_delta returns a copy of the index patched with a
+    # universe_snapshots delta and leaves the index itself untouched, so
+    # sessions searching it concurrently never see half-updated arrays. The
+    # built index is read-only: a delta's changes are kept in overlays of the
+    # posting lists it touches. Entries it adds get the next free ids but are
+    # inserted into the posting lists at their rank (_rank), so a new primary
+    # listing still ranks ahead of suffixed and special ones.
+
+    def __init__(self, options, version=0, index_path=None):
+        # options is a {symbol: full name} dict, a SymbolUniverse, or any
+        # sequence of (symbol, full name) pairs. The index of a SymbolUniverse
+        # is memory-mapped from index_path (next to the universe file by
+        # default); other sources are indexed in memory.
+        universe = options if hasattr(options, 'sorted_position') else None
+        if universe is not None:
+            self._buffer = load_index(universe, index_path)
+        else:
+            if isinstance(options, dict):
+                options = list(options.items())
+            self._buffer = b''.join(build_index(options))
+        self._source = options
+        self._universe = universe
+        self.version = version
+
+        count, sections = read_index(self._buffer)
+        self._count = count
+        self._entry_sources = sections['entry_sources']
+        self._listing_classes = sections['listing_classes']
+        self._symbol_lengths = sections['symbol_lengths']
+        # Prefix lookups on symbols use the sorted-array form of a trie: every
+        # trie node maps to a contiguous range of the ids sorted by symbol,
+        # found with two binary searches instead of a tree of per-character
+        # dicts. The symbols compared are decoded from the source as the
+        # binary search probes them.
+        self._sorted_ids = sections['sorted_ids']
+        self._grams, self._words, self._word_grams = (
+            PostingTable(*(sections[f"{table}_{part}"] for part, _ in POSTING_TABLE_PARTS)) for table in POSTING_TABLES)
+
+        # Entries added by deltas, and the ids of removed entries
+        self._appended = []
+        self._removed = set()
+        # Words added by deltas get the ids after the built vocabulary
+        self._appended_words = []
+        self._appended_word_ids = {}
+        # Posting lists changed by deltas: grams and word trigrams by key,
+        # words by word id
+        self._gram_overlay = {}
+        self._word_overlay = {}
+        self._word_gram_overlay = {}
+        # Overlay lists copied since this index was patched from another
+        self._copied = set()
+
+    def _writable(self, overlay, key, base):
+        # overlay[key] as an array this index may change: a copy of the
+        # built posting list base, or of the list shared with the index this
+        # one was patched from
+        posting = overlay.get(key)
+        if posting is None or (id(overlay), key) not in self._copied:
+            posting = overlay[key] = array('I', posting if posting is not None else base if base is not None else ())
+            self._copied.add((id(overlay), key))
+        return posting
+
+    def _gram_posting(self, gram):
+        posting = self._gram_overlay.get(gram)
+        return posting if posting is not None else self._grams.get(gram)
+
+    def _word_id(self, word):
+        word_id = self._words.find(word)
+        return word_id if word_id >= 0 else self._appended_word_ids.get(word)
+
+    def _word(self, word_id):
+        if word_id < len(self._words):
+            return self._words.key(word_id)
+        return self._appended_words[word_id - len(self._words)]
+
+    def _word_length(self, word_id):
+        # Words are ASCII, so their byte length is their length
+        if word_id < len(self._words):
+            return self._words.key_length(word_id)
+        return len(self._appended_words[word_id - len(self._words)])
+
+    def _word_posting(self, word_id):
+        # Ids of the entries holding a word
+        posting = self._word_overlay.get(word_id)
+        return posting if posting is not None else self._words.ids(word_id)
+
+    def _word_gram_posting(self, gram):
+        posting = self._word_gram_overlay.get(gram)
+        if posting is None:
+            posting = self._word_grams.get(gram)
+        return posting if posting is not None else ()
+
+    def _index_entry(self, entry_id):
+        # Add an appended entry to the posting lists; returns the ids of new words
+        new_word_ids = []
+        text = _entry_text(*self._entry(entry_id))
+        for gram in _grams(text):
+            self._insert_ranked(self._writable(self._gram_overlay, gram, self._grams.get(gram)), entry_id)
+
+        for word in set(WORD_PATTERN.findall(text)):
+            word_id = self._word_id(word)
+            if word_id is None:
+                word_id = self._appended_word_ids[word] = len(self._words) + len(self._appended_words)
+                self._appended_words.append(word)
+                new_word_ids.append(word_id)
+            base = self._words.ids(word_id) if word_id < len(self._words) else None
+            self._insert_ranked(self._writable(self._word_overlay, word_id, base), entry_id)
+        return new_word_ids
+
+    def _index_word(self, word_id):
+        # New word ids are the largest, so they go at the end of the lists
+        for gram in _word_trigrams(self._word(word_id)):
+            self._writable(self._word_gram_overlay, gram, self._word_grams.get(gram)).append(word_id)
+
+    def __len__(self):
+        # Live entries: removed ones are no longer in the sorted ids
+        return len(self._sorted_ids)
+
+    def __contains__(self, symbol):
+        lo, hi = self.prefix_range(symbol)
+        return lo < hi and self._symbol(self._sorted_ids[lo]) == symbol.upper()
+
+    def _entry(self, entry_id):
+        if entry_id < self._count:
+            source = self._entry_sources[entry_id]
+            return self._universe.record(source) if self._universe is not None else self._source[source]
+        return self._appended[entry_id - self._count]
+
+    def _rank(self, entry_id):
+        # Ranking key: listing class, then symbol length, then id
+        if entry_id < self._count:
+            return self._listing_classes[entry_id], self._symbol_lengths[entry_id], entry_id
+        symbol = self._appended[entry_id - self._count][0]
+        return listing_class(symbol), len(symbol), entry_id
+
+    def _rank_key(self):
+        # Key for ordering ids by rank; ids alone are in rank order until a
+        # delta adds entries
+        return self._rank if self._appended else None
+
+    def _insert_ranked(self, posting, entry_id):
+        if not posting or self._rank(posting[-1]) < self._rank(entry_id):
+            posting.append(entry_id)
+        else:
+            posting.insert(bisect_right(posting, self._rank(entry_id), key=self._rank), entry_id)
+
+    def _symbol(self, entry_id):
+        # Sort key of the symbol lookups; universe symbols are stored upper case
+        if self._universe is not None and entry_id < self._count:
+            return self._universe.symbol(self._entry_sources[entry_id])
+        return self._entry(entry_id)[0].upper()
+
+    def _remove(self, symbol):
+        # Drop symbol from the sorted ids and tombstone its entry id for
+        # the posting lists, which are left as they are
+        lo, hi = self.prefix_range(symbol)
+        if lo < hi and self._symbol(self._sorted_ids[lo]) == symbol.upper():
+            self._removed.add(self._sorted_ids[lo])
+            del self._sorted_ids[lo]
+
+    def _add(self, symbol, full_name):
+        self._remove(symbol)
+        entry_id = self._count + len(self._appended)
+        self._appended.append((symbol, full_name))
+
+        position = bisect_right(self._sorted_ids, symbol.upper(), key=self._symbol)
+        self._sorted_ids.insert(position, entry_id)
+
+        for word_id in self._index_entry(entry_id):
+            self._index_word(word_id)
+
+    def apply_delta(self, delta):
+        # A copy of the index patched with a universe_snapshots delta. The
+        # copy shares the built index and the overlay lists it does not
+        # change with this index.
+        index = copy.copy(self)
+        index._appended = list(self._appended)
+        index._removed = set(self._removed)
+        index._sorted_ids = array('I', self._sorted_ids)
+        index._appended_words = list(self._appended_words)
+        index._appended_word_ids = dict(self._appended_word_ids)
+        index._gram_overlay = dict(self._gram_overlay)
+        index._word_overlay = dict(self._word_overlay)
+        index._word_gram_overlay = dict(self._word_gram_overlay)
+        index._copied = set()
+
+        for symbol in delta['removed']:
+            index._remove(symbol)
+        for symbol, full_name in list(delta['added'].items()) + list(delta['renamed'].items()):
+            index._add(symbol, full_name)
+        index.version = delta['version']
+        return index
+
+    def _matches(self, entry_id, query):
+        symbol, full_name = self._entry(entry_id)
+        return query in symbol.upper() or query in full_name.upper()
+
+    def _candidates(self, query):
+        # Short queries are grams themselves, so their posting list is exact
+        if len(query) <= GRAM_SIZES[-1]:
+            posting = self._gram_posting(query)
+            return (posting if posting is not None else ()), False
+
+        # Longer queries must contain every one of their trigrams; walk the
+        # rarest trigram's posting list and verify each candidate.
+        rarest = None
+        for gram in _grams(query, sizes=(GRAM_SIZES[-1],)):
+            posting = self._gram_posting(gram)
+            if posting is None:
+                return (), False
+            if rarest is None or len(posting) < len(rarest):
+                rarest = posting
+        return rarest, True
+
+    def _word_prefix_candidates(self, query):
+        # Entries holding a word that starts with the query's first word, best
+        # ranked first, merged lazily from the words' posting lists. None when
+        # too many words share that prefix for the merge to pay off.
+        first_word = WORD_PATTERN.match(query)
+        if first_word is None:
+            return iter(())
+        prefix = first_word.group()
+        # Built word ids are sorted positions, so the words form a range
+        word_ids = range(len(self._words))
+        lo = bisect_left(word_ids, prefix, key=self._words.key)
+        hi = bisect_left(word_ids, prefix + '\U0010ffff', lo, key=self._words.key)
+        word_ids = list(word_ids[lo:hi]) + [word_id for word, word_id in self._appended_word_ids.items()
+                                            if word.startswith(prefix)]
+        if len(word_ids) > WORD_PREFIX_MAX_WORDS:
+            return None
+        return heapq.merge(*map(self._word_posting, word_ids), key=self._rank_key())
+
+    def ranked_search(self, user_input, limit=5):
+        # [(tier, (symbol, full name))] for the best `limit` substring matches:
+        # exact symbol, then symbol prefix, then a name word starting with the
+        # input, then any other substring; best ranked first within each tier
+        query = user_input.upper()
+        if not query:
+            appended_ids = sorted(range(self._count, self._count + len(self._appended)), key=self._rank)
+            live_ids = (entry_id for entry_id in heapq.merge(range(self._count), appended_ids, key=self._rank_key())
+                        if entry_id not in self._removed)
+            return [(SUBSTRING, self._entry(entry_id)) for _, entry_id in zip(range(limit), live_ids)]
+
+        results = []
+        seen = set()
+        removed = self._removed
+
+        def add(tier, entry_id):
+            if entry_id not in seen:
+                seen.add(entry_id)
+                results.append((tier, self._entry(entry_id)))
+            return len(results) >= limit
+
+        # Symbol tiers come from the prefix range; a bounded heap picks its
+        # best entries without sorting the whole range
+        lo, hi = self.prefix_range(query)
+        if lo < hi and self._symbol(self._sorted_ids[lo]) == query and add(EXACT_SYMBOL, self._sorted_ids[lo]):
+            return results
+        for entry_id in heapq.nsmallest(limit, self._sorted_ids[lo:hi], key=self._rank_key()):
+            if add(SYMBOL_PREFIX, entry_id):
+                return results
+
+        candidates, needs_check = self._candidates(query)
+        word_candidates = self._word_prefix_candidates(query)
+        if word_candidates is not None:
+            for entry_id in word_candidates:
+                if entry_id in seen or entry_id in removed:
+                    continue
+                if _is_name_word_prefix(self._entry(entry_id)[1].upper(), query):
+                    if add(NAME_WORD_PREFIX, entry_id):
+                        return results
+
+            for entry_id in candidates:
+                if entry_id in seen or entry_id in removed or (needs_check and not self._matches(entry_id, query)):
+                    continue
+                if add(SUBSTRING, entry_id):
+                    return results
+            return results
+
+        # One walk over the posting list, holding back plain substring hits
+        # until the name word-prefix tier is exhausted
+        substring_ids = []
+        for entry_id in candidates:
+            if entry_id in seen or entry_id in removed or (needs_check and not self._matches(entry_id, query)):
+                continue
+            if _is_name_word_prefix(self._entry(entry_id)[1].upper(), query):
+                if add(NAME_WORD_PREFIX, entry_id):
+                    return results
+            elif len(substring_ids) < limit:
+                substring_ids.append(entry_id)
+        for entry_id in substring_ids:
+            if add(SUBSTRING, entry_id):
+                break
+        return results
+
+    def search(self, user_input, limit=5):
+        # Substring matches on symbols and company names, most relevant first
+        return [entry for _, entry in self.ranked_search(user_input, limit)]
+
+    def prefix_range(self, prefix):
+        # Range of the sorted symbols that start with prefix (a trie node)
+        prefix = prefix.upper()
+        lo = bisect_left(self._sorted_ids, prefix, key=self._symbol)
+        hi = bisect_left(self._sorted_ids, prefix + '\U0010ffff', lo, key=self._symbol)
+        return lo, hi
+
+    def symbols_with_prefix(self, prefix, limit=None):
+        lo, hi = self.prefix_range(prefix)
+        if limit is not None:
+            hi = min(hi, lo + limit)
+        return [self._entry(self._sorted_ids[i]) for i in range(lo, hi)]
+
+    def _similar_words(self, term):
+        # {word id: score} for the vocabulary words closest to term. A term
+        # that is itself a known word is taken as spelled correctly.
+        word_id = self._word_id(term)
+        if word_id is not None:
+            return {word_id: 100}
+
+        if len(term) <= NEIGHBOURHOOD_MAX_LEN:
+            neighbours = _edits1(term)
+            candidates = self._words.find_all(neighbours) + [
+                self._appended_word_ids[word] for word in neighbours & self._appended_word_ids.keys()]
+        else:
+            term_grams = _word_trigrams(term)
+            shared = Counter()
+            for gram in term_grams:
+                shared.update(self._word_gram_posting(gram))
+
+            # Rank by Dice similarity of the trigram sets before scoring
+            min_shared = max(1, len(term_grams) // 3)
+            candidates = heapq.nlargest(
+                FUZZY_WORD_CANDIDATES,
+                (word_id for word_id, count in shared.items() if count >= min_shared),
+                key=lambda word_id: shared[word_id] / (len(term_grams) + self._word_length(word_id)),
+            )
+
+        # Skip words whose length alone caps the ratio below the threshold
+        words = ((word_id, self._word(word_id)) for word_id in candidates)
+        scored = ((fuzz.ratio(term, word), word_id) for word_id, word in words
+                  if 200 * min(len(term), len(word)) >= FUZZY_MIN_SCORE * (len(term) + len(word)))
+        best = heapq.nlargest(FUZZY_WORDS_PER_TERM, (item for item in scored if item[0] >= FUZZY_MIN_SCORE))
+        return {word_id: score for score, word_id in best}
+
+    def fuzzy_search(self, user_input, limit=5):
+        # Typo-tolerant search: entries are scored by how closely their words
+        # match each word of the input
+        terms = WORD_PATTERN.findall(user_input.upper())
+        term_matches = [matches for matches in map(self._similar_words, terms) if matches]
+        if not term_matches:
+            return []
+
+        # Collect candidates from the most selective term only. With a single
+        # term the best words' entries are already the answer.
+        seed = min(term_matches, key=lambda matches: sum(len(self._word_posting(word_id)) for word_id in matches))
+        max_entries = limit if len(terms) == 1 else FUZZY_MAX_ENTRIES
+        candidates = {}
+        for word_id in sorted(seed, key=seed.get, reverse=True):
+            for entry_id in self._word_posting(word_id):
+                if entry_id in self._removed:
+                    continue
+                candidates.setdefault(entry_id, seed[word_id])
+                if len(candidates) >= max_entries:
+                    break
+            if len(candidates) >= max_entries:
+                break
+        if len(terms) == 1:
+            return [self._entry(entry_id) for entry_id in candidates]
+
+        # Score each candidate by the best match it holds for every term
+        terms_by_word = {}
+        for term_index, matches in enumerate(term_matches):
+            for word_id, score in matches.items():
+                terms_by_word.setdefault(self._word(word_id), []).append((term_index, score))
+
+        scored = []
+        for entry_id in candidates:
+            symbol, full_name = self._entry(entry_id)
+            best = [0] * len(term_matches)
+            for word in set(WORD_PATTERN.findall(_entry_text(symbol, full_name))):
+                for term_index, score in terms_by_word.get(word, ()):
+                    if score > best[term_index]:
+                        best[term_index] = score
+            scored.append((-sum(best) / len(terms), self._rank(entry_id)))
+
+        return [self._entry(rank[-1]) for _, rank in heapq.nsmallest(limit, scored)]
@@ -0,0 +1,195 @@
+# Compact binary form of the symbol universe.
+#
+# stock_tickers.py / stock_options1.py are huge dict literals that every
+# Streamlit process has to compile and keep around as Python strings. The build
+# step below writes the same {symbol: full name} data into one sorted,
+# offset-indexed file, and SymbolUniverse memory-maps it so lookups and
+# iteration decode only the records they touch. Processes on the same dyno
+# share the file's pages through the OS page cache.
+#
+# Layout (little endian):
+#   header   magic b'SQSU', version (I), entry count (I)
+#   records  count x (string offset (I), symbol length (H), name length (H)),
+#            sorted by symbol bytes
+#   order    count x sorted position (I), in the source dict's insertion order
+#   strings  symbol and name bytes (UTF-8) back to back
+#
+# Usage: python symbol_universe.py [module] [output]
+import importlib
+import mmap
+import os
+import struct
+import sys
+
+UNIVERSE_MAGIC = b'SQSU'
+UNIVERSE_VERSION = 1
+
+HEADER = struct.Struct('<4sII')
+RECORD = struct.Struct('<IHH')
+ORDER = struct.Struct('<I')
+
+DEFAULT_MODULE = 'stock_tickers'
+
+
+def default_universe_path(module_name=DEFAULT_MODULE):
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), module_name + '.universe')
+
+
+def build_universe_file(stock_options, path):
+    encoded = [(symbol.upper().encode('utf-8'), full_name.encode('utf-8'))
+               for symbol, full_name in stock_options.items()]
+    order = sorted(range(len(encoded)), key=lambda entry_id: encoded[entry_id][0])
+
+    records = bytearray()
+    strings = bytearray()
+    sorted_position = [0] * len(encoded)
+    for position, entry_id in enumerate(order):
+        symbol, full_name = encoded[entry_id]
+        records += RECORD.pack(len(strings), len(symbol), len(full_name))
+        strings += symbol
+        strings += full_name
+        sorted_position[entry_id] = position
+
+    # Write to a temporary file first so readers never map a half-written file
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(UNIVERSE_MAGIC, UNIVERSE_VERSION, len(encoded)))
+        f.write(records)
+        f.write(struct.pack(f'<{len(encoded)}I', *sorted_position))
+        f.write(strings)
+    os.replace(tmp_path, path)
+    return path
+
+
+class UniverseEntries:
+    # Read-only sequence of (symbol, full name) in the source insertion order
+
+    def __init__(self, universe):
+        self._universe = universe
+
+    def __len__(self):
+        return len(self._universe)
+
+    def __getitem__(self, entry_id):
+        if isinstance(entry_id, slice):
+            return [self[i] for i in range(*entry_id.indices(len(self)))]
+        if entry_id < 0:
+            entry_id += len(self)
+        if not 0 <= entry_id < len(self):
+            raise IndexError('universe entry out of range')
+        return self._universe.record(self._universe.sorted_position(entry_id))
+
+    def __iter__(self):
+        for entry_id in range(len(self)):
+            yield self[entry_id]
+
+
+class SymbolUniverse:
+    # Memory-mapped {symbol: full name} mapping backed by a universe file
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, count = HEADER.unpack_from(self._mm, 0)
+        if magic != UNIVERSE_MAGIC or version != UNIVERSE_VERSION:
+            self._mm.close()
+            raise ValueError(f"{path} is not a version {UNIVERSE_VERSION} symbol universe file")
+
+        self._count = count
+        self._records_offset = HEADER.size
+        self._order_offset = self._records_offset + count * RECORD.size
+        self._strings_offset = self._order_offset + count * ORDER.size
+
+    def close(self):
+        self._mm.close()
+
+    def __len__(self):
+        return self._count
+
+    def sorted_position(self, entry_id):
+        return ORDER.unpack_from(self._mm, self._order_offset + entry_id * ORDER.size)[0]
+
+    def _symbol_bytes(self, position):
+        offset, symbol_len, _ = RECORD.unpack_from(self._mm, self._records_offset + position * RECORD.size)
+        start = self._strings_offset + offset
+        return self._mm[start:start + symbol_len]
+
+    def symbol(self, position):
+        # Symbol at a position in symbol sort order, without its name
+        return self._symbol_bytes(position).decode('utf-8')
+
+    def record(self, position):
+        # (symbol, full name) at a position in symbol sort order
+        offset, symbol_len, name_len = RECORD.unpack_from(self._mm, self._records_offset + position * RECORD.size)
+        start = self._strings_offset + offset
+        symbol = self._mm[start:start + symbol_len].decode('utf-8')
+        full_name = self._mm[start + symbol_len:start + symbol_len + name_len].decode('utf-8')
+        return symbol, full_name
+
+    def _bisect(self, key):
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._symbol_bytes(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def get(self, symbol, default=None):
+        key = symbol.upper().encode('utf-8')
+        position = self._bisect(key)
+        if position < self._count and self._symbol_bytes(position) == key:
+            return self.record(position)[1]
+        return default
+
+    def __getitem__(self, symbol):
+        full_name = self.get(symbol)
+        if full_name is None:
+            raise KeyError(symbol)
+        return full_name
+
+    def __contains__(self, symbol):
+        return isinstance(symbol, str) and self.get(symbol) is not None
+
+    def entries(self):
+        return UniverseEntries(self)
+
+    def items(self):
+        return iter(self.entries())
+
+    def __iter__(self):
+        for symbol, _ in self.entries():
+            yield symbol
+
+    def keys(self):
+        return iter(self)
+
+    def values(self):
+        for _, full_name in self.entries():
+            yield full_name
+
+
+# Build the universe file from a stock_options module if it is missing or
+# older than the module, then map it
+def load_symbol_universe(module_name=DEFAULT_MODULE, path=None):
+    path = path or default_universe_path(module_name)
+    module_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), module_name + '.py')
+    if not os.path.exists(path) or (os.path.exists(module_path) and os.path.getmtime(module_path) > os.path.getmtime(path)):
+        module = importlib.import_module(module_name)
+        build_universe_file(module.stock_options, path)
+    return SymbolUniverse(path)
+
+
+def main():
+    module_name = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_MODULE
+    path = sys.argv[2] if len(sys.argv) > 2 else default_universe_path(module_name)
+    module = importlib.import_module(module_name)
+    build_universe_file(module.stock_options, path)
+    print(f"Wrote {len(module.stock_options)} symbols to {path} ({os.path.getsize(path)} bytes)")
+
+
+if __name__ == '__main__':
+    main()
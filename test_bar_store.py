@@ -0,0 +1,148 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('pyarrow', exc_type=ImportError)
+
+from bar_resample import resample_ohlcv  # noqa: E402
+from bar_store import BarStore  # noqa: E402
+
+TZ = 'America/New_York'
+
+
+def make_bars(index):
+    n = len(index)
+    close = np.arange(n) + 100.0
+    return pd.DataFrame({'Open': close - 0.5, 'High': close + 1, 'Low': close - 1, 'Close': close,
+                         'Volume': np.arange(n) * 10 + 1, 'Dividends': 0.0, 'Stock Splits': 0.0}, index=index)
+
+
+def daily_index(start, end):
+    return pd.bdate_range(start, end, tz=TZ, name='Date')
+
+
+def intraday_index(start, days):
+    sessions = pd.bdate_range(start, periods=days)
+    minutes = [pd.date_range(day + pd.Timedelta(hours=9, minutes=30), periods=195, freq='2min')
+               for day in sessions]
+    return pd.DatetimeIndex(np.concatenate(minutes), name='Datetime').tz_localize(TZ)
+
+
+class FakeYahoo:
+    # Serves bars up to `until`, like Yahoo would at that moment
+
+    def __init__(self, index):
+        self.bars = make_bars(index)
+        self.until = self.bars.index[-1]
+        self.calls = []
+
+    def fetch(self, symbol, interval, start=None):
+        self.calls.append((interval, start))
+        bars = self.bars[self.bars.index <= self.until]
+        return bars if start is None else bars[bars.index >= start]
+
+
+@pytest.fixture
+def clock():
+    now = [pd.Timestamp('2026-10-16 18:00', tz=TZ).timestamp()]
+    return now
+
+
+def store_for(tmp_path, yahoo, clock):
+    return BarStore(str(tmp_path), fetch=yahoo.fetch, clock=lambda: clock[0])
+
+
+def test_read_period_and_view_from_parquet(tmp_path, clock):
+    yahoo = FakeYahoo(daily_index('2025-01-02', '2026-10-16'))
+    store = store_for(tmp_path, yahoo, clock)
+
+    month = store.read_period('AAPL', '1d', '1mo')
+    expected = yahoo.bars[yahoo.bars.index >= pd.Timestamp('2026-09-16', tz=TZ)]
+    pd.testing.assert_frame_equal(month, expected, check_freq=False)
+
+    weekly = store.read_view('AAPL', '1wk', '3mo')
+    quarter = yahoo.bars[yahoo.bars.index >= pd.Timestamp('2026-07-16', tz=TZ)]
+    pd.testing.assert_frame_equal(weekly, resample_ohlcv(quarter, '1wk'), check_freq=False)
+
+    span = store.read('AAPL', '1d', start='2026-10-01', end='2026-10-08')
+    assert list(span.index.day) == [1, 2, 5, 6, 7]
+    assert yahoo.calls == [('1d', None)]
+
+
+def test_tail_update_appends_segment(tmp_path, clock):
+    yahoo = FakeYahoo(daily_index('2025-01-02', '2026-10-23'))
+    yahoo.until = pd.Timestamp('2026-10-16', tz=TZ)
+    store = store_for(tmp_path, yahoo, clock)
+    store.read_period('AAPL', '1d', '5d')
+
+    # A week later the store fetches only the tail
+    yahoo.until = pd.Timestamp('2026-10-23', tz=TZ)
+    clock[0] = pd.Timestamp('2026-10-23 18:00', tz=TZ).timestamp()
+    week = store.read_period('AAPL', '1d', '5d')
+    assert list(week.index.day) == [19, 20, 21, 22, 23]
+    assert yahoo.calls[-1] == ('1d', pd.Timestamp('2026-10-16', tz=TZ))
+    assert len(store.segments('AAPL', '1d')) == 2
+
+
+def test_intraday_view_from_parquet(tmp_path, clock):
+    yahoo = FakeYahoo(intraday_index('2026-10-12', 5))
+    store = store_for(tmp_path, yahoo, clock)
+
+    day = store.read_view('AAPL', '2m', '1d')
+    assert len(day) == 195 and day.index[0] == pd.Timestamp('2026-10-16 09:30', tz=TZ)
+
+    hourly = store.read_view('AAPL', '30m', '5d')
+    pd.testing.assert_frame_equal(hourly, resample_ohlcv(yahoo.bars, '30m'), check_freq=False)
+
+
+def test_intraday_series_past_yahoo_limit_is_refetched(tmp_path, clock):
+    yahoo = FakeYahoo(intraday_index('2026-07-06', 5))
+    store = store_for(tmp_path, yahoo, clock)
+    clock[0] = pd.Timestamp('2026-07-10 18:00', tz=TZ).timestamp()
+    store.read_view('AAPL', '2m', '1d')
+
+    # Over 60 days later a tail fetch from the last bar would return nothing
+    yahoo.bars = make_bars(intraday_index('2026-10-12', 5))
+    yahoo.until = yahoo.bars.index[-1]
+    clock[0] = pd.Timestamp('2026-10-16 18:00', tz=TZ).timestamp()
+    day = store.read_view('AAPL', '2m', '1d')
+    assert yahoo.calls[-1] == ('2m', None)
+    assert day.index[0] == pd.Timestamp('2026-10-16 09:30', tz=TZ)
+
+
+def test_empty_tail_during_session_stays_stale(tmp_path, clock):
+    yahoo = FakeYahoo(daily_index('2025-01-02', '2026-10-16'))
+    store = store_for(tmp_path, yahoo, clock)
+    store.read_period('AAPL', '1d', '5d')
+    checked_at = store.meta('AAPL', '1d')['checked_at']
+
+    # Monday 11:00, and the tail fetch fails by returning no bars
+    clock[0] = pd.Timestamp('2026-10-19 11:00', tz=TZ).timestamp()
+    yahoo.until = pd.Timestamp('2025-01-01', tz=TZ)
+    store.read_period('AAPL', '1d', '5d')
+    assert store.meta('AAPL', '1d')['checked_at'] == checked_at
+
+    yahoo.until = yahoo.bars.index[-1]
+    store.read_period('AAPL', '1d', '5d')
+    assert store.meta('AAPL', '1d')['checked_at'] == clock[0]
+    assert len(yahoo.calls) == 3
+
+
+def test_fetch_without_bars_reads_empty(tmp_path, clock):
+    yahoo = FakeYahoo(daily_index('2025-01-02', '2026-10-16'))
+    bars = yahoo.bars
+    # What yfinance returns for an unknown symbol: no rows, object index
+    yahoo.bars = pd.DataFrame(columns=['Open', 'High', 'Low', 'Close', 'Adj Close', 'Volume'],
+                              index=pd.Index([], name='Date'))
+    store = store_for(tmp_path, yahoo, clock)
+
+    assert store.read_view('AAPL', '1wk', '1y').empty
+    assert store.read_view('AAPL', '2m', '1d').empty
+    assert store.meta('AAPL', '1d')['last'] is None
+    assert store.segments('AAPL', '1d') == []
+
+    # Once stale (Monday's session), the series is downloaded again in full
+    yahoo.bars = bars
+    clock[0] = pd.Timestamp('2026-10-19 11:00', tz=TZ).timestamp()
+    assert len(store.read_period('AAPL', '1d', '5d')) == 5
+    assert yahoo.calls[-1] == ('1d', None)
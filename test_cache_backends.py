@@ -0,0 +1,99 @@
+import io
+import pickle
+import threading
+
+import pytest
+
+import data_cache
+from cache_backends import (LocalBackend, LocalCacheServer, RedisBackend, _signature, backend_key, decode_entry,
+                            encode_command, read_reply)
+from data_cache import TTLCache, cached
+
+KEY = b'0' * 32
+
+
+@pytest.fixture
+def clock():
+    return [1000.0]
+
+
+@pytest.fixture
+def server(tmp_path, clock):
+    server = LocalCacheServer(str(tmp_path / 'cache.sock'), LocalBackend(clock=lambda: clock[0]))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def client(server, clock, signing_key=KEY):
+    return RedisBackend(f"unix://{server.server_address}", signing_key, clock=lambda: clock[0])
+
+
+def test_resp_round_trip():
+    assert encode_command('SET', 'k', b'\x00v', 'PX', 5) == \
+        b'*5\r\n$3\r\nSET\r\n$1\r\nk\r\n$2\r\n\x00v\r\n$2\r\nPX\r\n$1\r\n5\r\n'
+    stream = io.BytesIO(b'+OK\r\n:3\r\n$-1\r\n$4\r\na\r\nb\r\n*2\r\n$1\r\nx\r\n:1\r\n')
+    assert [read_reply(stream) for _ in range(5)] == [b'OK', 3, None, b'a\r\nb', [b'x', 1]]
+    with pytest.raises(ConnectionError):
+        read_reply(io.BytesIO(b'$4\r\nab'))
+
+
+def test_local_backend_expiry(clock):
+    backend = LocalBackend(clock=lambda: clock[0])
+    backend.set(('quote', 'AAPL'), {'ask': 1.0}, 'quote', clock[0] + 15)
+    assert backend.get(('quote', 'AAPL')) == ({'ask': 1.0}, 'quote', 1015.0)
+    clock[0] += 15
+    assert backend.get(('quote', 'AAPL')) is None
+    assert backend.entries == {}
+
+
+def test_server_get_set_and_ttl(server, clock):
+    writer, reader = client(server, clock), client(server, clock)
+    writer.set(('quote', 'AAPL'), {'ask': 1.0}, 'quote', clock[0] + 15)
+    assert reader.get(('quote', 'AAPL')) == ({'ask': 1.0}, 'quote', 1015.0)
+    assert reader.get(('quote', 'MSFT')) is None
+    assert reader.execute('PING') == b'PONG'
+
+    clock[0] += 15
+    assert reader.get(('quote', 'AAPL')) is None
+    assert reader.delete(backend_key(('quote', 'AAPL'))) == 0
+    writer.close()
+    reader.close()
+
+
+def test_signature_mismatch_is_a_miss(server, clock):
+    writer = client(server, clock)
+    key = backend_key(('quote', 'AAPL'))
+    writer.set(('quote', 'AAPL'), 1.0, 'quote', clock[0] + 15)
+
+    # Another secret, a tampered payload, an entry copied to another key and
+    # an unsigned pickle are all rejected
+    assert client(server, clock, b'1' * 32).get(('quote', 'AAPL')) is None
+    data = server.backend.get_bytes(key.encode())
+    tampered = bytearray(data)
+    tampered[-5] ^= 1
+    assert decode_entry(key, bytes(tampered), KEY) is None
+    assert decode_entry(backend_key(('quote', 'MSFT')), data, KEY) is None
+    writer.set_bytes(key, pickle.dumps(('quote', clock[0] + 15, 2.0)), 15)
+    assert writer.get(('quote', 'AAPL')) is None
+
+    # A signed entry that does not unpickle is a miss too
+    assert decode_entry(key, _signature(KEY, key, b'junk') + b'junk', KEY) is None
+    writer.close()
+
+
+def test_outage_falls_back_to_local_memory(tmp_path, clock, monkeypatch):
+    down = RedisBackend(f"unix://{tmp_path / 'missing.sock'}", KEY, clock=lambda: clock[0])
+    monkeypatch.setattr(data_cache, 'get_shared_backend', lambda: down)
+    calls = []
+
+    @cached('quote', cache=TTLCache(clock=lambda: clock[0]))
+    def get_quote(symbol):
+        calls.append(symbol)
+        return {'ask': 1.0}
+
+    assert get_quote('AAPL') == get_quote('AAPL') == {'ask': 1.0}
+    assert calls == ['AAPL']
+    assert down.failed_at == clock[0]
@@ -0,0 +1,53 @@
+import datetime
+
+from data_cache import DATA_CLASS_TTLS, TTLCache, estimate_size
+from market_calendar import EASTERN, market_expiry
+
+VALUE = b'x' * 1000
+
+
+def timestamp(year, month, day, hour, minute=0):
+    return datetime.datetime(year, month, day, hour, minute, tzinfo=EASTERN).timestamp()
+
+
+def test_least_recently_used_evicted_over_budget():
+    cache = TTLCache(budget=2 * estimate_size(VALUE), clock=lambda: 0)
+    cache.set('a', VALUE, 'profile')
+    cache.set('b', VALUE, 'profile')
+    assert cache.get('a', 'profile') == VALUE
+
+    cache.set('c', VALUE, 'profile')
+    assert cache.get('b', 'profile') is None
+    assert cache.get('a', 'profile') == VALUE and cache.get('c', 'profile') == VALUE
+    assert cache.size == 2 * estimate_size(VALUE)
+    assert cache.stats()['profile'] == {'hits': 3, 'misses': 1, 'expirations': 0, 'evictions': 1}
+
+    # A value larger than the whole budget is not stored
+    cache.set('d', VALUE * 3, 'profile')
+    assert cache.get('d', 'profile') is None and len(cache) == 2
+
+
+def test_entries_expire_by_data_class():
+    now = [0.0]
+    cache = TTLCache(clock=lambda: now[0])
+    cache.set('quote', 1, 'quote')
+    cache.set('profile', 2, 'profile')
+    now[0] = DATA_CLASS_TTLS['quote']
+    assert cache.get('quote', 'quote') is None
+    assert cache.get('profile', 'profile') == 2
+    assert cache.stats()['quote']['expirations'] == 1
+
+
+def test_market_expiry_keeps_weekend_quotes():
+    # Cached on Saturday, a US quote stays until Monday's open; a London one
+    # keeps its TTL
+    now = [timestamp(2026, 10, 17, 12)]
+    cache = TTLCache(clock=lambda: now[0], expiry=market_expiry)
+    cache.set('AAPL', 1, 'quote', symbol='AAPL')
+    cache.set('VOD.L', 2, 'quote', symbol='VOD.L')
+
+    now[0] = timestamp(2026, 10, 18, 12)
+    assert cache.get('AAPL', 'quote') == 1
+    assert cache.get('VOD.L', 'quote') is None
+    now[0] = timestamp(2026, 10, 19, 9, 30)
+    assert cache.get('AAPL', 'quote') is None
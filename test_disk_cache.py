@@ -0,0 +1,65 @@
+import pytest
+
+import data_cache
+from data_cache import TTLCache, cached
+from disk_cache import DiskCache
+
+
+@pytest.fixture
+def clock():
+    return [1000.0]
+
+
+def disk_for(tmp_path, clock, schema=1):
+    return DiskCache(str(tmp_path), schema=schema, clock=lambda: clock[0])
+
+
+def test_rows_expire_and_schema_changes_drop_them(tmp_path, clock):
+    disk = disk_for(tmp_path, clock)
+    disk.set(('fundamentals', 'AAPL'), {'pe': 30}, 'fundamentals', clock[0] + 60)
+    disk.set(('profile', 'AAPL'), {'name': 'Apple'}, 'profile', clock[0] + 600)
+    assert disk.get(('fundamentals', 'AAPL')) == ({'pe': 30}, 1060.0)
+
+    clock[0] += 60
+    assert disk.get(('fundamentals', 'AAPL')) is None
+    assert disk.entries('profile') == [(('profile', 'AAPL'), {'name': 'Apple'}, 1600.0)]
+    assert len(disk_for(tmp_path, clock)) == 1
+    assert len(disk_for(tmp_path, clock, schema=2)) == 0
+
+
+def test_preload_takes_the_most_read_rows(tmp_path, clock):
+    disk = disk_for(tmp_path, clock)
+    for symbol in ['AAPL', 'MSFT', 'NVDA']:
+        disk.set(('fundamentals', symbol), symbol, 'fundamentals', clock[0] + 60)
+    # Hits served from memory count once flushed
+    for _ in range(3):
+        disk.record_hit(('fundamentals', 'NVDA'))
+    disk.get(('fundamentals', 'MSFT'))
+
+    restarted = disk_for(tmp_path, clock)
+    assert restarted.hot_entries(1)[0][0] == ('fundamentals', 'MSFT')
+    disk.flush_hits()
+    hot = restarted.hot_entries(2)
+    assert [entry[0] for entry in hot] == [('fundamentals', 'NVDA'), ('fundamentals', 'MSFT')]
+
+    cache = TTLCache(clock=lambda: clock[0])
+    assert cache.preload(hot) == 2
+    assert cache.get(('fundamentals', 'NVDA'), 'fundamentals') == 'NVDA'
+    assert cache.stats()['fundamentals']['misses'] == 0
+
+
+def test_persisted_function_survives_a_restart(tmp_path, clock, monkeypatch):
+    monkeypatch.setattr(data_cache, 'get_shared_backend', lambda: None)
+    calls = []
+
+    def get_valuation_measures(symbol):
+        calls.append(symbol)
+        return {'pe': 30}
+
+    for _ in range(2):
+        # A fresh process: empty memory, the same disk
+        disk = disk_for(tmp_path, clock)
+        monkeypatch.setattr(data_cache, 'get_disk_cache', lambda: disk)
+        fetch = cached('fundamentals', cache=TTLCache(clock=lambda: clock[0]), persist=True)(get_valuation_measures)
+        assert fetch('AAPL') == {'pe': 30}
+    assert calls == ['AAPL']
@@ -0,0 +1,55 @@
+import pandas as pd
+
+from disk_cache import DiskCache
+from intraday_registry import CAPABILITY_TTL, NO_INTRADAY_TTL, IntradayRegistry
+
+TZ = 'America/New_York'
+
+
+def bars(start, sessions, per_session):
+    days = pd.bdate_range(start, periods=sessions)
+    index = pd.DatetimeIndex([day + pd.Timedelta(hours=9, minutes=30 + 2 * i)
+                              for day in days for i in range(per_session)]).tz_localize(TZ)
+    return pd.DataFrame({'Close': 1.0}, index=index)
+
+
+def registry_for(tmp_path, clock):
+    return IntradayRegistry(disk=DiskCache(str(tmp_path), clock=lambda: clock[0]), clock=lambda: clock[0])
+
+
+def test_opening_minutes_do_not_record_a_negative(tmp_path):
+    clock = [1000.0]
+    registry = registry_for(tmp_path, clock)
+    registry.record('SPY', True, 'ETF', 'PCX')
+
+    # Three bars into the session: not evidence either way
+    registry.record_bars('VOO', '2m', bars('2026-10-19', 1, 3), 'ETF', 'PCX')
+    assert 'VOO' not in registry.symbols
+    assert registry.has_intraday('VOO', 'ETF', 'PCX')
+
+    registry.record_bars('VOO', '2m', bars('2026-10-19', 1, 30), 'ETF', 'PCX')
+    assert registry.symbols['VOO'][3] == clock[0] + CAPABILITY_TTL
+
+
+def test_negatives_expire_after_an_hour(tmp_path):
+    clock = [1000.0]
+    registry = registry_for(tmp_path, clock)
+    # No bars at all, or too few over several sessions
+    registry.record_bars('NONE', '2m', pd.DataFrame(), 'EQUITY', 'NMS')
+    registry.record_bars('SPARSE', '15m', bars('2026-10-13', 2, 1), 'EQUITY', 'NMS')
+    assert not registry.has_intraday('NONE', 'EQUITY', 'NMS')
+    assert not registry.has_intraday('SPARSE', 'EQUITY', 'NMS')
+    assert registry.symbols['NONE'][3] == clock[0] + NO_INTRADAY_TTL
+
+    # The records survive a restart until they expire
+    assert not registry_for(tmp_path, clock).has_intraday('NONE', 'EQUITY', 'NMS')
+    clock[0] += NO_INTRADAY_TTL
+    assert registry_for(tmp_path, clock).symbols == {}
+    assert registry.has_intraday('NONE') and registry.has_intraday('SPARSE')
+
+
+def test_daily_views_are_ignored(tmp_path):
+    clock = [1000.0]
+    registry = registry_for(tmp_path, clock)
+    registry.record_bars('AAPL', '1d', pd.DataFrame(), 'EQUITY', 'NMS')
+    assert registry.symbols == {}
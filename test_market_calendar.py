@@ -0,0 +1,39 @@
+import datetime
+
+import pytest
+
+from market_calendar import EASTERN, is_us_listing, market_expiry, next_open
+
+TTL = 15
+
+
+def timestamp(year, month, day, hour, minute=0):
+    return datetime.datetime(year, month, day, hour, minute, tzinfo=EASTERN).timestamp()
+
+
+@pytest.mark.parametrize('symbol', ['AAPL', 'BRK-B', '^GSPC'])
+def test_us_listing_cached_until_next_open(symbol):
+    # Saturday: nothing trades until Monday's open
+    now = timestamp(2026, 10, 17, 12)
+    expected = next_open(datetime.datetime.fromtimestamp(now, EASTERN)).timestamp()
+    assert market_expiry('quote', TTL, now, symbol) == expected
+    assert expected == timestamp(2026, 10, 19, 9, 30)
+
+
+@pytest.mark.parametrize('symbol', ['VOD.L', '7203.T', '^N225', 'SAP.DE', 'EURUSD=X', 'BTC-USD'])
+def test_other_markets_keep_their_ttl(symbol):
+    # 4:00 Eastern on a Tuesday: the US is closed, London and Tokyo trade
+    now = timestamp(2026, 10, 20, 4)
+    assert not is_us_listing(symbol)
+    assert market_expiry('quote', TTL, now, symbol) == now + TTL
+    assert market_expiry('intraday', TTL, now, symbol) == now + TTL
+
+
+def test_us_listing_during_session_keeps_ttl():
+    now = timestamp(2026, 10, 20, 11)
+    assert market_expiry('quote', TTL, now, 'AAPL') == now + TTL
+
+
+def test_unknown_symbol_keeps_ttl():
+    now = timestamp(2026, 10, 17, 12)
+    assert market_expiry('quote', TTL, now) == now + TTL
@@ -0,0 +1,95 @@
+import pandas as pd
+import pytest
+
+import market_data
+from market_data import ProviderError, YFinanceProvider
+
+
+class FakeResponse:
+
+    def __init__(self, status_code, payload=None):
+        self.status_code = status_code
+        self.payload = payload
+
+    def json(self):
+        return self.payload
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise OSError(f"HTTP {self.status_code}")
+
+
+class FakeYfData:
+    # Answers quoteSummary requests the way Yahoo does
+    requests = []
+    response = None
+
+    def get(self, url, params=None):
+        self.requests.append((url, params))
+        return self.response
+
+
+@pytest.fixture
+def yf_data(monkeypatch):
+    FakeYfData.requests = []
+    monkeypatch.setattr(market_data, 'YfData', FakeYfData)
+    return FakeYfData
+
+
+def test_modules_from_quote_summary(yf_data):
+    modules = {'topHoldings': {'holdings': []}, 'fundPerformance': {'trailingReturns': {}}}
+    yf_data.response = FakeResponse(200, {'quoteSummary': {'result': [modules], 'error': None}})
+    assert YFinanceProvider().modules('SPY', ['topHoldings', 'fundPerformance']) == modules
+    url, params = yf_data.requests[0]
+    assert url.endswith('/quoteSummary/SPY')
+    assert params['modules'] == 'topHoldings,fundPerformance' and params['formatted'] == 'false'
+
+    yf_data.response = FakeResponse(404, {'quoteSummary': {'result': None, 'error': {}}})
+    assert YFinanceProvider().modules('NOPE', ['topHoldings']) == {}
+    yf_data.response = FakeResponse(500)
+    with pytest.raises(OSError):
+        YFinanceProvider().modules('SPY', ['topHoldings'])
+
+
+def test_modules_without_yfdata(monkeypatch):
+    monkeypatch.setattr(market_data, 'YfData', None)
+    with pytest.raises(ProviderError, match='YfData'):
+        YFinanceProvider().modules('SPY', ['topHoldings'])
+
+    class ChangedYfData:
+        def get(self, url):
+            pass
+
+    monkeypatch.setattr(market_data, 'YfData', ChangedYfData)
+    with pytest.raises(ProviderError, match='YfData.get has changed'):
+        YFinanceProvider().modules('SPY', ['topHoldings'])
+
+
+class FakeTicker:
+    measures = None
+
+    def __init__(self, symbol):
+        self.symbol = symbol
+
+    def get_valuation_measures(self, periods=5):
+        return self.measures
+
+
+def test_valuation_measures_as_yahooquery_rows(monkeypatch):
+    monkeypatch.setattr(market_data.yf, 'Ticker', FakeTicker)
+    FakeTicker.measures = pd.DataFrame({'Current': [3.9e12, 35.2], '9/30/2026': [3.7e12, 33.8],
+                                        '6/30/2026': [3.4e12, 31.1]},
+                                       index=['Market Cap', 'Trailing P/E'])
+    rows = YFinanceProvider().valuation_measures('AAPL')
+    assert list(rows.columns) == ['asOfDate', 'periodType', 'MarketCap', 'PeRatio']
+    assert list(rows['periodType']) == ['TTM', '3M', '3M']
+    assert list(rows['asOfDate'][1:]) == [pd.Timestamp('2026-09-30'), pd.Timestamp('2026-06-30')]
+    assert rows['asOfDate'][0] == pd.Timestamp.now().normalize()
+    assert list(rows['PeRatio']) == [35.2, 33.8, 31.1]
+
+    FakeTicker.measures = pd.DataFrame()
+    assert YFinanceProvider().valuation_measures('AAPL') is None
+
+    monkeypatch.delattr(FakeTicker, 'get_valuation_measures')
+    with pytest.raises(ProviderError, match='get_valuation_measures'):
+        YFinanceProvider().valuation_measures('AAPL')
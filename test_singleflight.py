@@ -0,0 +1,90 @@
+import threading
+import time
+
+import pytest
+
+import data_cache
+from data_cache import TTLCache, cached
+from singleflight import SingleFlight
+
+THREADS = 8
+
+
+def run_together(target):
+    # Starts THREADS threads calling target() at the same moment
+    barrier = threading.Barrier(THREADS)
+    results = [None] * THREADS
+
+    def worker(i):
+        barrier.wait()
+        try:
+            results[i] = target()
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+
+def release_when_joined(flight, release, threads):
+    # Lets the leader finish once every other caller waits on it
+    deadline = time.monotonic() + 5
+    while flight.shared < THREADS - 1 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        release.wait()
+        return object()
+
+    threads, results = run_together(lambda: flight.do('NVDA', fetch))
+    release_when_joined(flight, release, threads)
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert flight.shared == THREADS - 1 and flight.in_flight() == 0
+
+
+def test_exception_reaches_every_waiter():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def fetch():
+        release.wait()
+        raise ConnectionError('Yahoo is down')
+
+    threads, results = run_together(lambda: flight.do('NVDA', fetch))
+    release_when_joined(flight, release, threads)
+    assert all(isinstance(result, ConnectionError) for result in results)
+
+    # Nothing is remembered: the next call runs again
+    with pytest.raises(ConnectionError):
+        flight.do('NVDA', fetch)
+
+
+def test_cached_misses_coalesce(monkeypatch):
+    monkeypatch.setattr(data_cache, 'get_shared_backend', lambda: None)
+    cache = TTLCache(clock=lambda: 0)
+    release = threading.Event()
+    calls = []
+
+    @cached('quote', cache=cache)
+    def get_quote(symbol):
+        calls.append(symbol)
+        release.wait()
+        return {'ask': 1.0}
+
+    threads, results = run_together(lambda: get_quote('NVDA'))
+    release_when_joined(cache.flight, release, threads)
+    assert calls == ['NVDA']
+    assert all(result is results[0] for result in results)
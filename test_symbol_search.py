@@ -0,0 +1,58 @@
+import os
+
+from symbol_search import SymbolIndex, default_index_path
+from symbol_universe import SymbolUniverse, build_universe_file
+
+SYMBOLS = {
+    'MSFT': 'Microsoft Corporation',
+    'MSF.BR': 'Microsoft Corporation',
+    'AAPL': 'Apple Inc.',
+    'APLE': 'Apple Hospitality REIT, Inc.',
+    'AMZN': 'Amazon.com, Inc.',
+    'BRK-B': 'Berkshire Hathaway Inc.',
+    '^GSPC': 'S&P 500',
+}
+DELTA = {'version': 1, 'added': {'MSFZ': 'Microsoft Zeta Fund'}, 'removed': ['APLE'],
+         'renamed': {'AMZN': 'Amazon Holdings'}}
+
+
+def universe_at(tmp_path, symbols=SYMBOLS):
+    path = str(tmp_path / 'symbols.universe')
+    build_universe_file(symbols, path)
+    return SymbolUniverse(path)
+
+
+def answers(index):
+    return ([index.ranked_search(query) for query in ['', 'MS', 'MSFT', 'APPLE', 'HATH', 'CORPORATION']]
+            + [index.fuzzy_search(query) for query in ['MIRCOSOFT', 'APPEL', 'BERKSHIRE HATAWAY']]
+            + [index.symbols_with_prefix('A'), len(index), 'BRK-B' in index, 'NOPE' in index])
+
+
+def test_mapped_index_answers_like_the_in_memory_one(tmp_path):
+    universe = universe_at(tmp_path)
+    mapped = SymbolIndex(universe)
+    assert os.path.exists(default_index_path(universe.path))
+    assert answers(mapped) == answers(SymbolIndex(SYMBOLS))
+    assert answers(mapped.apply_delta(DELTA)) == answers(SymbolIndex(SYMBOLS).apply_delta(DELTA))
+    # Patching leaves the mapped index as it was
+    assert answers(mapped) == answers(SymbolIndex(SYMBOLS))
+    assert mapped.search('MICRO') == [('MSFT', 'Microsoft Corporation'), ('MSF.BR', 'Microsoft Corporation')]
+
+
+def test_index_file_is_rebuilt_for_a_newer_universe(tmp_path):
+    universe = universe_at(tmp_path)
+    SymbolIndex(universe)
+    index_path = default_index_path(universe.path)
+    built = os.path.getmtime(index_path)
+    SymbolIndex(universe)
+    assert os.path.getmtime(index_path) == built
+
+    universe = universe_at(tmp_path, {'NVDA': 'NVIDIA Corporation'})
+    os.utime(universe.path, (built + 10, built + 10))
+    assert SymbolIndex(universe).search('NVIDIA') == [('NVDA', 'NVIDIA Corporation')]
+
+
+def test_index_kept_in_memory_without_a_writable_directory(tmp_path):
+    universe = universe_at(tmp_path)
+    index = SymbolIndex(universe, index_path=str(tmp_path / 'missing' / 'symbols.index'))
+    assert answers(index) == answers(SymbolIndex(SYMBOLS))
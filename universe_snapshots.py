@@ -0,0 +1,137 @@
+# Versioned snapshots of the symbol universe, with a delta between each
+# version and the one before it.
+#
+# Every finished crawl is committed here as snapshot N (a universe file, see
+# symbol_universe) plus delta N, the symbols added, removed and renamed since
+# snapshot N-1. Version 0 is the stock_tickers module the app ships with. A
+# running app applies the deltas newer than its index instead of rebuilding
+# it, and a freshly started one maps the latest snapshot directly.
+#
+# A crawl of only some prefixes is committed with those prefixes as its scope:
+# the new snapshot is the previous one with just that part replaced, so
+# symbols under other prefixes are kept rather than reported as removed.
+#
+# Layout of the snapshot directory:
+#   snapshot-000007.universe   universe file for version 7
+#   snapshot-000007.index      its search index (symbol_search), built on first load
+#   delta-000007.json          {"version": 7, "base": 6, "created": ...,
+#                               "scope": ["AB", ...] or null,
+#                               "added": {symbol: name}, "removed": [symbol],
+#                               "renamed": {symbol: new name}}
+#
+# Usage: python universe_snapshots.py [snapshot dir]   (lists the versions)
+import datetime
+import json
+import os
+import re
+import sys
+
+from symbol_universe import SymbolUniverse, build_universe_file, load_symbol_universe
+
+SNAPSHOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'universe_snapshots')
+SNAPSHOT_PATTERN = re.compile(r'snapshot-(\d+)\.universe$')
+
+
+def diff_universes(old, new, scope=None):
+    # Delta body turning old into new ({symbol: name} mappings). With a scope
+    # only symbols starting with one of its prefixes can be removed.
+    added = {symbol: name for symbol, name in new.items() if symbol not in old}
+    renamed = {symbol: name for symbol, name in new.items() if symbol in old and old[symbol] != name}
+    prefixes = tuple(prefix.upper() for prefix in scope) if scope else None
+    removed = sorted(symbol for symbol in old
+                     if symbol not in new and (prefixes is None or symbol.startswith(prefixes)))
+    return {'added': added, 'removed': removed, 'renamed': renamed}
+
+
+def apply_delta(symbols, delta):
+    # Apply a delta to a {symbol: name} dict in place
+    for symbol in delta['removed']:
+        symbols.pop(symbol, None)
+    symbols.update(delta['added'])
+    symbols.update(delta['renamed'])
+    return symbols
+
+
+class SnapshotStore:
+    # The snapshot directory: versions, their universe files and deltas
+
+    def __init__(self, directory=SNAPSHOT_DIR):
+        self.directory = directory
+
+    def snapshot_path(self, version):
+        return os.path.join(self.directory, f"snapshot-{version:06d}.universe")
+
+    def delta_path(self, version):
+        return os.path.join(self.directory, f"delta-{version:06d}.json")
+
+    def versions(self):
+        if not os.path.isdir(self.directory):
+            return []
+        matches = (SNAPSHOT_PATTERN.match(name) for name in os.listdir(self.directory))
+        return sorted(int(match.group(1)) for match in matches if match)
+
+    def latest_version(self):
+        versions = self.versions()
+        return versions[-1] if versions else 0
+
+    def load(self, version=None):
+        # (version, universe), the latest by default; version 0 is the
+        # universe built from the stock_tickers module
+        version = self.latest_version() if version is None else version
+        if version == 0:
+            return 0, load_symbol_universe()
+        return version, SymbolUniverse(self.snapshot_path(version))
+
+    def delta(self, version):
+        with open(self.delta_path(version), encoding='UTF-8') as f:
+            return json.load(f)
+
+    def deltas_since(self, version):
+        # Deltas to bring a universe at `version` up to the latest one
+        return [self.delta(newer) for newer in self.versions() if newer > version]
+
+    def commit(self, symbols, scope=None):
+        # Write symbols ({symbol: name}) as the next version, with its delta.
+        # A scoped commit patches the previous snapshot: only symbols under
+        # the scope's prefixes are replaced by the new crawl.
+        symbols = {symbol.upper(): name for symbol, name in symbols.items()}
+        base_version, base_universe = self.load()
+        base = dict(base_universe.items())
+        base_universe.close()
+
+        if scope:
+            prefixes = tuple(prefix.upper() for prefix in scope)
+            merged = {symbol: name for symbol, name in base.items() if not symbol.startswith(prefixes)}
+            merged.update(symbols)
+            symbols = merged
+
+        delta = diff_universes(base, symbols, scope)
+        version = base_version + 1
+        delta.update({
+            'version': version,
+            'base': base_version,
+            'created': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+            'scope': sorted(scope) if scope else None,
+        })
+
+        os.makedirs(self.directory, exist_ok=True)
+        # The delta goes first: a snapshot is only listed once its delta exists
+        tmp_path = self.delta_path(version) + '.tmp'
+        with open(tmp_path, 'w', encoding='UTF-8') as f:
+            json.dump(delta, f)
+        os.replace(tmp_path, self.delta_path(version))
+        build_universe_file(symbols, self.snapshot_path(version))
+        return delta
+
+
+def main():
+    store = SnapshotStore(sys.argv[1] if len(sys.argv) > 1 else SNAPSHOT_DIR)
+    for version in store.versions():
+        delta = store.delta(version)
+        scope = ','.join(delta['scope']) if delta['scope'] else 'full'
+        print(f"{version:6d}  {delta['created']}  {scope:<12} +{len(delta['added'])} "
+              f"-{len(delta['removed'])} ~{len(delta['renamed'])}")
+
+
+if __name__ == '__main__':
+    main()